@@ -0,0 +1,463 @@
+"""
+Benchmark harness for the solar models.
+
+Times every model class at three scales:
+
+    single     one call
+    site_year  8,760 hours of one site (12 months for LJ)
+    portfolio  --sites sites (default 10,000) at one timestamp; full years for AnnualSimulation
+
+Scalar classes are timed next to their vectorized counterparts; the checks
+that both paths agree live in tests/ and run first with --check. Each repetition is timed
+separately: for the single scale p50/p99 are per-call latencies, for the larger
+scales they are per-batch latencies. p99 is only reported with at least 100
+repetitions; with fewer (site_year and portfolio) the slowest repetition is
+reported as max instead. Peak memory comes from one extra run under tracemalloc.
+
+Usage (from the repository root):
+
+    python benchmarks/run_benchmarks.py --output benchmarks/results/HEAD.json
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/HEAD.json
+    python benchmarks/run_benchmarks.py --check --compare benchmarks/results/HEAD.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from utils.solar_parameters import SolarParameters, SolarParametersBatch
+from utils.solar_radiation import SolarRadiation, SolarRadiationBatch
+from utils.cpr import CPR
+from utils.cprg import CPRG
+from utils.daily_integration import DailyIntegration
+from utils.ratio_models import compute_ratios
+from utils.lj import LJ, monthly_lj, lj_tilt_surface
+from utils.gcf import GCF
+from utils.solar_estimation import SolarEstimation, AnnualSimulation, EstimationPlan
+from utils.integration import TiltedSurfaceIntegral
+from utils.shading import HorizonProfile, RowShading, SiteShading
+
+SCALES = ("single", "site_year", "portfolio")
+REPEATS = {"single": 500, "site_year": 5, "portfolio": 3}
+BENCHMARKS = {}
+
+H_BAR_H = np.array([3.2, 4.0, 5.24, 6.5, 7.3, 7.8, 7.2, 6.7, 5.9, 4.7, 3.6, 3.0]) * 1e3
+H_BAR_D = H_BAR_H * 0.25
+LATITUDE, LONGITUDE, L_ST = 36.08, 115.16, 120
+TAU_B, TAU_D = 0.355, 2.211
+
+def benchmark(name, scale):
+    """
+    Register ``setup(inputs) -> (run, items)`` under ``name`` and ``scale``.
+    """
+    def register(setup):
+        BENCHMARKS[(name, scale)] = setup
+        return setup
+    return register
+
+class Inputs:
+    """
+    Deterministic inputs shared by all benchmarks.
+    """
+    def __init__(self, sites, seed=0):
+        rng = np.random.default_rng(seed)
+        self.sites = sites
+        self.n = np.repeat(np.arange(1, 366), 24)
+        self.hours = np.tile(np.arange(24), 365)
+        start = datetime(2025, 1, 1)
+        self.lst = [(start + timedelta(hours=int(k))).strftime("%Y-%m-%d %H:%M:%S") for k in range(8760)]
+        sun = SolarParametersBatch(self.n, LATITUDE, LONGITUDE, self.hours, L_ST)
+        self.alpha, self.a_s, self.delta_s, self.h_ss = sun.alpha, sun.a_s, sun.delta_s, sun.h_ss
+        self.h_s = (sun.h_s + 180) % 360 - 180
+        self.latitudes = rng.uniform(-55, 55, sites)
+        self.longitudes = rng.uniform(-180, 180, sites)
+        self.l_sts = np.round(self.longitudes / 15) * 15
+
+# --- single call -----------------------------------------------------------
+
+@benchmark("SolarParameters", "single")
+def _(inputs):
+    return lambda: SolarParameters(80, LATITUDE, LONGITUDE, "2025-03-21 12:00:00", L_ST), 1
+
+@benchmark("SolarParameters(lazy).alpha", "single")
+def _(inputs):
+    return lambda: SolarParameters(80, LATITUDE, LONGITUDE, "2025-03-21 12:00:00", L_ST, lazy=True).alpha, 1
+
+@benchmark("SolarParametersBatch", "single")
+def _(inputs):
+    return lambda: SolarParametersBatch(80, LATITUDE, LONGITUDE, 12.0, L_ST), 1
+
+@benchmark("SolarRadiation", "single")
+def _(inputs):
+    return lambda: SolarRadiation(80, 55.0, TAU_B, TAU_D, 30, 10.0, 0), 1
+
+@benchmark("SolarRadiationBatch", "single")
+def _(inputs):
+    return lambda: SolarRadiationBatch(80, 55.0, TAU_B, TAU_D, 30, 10.0, 0), 1
+
+@benchmark("CPR", "single")
+def _(inputs):
+    return lambda: CPR(30, 80), 1
+
+@benchmark("CPRG", "single")
+def _(inputs):
+    return lambda: CPRG(30, 80), 1
+
+@benchmark("DailyIntegration", "single")
+def _(inputs):
+    return lambda: DailyIntegration(LATITUDE, 0.5, 30, 80, 5240, 1.01), 1
+
+@benchmark("compute_ratios", "single")
+def _(inputs):
+    return lambda: compute_ratios(("cpr", "cprg", "daily_integration"), 30, 80, L=LATITUDE, delta_s=0.5, H_bar_h=5240, extraterrestrial_radiation_factor=1.01), 1
+
+@benchmark("LJ", "single")
+def _(inputs):
+    return lambda: LJ(LATITUDE, 0, -80, 80, 0.5, 30, 5240, 8500, 20, 40, 0.2), 1
+
+@benchmark("LJ(lazy).MCI", "single")
+def _(inputs):
+    return lambda: LJ(LATITUDE, 0, -80, 80, 0.5, 30, 5240, 8500, 20, 40, 0.2, lazy=True).MCI, 1
+
+@benchmark("GCF", "single")
+def _(inputs):
+    return lambda: GCF(1.0, 0.5, 4.0), 1
+
+@benchmark("SolarEstimation", "single")
+def _(inputs):
+    def run():
+        sp = SolarParameters(80, LATITUDE, LONGITUDE, "2025-03-21 12:00:00", L_ST)
+        sr = SolarRadiation(80, sp.alpha, TAU_B, TAU_D, LATITUDE, sp.a_s, 0)
+        SolarEstimation("cpr", LATITUDE, sp.delta_s, sp.h_s, 80, 5240, 1260, sr.extra_terrestrial_radiation_factor, LATITUDE, sr.rho, sr.i, sp.alpha)
+    return run, 1
+
+# --- one site-year ---------------------------------------------------------
+
+@benchmark("SolarParameters", "site_year")
+def _(inputs):
+    def run():
+        for n, lst in zip(inputs.n, inputs.lst):
+            SolarParameters(n, LATITUDE, LONGITUDE, lst, L_ST)
+    return run, 8760
+
+@benchmark("SolarParametersBatch", "site_year")
+def _(inputs):
+    return lambda: SolarParametersBatch(inputs.n, LATITUDE, LONGITUDE, inputs.hours, L_ST), 8760
+
+@benchmark("SolarRadiation", "site_year")
+def _(inputs):
+    def run():
+        for n, alpha, a_s in zip(inputs.n, inputs.alpha, inputs.a_s):
+            SolarRadiation(n, alpha, TAU_B, TAU_D, 30, a_s, 0)
+    return run, 8760
+
+@benchmark("SolarRadiationBatch", "site_year")
+def _(inputs):
+    return lambda: SolarRadiationBatch(inputs.n, inputs.alpha, TAU_B, TAU_D, 30, inputs.a_s, 0), 8760
+
+@benchmark("SolarRadiationBatch(fast)", "site_year")
+def _(inputs):
+    return lambda: SolarRadiationBatch(inputs.n, inputs.alpha, TAU_B, TAU_D, 30, inputs.a_s, 0, fast=True), 8760
+
+@benchmark("CPR", "site_year")
+def _(inputs):
+    def run():
+        for h_s, h_ss in zip(inputs.h_s, inputs.h_ss):
+            CPR(h_s, h_ss)
+    return run, 8760
+
+@benchmark("CPRG", "site_year")
+def _(inputs):
+    def run():
+        for h_s, h_ss in zip(inputs.h_s, inputs.h_ss):
+            CPRG(h_s, h_ss)
+    return run, 8760
+
+@benchmark("DailyIntegration", "site_year")
+def _(inputs):
+    def run():
+        for h_s, h_ss, delta_s in zip(inputs.h_s, inputs.h_ss, inputs.delta_s):
+            DailyIntegration(LATITUDE, delta_s, h_s, h_ss, 5240, 1.01)
+    return run, 8760
+
+@benchmark("compute_ratios", "site_year")
+def _(inputs):
+    return lambda: compute_ratios(("cpr", "cprg", "daily_integration"), inputs.h_s, inputs.h_ss, L=LATITUDE, delta_s=inputs.delta_s, H_bar_h=5240, extraterrestrial_radiation_factor=1.01), 8760
+
+@benchmark("LJ", "site_year")
+def _(inputs):
+    months = monthly_lj(LATITUDE, 30, H_BAR_H)
+    def run():
+        for m in range(12):
+            LJ(LATITUDE, months.alpha[m], months.h_sr[m], months.h_ss[m], months.delta_s[m], 30, H_BAR_H[m], months.H_o_bar_h[m], months.i[m], months.z[m], 0.2)
+    return run, 12
+
+@benchmark("lj_tilt_surface", "site_year")
+def _(inputs):
+    return lambda: lj_tilt_surface(LATITUDE, 30, H_BAR_H), 12
+
+@benchmark("SolarEstimation", "site_year")
+def _(inputs):
+    def run():
+        for k in range(8760):
+            sp = SolarParameters(inputs.n[k], LATITUDE, LONGITUDE, inputs.lst[k], L_ST)
+            sr = SolarRadiation(inputs.n[k], sp.alpha, TAU_B, TAU_D, LATITUDE, sp.a_s, 0)
+            SolarEstimation("cpr", LATITUDE, sp.delta_s, sp.h_s, inputs.h_ss[k], 5240, 1260, sr.extra_terrestrial_radiation_factor, LATITUDE, sr.rho, sr.i, sp.alpha)
+    return run, 8760
+
+@benchmark("AnnualSimulation", "site_year")
+def _(inputs):
+    return lambda: AnnualSimulation("cpr", LATITUDE, LONGITUDE, LATITUDE, 0, H_BAR_H, H_BAR_D, l_st=L_ST), 8760
+
+@benchmark("AnnualSimulation(single_axis)", "site_year")
+def _(inputs):
+    return lambda: AnnualSimulation("cpr", LATITUDE, LONGITUDE, 0, 0, H_BAR_H, H_BAR_D, l_st=L_ST, tracker="single_axis"), 8760
+
+@benchmark("AnnualSimulation(shaded)", "site_year")
+def _(inputs):
+    shading = SiteShading(HorizonProfile([-90, 0, 90, 180], [12, 4, 8, 2]), RowShading(0.4, LATITUDE))
+    return lambda: AnnualSimulation("cpr", LATITUDE, LONGITUDE, LATITUDE, 0, H_BAR_H, H_BAR_D, l_st=L_ST, shading=shading), 8760
+
+@benchmark("AnnualSimulation.update", "site_year")
+def _(inputs):
+    simulation = AnnualSimulation("cpr", LATITUDE, LONGITUDE, LATITUDE, 0, H_BAR_H, H_BAR_D, l_st=L_ST)
+    return lambda: simulation.update(H_BAR_H * 1.01, H_BAR_D), 8760
+
+@benchmark("GCFAcceptance", "site_year")
+def _(inputs):
+    return lambda: GCF(1.0, 0.5, 4.0).acceptance(inputs.alpha, inputs.a_s, LATITUDE, 0, I_b_N=800), 8760
+
+@benchmark("TiltedSurfaceIntegral", "site_year")
+def _(inputs):
+    return lambda: TiltedSurfaceIntegral(LATITUDE, LATITUDE, 0, TAU_B, TAU_D), 365
+
+@benchmark("TiltedSurfaceIntegral(step=1)", "site_year")
+def _(inputs):
+    return lambda: TiltedSurfaceIntegral(LATITUDE, LATITUDE, 0, TAU_B, TAU_D, step=1.0), 365
+
+@benchmark("TiltedSurfaceIntegral(fast)", "site_year")
+def _(inputs):
+    return lambda: TiltedSurfaceIntegral(LATITUDE, LATITUDE, 0, TAU_B, TAU_D, fast=True), 365
+
+# --- portfolio -------------------------------------------------------------
+
+@benchmark("SolarParameters", "portfolio")
+def _(inputs):
+    def run():
+        for latitude, longitude, l_st in zip(inputs.latitudes, inputs.longitudes, inputs.l_sts):
+            SolarParameters(80, latitude, longitude, "2025-03-21 12:00:00", l_st)
+    return run, inputs.sites
+
+@benchmark("SolarParametersBatch", "portfolio")
+def _(inputs):
+    return lambda: SolarParametersBatch(80, inputs.latitudes, inputs.longitudes, 12.0, inputs.l_sts), inputs.sites
+
+@benchmark("SolarRadiation", "portfolio")
+def _(inputs):
+    def run():
+        for latitude in inputs.latitudes:
+            SolarRadiation(80, 90 - abs(latitude), TAU_B, TAU_D, abs(latitude), 0.0, 0)
+    return run, inputs.sites
+
+@benchmark("SolarRadiationBatch", "portfolio")
+def _(inputs):
+    return lambda: SolarRadiationBatch(80, 90 - np.abs(inputs.latitudes), TAU_B, TAU_D, np.abs(inputs.latitudes), 0.0, 0), inputs.sites
+
+@benchmark("SolarRadiationBatch(screening)", "portfolio")
+def _(inputs):
+    # One site-year for each of 100 sites, exact and fast
+    sun = SolarParametersBatch(inputs.n[:, None], inputs.latitudes[:100], inputs.longitudes[:100], inputs.hours[:, None], inputs.l_sts[:100])
+    return lambda: SolarRadiationBatch(inputs.n[:, None], sun.alpha, TAU_B, TAU_D, np.abs(inputs.latitudes[:100]), sun.a_s, 0), sun.alpha.size
+
+@benchmark("SolarRadiationBatch(screening, fast)", "portfolio")
+def _(inputs):
+    sun = SolarParametersBatch(inputs.n[:, None], inputs.latitudes[:100], inputs.longitudes[:100], inputs.hours[:, None], inputs.l_sts[:100])
+    return lambda: SolarRadiationBatch(inputs.n[:, None], sun.alpha, TAU_B, TAU_D, np.abs(inputs.latitudes[:100]), sun.a_s, 0, fast=True), sun.alpha.size
+
+@benchmark("CPR", "portfolio")
+def _(inputs):
+    def run():
+        for h_ss in inputs.h_ss[:inputs.sites]:
+            CPR(30, h_ss)
+    return run, inputs.sites
+
+@benchmark("CPRG", "portfolio")
+def _(inputs):
+    def run():
+        for h_ss in inputs.h_ss[:inputs.sites]:
+            CPRG(30, h_ss)
+    return run, inputs.sites
+
+@benchmark("DailyIntegration", "portfolio")
+def _(inputs):
+    def run():
+        for latitude in inputs.latitudes:
+            DailyIntegration(abs(latitude), 0.5, 30, 90, 5240, 1.01)
+    return run, inputs.sites
+
+@benchmark("compute_ratios", "portfolio")
+def _(inputs):
+    latitudes = np.abs(inputs.latitudes)
+    return lambda: compute_ratios(("cpr", "cprg", "daily_integration"), 30, 90, L=latitudes, delta_s=0.5, H_bar_h=5240, extraterrestrial_radiation_factor=1.01), inputs.sites
+
+@benchmark("LJ", "portfolio")
+def _(inputs):
+    def run():
+        for latitude in inputs.latitudes:
+            monthly_lj(latitude, abs(latitude), H_BAR_H)
+    return run, inputs.sites
+
+@benchmark("lj_tilt_surface", "portfolio")
+def _(inputs):
+    H_bar_h = np.tile(H_BAR_H, (inputs.sites, 1))
+    return lambda: lj_tilt_surface(inputs.latitudes, np.arange(0, 91, 5), H_bar_h), inputs.sites
+
+@benchmark("lj_tilt_surface(klucher)", "portfolio")
+def _(inputs):
+    H_bar_h = np.tile(H_BAR_H, (inputs.sites, 1))
+    return lambda: lj_tilt_surface(inputs.latitudes, np.arange(0, 91, 5), H_bar_h, sky_type="klucher"), inputs.sites
+
+@benchmark("GCF", "portfolio")
+def _(inputs):
+    R = 1 + inputs.latitudes / 100
+    def run():
+        for value in R:
+            GCF(value, 0.5, 4.0)
+    return run, inputs.sites
+
+@benchmark("GCF_array", "portfolio")
+def _(inputs):
+    R = 1 + inputs.latitudes / 100
+    return lambda: GCF(R, 0.5, 4.0), inputs.sites
+
+@benchmark("EstimationPlan.evaluate", "portfolio")
+def _(inputs):
+    latitudes = np.abs(inputs.latitudes)
+    plan = EstimationPlan("cpr", latitudes, 0.5, 30, 90, 1.01, latitudes, 0.2, 35, 50)
+    return lambda: plan.evaluate(5240, 1260), inputs.sites
+
+@benchmark("GCFAcceptance", "portfolio")
+def _(inputs):
+    # --sites concentrator designs screened against one site-year
+    R = 1 + np.abs(inputs.latitudes) / 50
+    L = 2 + np.abs(inputs.longitudes) / 30
+    return lambda: GCF(R, 0.5, L).acceptance(inputs.alpha, inputs.a_s, LATITUDE, 0, I_b_N=800, keep_series=False), inputs.sites
+
+@benchmark("AnnualSimulation", "portfolio")
+def _(inputs):
+    def run():
+        for latitude, longitude, l_st in zip(inputs.latitudes, inputs.longitudes, inputs.l_sts):
+            AnnualSimulation("cpr", latitude, longitude, abs(latitude), 0, H_BAR_H, H_BAR_D, l_st=l_st)
+    return run, inputs.sites
+
+# --- harness ---------------------------------------------------------------
+
+# Fewer repetitions than this make p99 the same as the maximum
+MIN_REPEAT_P99 = 100
+
+def measure(run, items, repeat):
+    run()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    times = np.array(times)
+    return {
+        "items": items,
+        "repeat": repeat,
+        "mean_s": float(times.mean()),
+        "p50_s": float(np.percentile(times, 50)),
+        "p99_s": float(np.percentile(times, 99)) if repeat >= MIN_REPEAT_P99 else None,
+        "max_s": float(times.max()),
+        "throughput_per_s": float(items / np.median(times)),
+        "peak_bytes": int(peak),
+    }
+
+def run_checks():
+    """
+    Run the test suite, which holds every vectorized path to its scalar counterpart.
+
+    :return: pytest exit status (0 if all tests pass)
+    """
+    tests = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tests")
+    return subprocess.run([sys.executable, "-m", "pytest", "-q", tests]).returncode
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(scales, sites, names=None, repeat_scale=1.0):
+    inputs = Inputs(sites)
+    results = {}
+    with np.errstate(all='ignore'):
+        for (name, scale), setup in BENCHMARKS.items():
+            if scale not in scales or (names and name not in names):
+                continue
+            run, items = setup(inputs)
+            key = f"{name}[{scale}]"
+            result = results[key] = measure(run, items, max(1, int(REPEATS[scale] * repeat_scale)))
+            tail, tail_s = ("p99", result['p99_s']) if result['p99_s'] is not None else ("max", result['max_s'])
+            print(f"{key:36s} {result['throughput_per_s']:14.1f} items/s  p50 {result['p50_s'] * 1e3:10.3f} ms  "
+                  f"{tail} {tail_s * 1e3:10.3f} ms  peak {result['peak_bytes'] / 2**20:8.2f} MiB")
+    return {
+        "meta": {"commit": git_commit(), "timestamp": datetime.now().isoformat(timespec='seconds'), "python": platform.python_version(),
+                 "numpy": np.__version__, "platform": platform.platform(), "sites": sites},
+        "results": results,
+    }
+
+def compare(baseline, current, threshold):
+    """
+    Print p50 speed-ups against a baseline and return the names that regressed beyond ``threshold``.
+    """
+    regressions = []
+    for key, result in current["results"].items():
+        if key not in baseline["results"]:
+            continue
+        ratio = baseline["results"][key]["p50_s"] / result["p50_s"]
+        flag = ""
+        if ratio < 1 / threshold:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(f"{key:36s} {ratio:8.2f}x vs {baseline['meta'].get('commit')}{flag}")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the solar model classes.")
+    parser.add_argument("--scale", action="append", choices=SCALES, help="Scales to run (default: all)")
+    parser.add_argument("--sites", type=int, default=10000, help="Number of sites for the portfolio scale")
+    parser.add_argument("--only", action="append", help="Only run benchmarks with this name")
+    parser.add_argument("--repeat-scale", type=float, default=1.0, help="Multiplier for the number of repetitions")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--compare", help="Compare against a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Slow-down factor reported as a regression")
+    parser.add_argument("--check", action="store_true", help="Run the equivalence tests first and stop if they fail")
+    args = parser.parse_args()
+
+    if args.check and run_checks() != 0:
+        sys.exit(1)
+
+    report = run_benchmarks(args.scale or SCALES, args.sites, args.only, args.repeat_scale)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.threshold)
+    sys.exit(1 if regressions else 0)
@@ -1,11 +1,15 @@
-from datetime import datetime, timedelta
+import logging
 
-def calculate_n(input_date):
-    current_year = datetime.now().year
-    date = datetime.strptime(f"{input_date} {current_year}", "%b %d %Y")
-    jan_1 = datetime(year=current_year, month=1, day=1)
-    delta = date - jan_1
-    return delta.days + 1  # Include Jan 1 as day 1
+logger = logging.getLogger(__name__)
+
+def calculate_n(input_date, year=None):
+    """
+    Day of year of a "Mon DD" date; see solar_time.day_of_year.
+
+    :param year: Calendar year; None for a fixed 365-day reference year
+    """
+    from .solar_time import day_of_year
+    return day_of_year(input_date, year)
 
 def calculate_local_standard_meridian(longitude):
     """
@@ -16,7 +20,7 @@ def calculate_local_standard_meridian(longitude):
     """
     # Local Standard Meridian is typically a multiple of 15 degrees
     l_st = round(longitude / 15) * 15
-    print(f"Given longitude: {longitude}° => Local Standard Meridian: {l_st}°")
+    logger.debug("Given longitude: %s° => Local Standard Meridian: %s°", longitude, l_st)
     return l_st
 
 def time_to_hour_angle(time_str):
@@ -38,5 +42,71 @@ def time_to_hour_angle(time_str):
     # Calculate the hour angle in degrees
     hour_angle = fraction_of_day * 360  # 360 degrees for a full day
     
-    print(f"Time: {time_str} -> Hour Angle: {hour_angle}°")
-    return hour_angle
\ No newline at end of file
+    logger.debug("Time: %s -> Hour Angle: %s°", time_str, hour_angle)
+    return hour_angle
+
+# Public names of the model modules, imported on first access so that
+# ``import utils`` stays cheap and a CLI command loads only the modules it uses.
+_LAZY_ATTRIBUTES = {
+    "SolarParameters": "solar_parameters",
+    "SolarParametersBatch": "solar_parameters",
+    "SolarRadiation": "solar_radiation",
+    "SolarRadiationBatch": "solar_radiation",
+    "GROUND_REFLECTIVITY": "solar_radiation",
+    "CPR": "cpr",
+    "CPRG": "cprg",
+    "DailyIntegration": "daily_integration",
+    "RATIO_MODELS": "ratio_models",
+    "compute_ratios": "ratio_models",
+    "LJ": "lj",
+    "monthly_lj": "lj",
+    "lj_tilt_surface": "lj",
+    "SKY_MODELS": "lj",
+    "optimal_tilt": "lj",
+    "GCF": "gcf",
+    "GCFAcceptance": "gcf",
+    "SolarEstimation": "solar_estimation",
+    "AnnualSimulation": "solar_estimation",
+    "EstimationPlan": "solar_estimation",
+    "TiltedSurfaceIntegral": "integration",
+    "SingleAxisTracker": "tracking",
+    "DualAxisTracker": "tracking",
+    "TRACKERS": "tracking",
+    "HorizonProfile": "shading",
+    "RowShading": "shading",
+    "SiteShading": "shading",
+    "AstronomicalCache": "astro_cache",
+    "AstronomicalTable": "astro_cache",
+    "shared_cache": "astro_cache",
+    "run_portfolio": "portfolio",
+    "run_shard": "batch",
+    "merge_shards": "batch",
+    "estimate_from_weather_file": "weather_io",
+    "ResultStore": "result_store",
+    "ResultStoreWriter": "result_store",
+    "EstimationService": "service",
+    "day_of_year": "solar_time",
+    "enable_trace": "tracing",
+    "disable_trace": "tracing",
+    "Metrics": "instrumentation",
+    "Profile": "instrumentation",
+    "enable_metrics": "instrumentation",
+    "disable_metrics": "instrumentation",
+    "stage": "instrumentation",
+}
+
+_SUBMODULES = frozenset(_LAZY_ATTRIBUTES.values()) | {"records"}
+
+def __getattr__(name):
+    import importlib
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(f".{_LAZY_ATTRIBUTES[name]}", __name__), name)
+    elif name in _SUBMODULES:
+        value = importlib.import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES) | _SUBMODULES)
@@ -0,0 +1,30 @@
+"""
+Command line entry point: ``python -m utils <command> [arguments]``.
+
+Only the module behind the chosen command is imported.
+"""
+import importlib
+import sys
+
+COMMANDS = {
+    "estimate": "solar_estimation",
+    "sun": "solar_parameters",
+    "radiation": "solar_radiation",
+    "cpr": "cpr",
+    "cprg": "cprg",
+    "lj": "lj",
+    "portfolio": "portfolio",
+    "batch": "batch",
+    "serve": "service",
+}
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in COMMANDS:
+        print(f"usage: python -m utils {{{','.join(COMMANDS)}}} [arguments]")
+        return 1
+    module = importlib.import_module(f".{COMMANDS[argv[0]]}", __package__)
+    return module.main(argv[1:]) or 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from .portfolio import read_site_table, write_results, run_chunk
+from .instrumentation import count
+
+CHUNK_DIR = "chunks"
+
+def chunk_path(output_dir, chunk):
+    return os.path.join(output_dir, CHUNK_DIR, f"chunk-{chunk:06d}.csv")
+
+def manifest_path(output_dir, shard_index, shard_count):
+    return os.path.join(output_dir, f"manifest-{shard_index}-of-{shard_count}.json")
+
+def _write_json_atomic(data, path):
+    tmp = path + ".tmp"
+    with open(tmp, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def shard_chunks(n_sites, chunk_size, shard_index, shard_count):
+    """
+    Chunk numbers owned by one shard.
+
+    Chunk k holds sites [k * chunk_size, (k + 1) * chunk_size); chunks are dealt
+    to shards round-robin, so every shard gets a similar mix of the site table.
+    """
+    if not 0 <= shard_index < shard_count:
+        raise ValueError(f"shard index {shard_index} out of range for {shard_count} shards")
+    n_chunks = -(-n_sites // chunk_size)
+    return list(range(shard_index, n_chunks, shard_count))
+
+def run_shard(sites_path, output_dir, shard_index=0, shard_count=1, model_name="cpr", workers=None, chunk_size=256, ground_type='ordinary'):
+    """
+    Score one shard of a site table, checkpointing every chunk.
+
+    Each chunk's results are written to ``chunks/chunk-NNNNNN.csv`` through a
+    temporary file and os.replace, then recorded in this shard's manifest
+    (``manifest-<index>-of-<count>.json``, also replaced atomically). A rerun
+    with the same arguments skips the chunks the manifest lists, so a shard
+    killed mid-run resumes where it stopped. Shards only share the output
+    directory and never write the same file. The site table is identified by
+    its SHA-256 and row count, not its path, so nodes may mount it anywhere.
+
+    :param sites_path: CSV site table (see portfolio.read_site_table); every shard reads the whole table
+    :param output_dir: Output directory shared by all shards
+    :param workers: Number of worker processes (default: os.cpu_count()); 1 runs in-process
+    :param chunk_size: Sites per chunk, the unit of work and of checkpointing
+    :raises ValueError: If an existing manifest was written with different settings
+    :return: The shard's manifest dict; ``failed_sites`` maps chunk numbers (as strings) to failed-site counts
+    """
+    sites = read_site_table(sites_path)
+    os.makedirs(os.path.join(output_dir, CHUNK_DIR), exist_ok=True)
+    path = manifest_path(output_dir, shard_index, shard_count)
+    settings = {"sites_sha256": file_sha256(sites_path), "n_sites": len(sites), "chunk_size": chunk_size,
+                "shard_index": shard_index, "shard_count": shard_count, "model": model_name, "ground_type": ground_type}
+    manifest = dict(settings, sites=os.path.abspath(sites_path), completed=[], failed_sites={})
+    if os.path.exists(path):
+        with open(path) as f:
+            previous = json.load(f)
+        changed = [key for key, value in settings.items() if previous.get(key) != value]
+        if changed:
+            raise ValueError(f"{path} was written with different {', '.join(changed)}; use a new output directory")
+        # A chunk counts as done only if its output is still there
+        manifest["completed"] = [chunk for chunk in previous["completed"] if os.path.exists(chunk_path(output_dir, chunk))]
+        manifest["failed_sites"] = {str(chunk): previous["failed_sites"].get(str(chunk), 0) for chunk in manifest["completed"]}
+
+    done = set(manifest["completed"])
+    pending = [chunk for chunk in shard_chunks(len(sites), chunk_size, shard_index, shard_count) if chunk not in done]
+    count("batch_chunks_resumed", len(done))
+
+    def record(chunk, results):
+        tmp = chunk_path(output_dir, chunk) + ".tmp"
+        write_results(results, tmp)
+        os.replace(tmp, chunk_path(output_dir, chunk))
+        manifest["completed"] = sorted(manifest["completed"] + [chunk])
+        manifest["failed_sites"][str(chunk)] = sum(not result.ok for result in results)
+        _write_json_atomic(manifest, path)
+        count("batch_chunks_written")
+
+    tasks = {chunk: (chunk * chunk_size, sites[chunk * chunk_size:(chunk + 1) * chunk_size], model_name, ground_type, False) for chunk in pending}
+    workers = workers or os.cpu_count()
+    if workers == 1:
+        for chunk, task in tasks.items():
+            record(chunk, run_chunk(task)[0])
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(run_chunk, task): chunk for chunk, task in tasks.items()}
+            for future in as_completed(futures):
+                record(futures[future], future.result()[0])
+    _write_json_atomic(manifest, path)
+    return manifest
+
+def merge_shards(output_dir, path):
+    """
+    Concatenate the chunk outputs of all shards into one CSV, in site-table order.
+
+    :raises ValueError: If manifests are missing or disagree, or chunks are not finished or their files are gone
+    :return: Number of sites written
+    """
+    manifests = []
+    for name in sorted(os.listdir(output_dir)):
+        if name.startswith("manifest-") and name.endswith(".json"):
+            with open(os.path.join(output_dir, name)) as f:
+                manifests.append(json.load(f))
+    if not manifests:
+        raise ValueError(f"no shard manifests in {output_dir}")
+    first = manifests[0]
+    for manifest in manifests:
+        for key in ("sites_sha256", "n_sites", "chunk_size", "shard_count", "model", "ground_type"):
+            if manifest[key] != first[key]:
+                raise ValueError(f"shard manifests disagree on {key}")
+    shards = {manifest["shard_index"] for manifest in manifests}
+    missing_shards = sorted(set(range(first["shard_count"])) - shards)
+    if missing_shards:
+        raise ValueError(f"no manifest for shards {missing_shards}")
+
+    n_chunks = -(-first["n_sites"] // first["chunk_size"])
+    completed = {chunk for manifest in manifests for chunk in manifest["completed"]}
+    missing = [chunk for chunk in range(n_chunks) if chunk not in completed or not os.path.exists(chunk_path(output_dir, chunk))]
+    if missing:
+        raise ValueError(f"{len(missing)} of {n_chunks} chunks are not finished, e.g. chunk {missing[0]}")
+
+    tmp = path + ".tmp"
+    with open(tmp, 'w', newline='') as out:
+        for chunk in range(n_chunks):
+            with open(chunk_path(output_dir, chunk), newline='') as f:
+                header = f.readline()
+                if chunk == 0:
+                    out.write(header)
+                out.writelines(f)
+    os.replace(tmp, path)
+    return first["n_sites"]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a site table in shards with checkpoint/resume, and merge the shard outputs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="Score one shard; rerun the same command to resume")
+    run.add_argument("sites", help="CSV site table")
+    run.add_argument("output_dir", help="Output directory shared by all shards")
+    run.add_argument("--shard-index", type=int, default=0)
+    run.add_argument("--shard-count", type=int, default=1)
+    run.add_argument("--model", default="cpr", choices=["cpr", "cprg", "daily_integration"])
+    run.add_argument("--workers", type=int, default=None)
+    run.add_argument("--chunk-size", type=int, default=256)
+    run.add_argument("--ground-type", default='ordinary', choices=['ordinary', 'snow'])
+    merge = commands.add_parser("merge", help="Merge finished shards into one CSV")
+    merge.add_argument("output_dir", help="Output directory of the shards")
+    merge.add_argument("output", help="CSV file for the merged results")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        manifest = run_shard(args.sites, args.output_dir, args.shard_index, args.shard_count, args.model, args.workers, args.chunk_size, args.ground_type)
+        total = len(shard_chunks(manifest["n_sites"], manifest["chunk_size"], args.shard_index, args.shard_count))
+        failed = sum(manifest['failed_sites'].values())
+        print(f"Shard {args.shard_index}/{args.shard_count}: {len(manifest['completed'])} of {total} chunks done, {failed} sites failed")
+        return 1 if failed or len(manifest['completed']) < total else 0
+    print(f"Merged {merge_shards(args.output_dir, args.output)} sites into {args.output}")
+    return 0
@@ -1,6 +1,11 @@
 import numpy as np
+from .tracing import trace
+from .instrumentation import timed
+from .records import GCFRecord
+from .solar_radiation import cos_incidence_angle
 
 class GCF:
+    @timed("GCF")
     def __init__(self, R, r, L):
         self.R = R
         self.r = r
@@ -10,3 +15,86 @@ class GCF:
         self.opening_angle = np.degrees(np.arctan((self.R)/self.L))
         self.slope_angle = np.degrees(np.arctan((self.R-self.r)/self.L))
         self.field_of_view = 2*self.opening_angle
+
+        trace("GCF", self)
+
+    def to_record(self):
+        return GCFRecord.from_object(self)
+
+    def acceptance(self, alpha, a_s, beta, a_w, I_b_N=None, interval_hours=1.0, keep_series=True, chunk_elements=2**20, dtype=np.float64, cutoff_width=1.0):
+        """
+        Concentrator acceptance of this geometry (or array of geometries) over a sun-position series.
+
+        See GCFAcceptance.
+        """
+        return GCFAcceptance(self, alpha, a_s, beta, a_w, I_b_N, interval_hours, keep_series, chunk_elements, dtype, cutoff_width)
+
+class GCFAcceptance:
+    """
+    Concentrator acceptance of GCF geometries over a sun-position time series.
+
+    Rays that enter the aperture (radius R) within the design half-angle,
+    ``limit_angle``, reach the receiver directly or after reflections off the
+    walls, so the accepted fraction is 1 up to ``limit_angle``. Beyond it the
+    fraction falls linearly to 0 at ``limit_angle + cutoff_width`` degrees,
+    which stands in for the rounded edge of a real acceptance curve (surface
+    errors, truncation); ``cutoff_width=0`` gives the ideal step.
+
+    The sun-position inputs (alpha, a_s and optionally beta, a_w, I_b_N) share a
+    leading time axis of length T; the GCF's R, r and L broadcast to a design
+    shape, and per-timestep outputs have shape (T,) + design shape. Only sunlit
+    timesteps are evaluated, in chunks of about ``chunk_elements`` values to
+    bound temporaries when sweeping many designs.
+
+    ``fraction`` is the share of the beam entering the aperture that is
+    accepted. ``intercepted_energy`` is that beam times the timestep, in Wh
+    when R is in metres, and ``total_energy`` sums it over time per design.
+    With keep_series=False only ``total_energy`` and ``mean_fraction`` (over
+    sunlit timesteps) are kept, which is enough for screening large design
+    sweeps.
+
+    :param I_b_N: Beam normal irradiance in W/m^2; None gives values per unit irradiance
+    :param interval_hours: Length of each timestep, for intercepted energy
+    :param cutoff_width: Width in degrees of the linear cutoff beyond limit_angle
+    """
+    @timed("GCFAcceptance")
+    def __init__(self, gcf, alpha, a_s, beta, a_w, I_b_N=None, interval_hours=1.0, keep_series=True, chunk_elements=2**20, dtype=np.float64, cutoff_width=1.0):
+        R, limit_angle = np.broadcast_arrays(np.asarray(gcf.R, dtype=float), np.asarray(gcf.limit_angle, dtype=float))
+        self.design_shape = R.shape
+        self.cutoff_width = cutoff_width
+        alpha = np.atleast_1d(np.asarray(alpha, dtype=float))
+        self.T = alpha.shape[0]
+        alpha, a_s, beta, a_w, I_b_N = (np.broadcast_to(np.asarray(value, dtype=float), (self.T,))
+                                        for value in (alpha, a_s, beta, a_w, 1.0 if I_b_N is None else I_b_N))
+
+        cos_theta = cos_incidence_angle(alpha, a_s, beta, a_w)
+        self.theta = np.degrees(np.arccos(np.clip(cos_theta, -1, 1)))
+        lit = np.flatnonzero((alpha > 0) & (cos_theta > 0))
+        # Beam energy entering the aperture for each sunlit timestep
+        aperture = np.pi * np.square(R)
+        power = I_b_N[lit] * cos_theta[lit] * interval_hours
+
+        shape = (self.T,) + self.design_shape
+        self.fraction = np.zeros(shape, dtype=dtype) if keep_series else None
+        self.intercepted_energy = np.zeros(shape, dtype=dtype) if keep_series else None
+        self.total_energy = np.zeros(self.design_shape)
+        fraction_sum = np.zeros(self.design_shape)
+
+        expand = (slice(None),) + (None,) * len(self.design_shape)
+        rows = max(1, chunk_elements // max(R.size, 1))
+        for start in range(0, lit.size, rows):
+            chunk = lit[start:start + rows]
+            beyond = self.theta[chunk][expand] - limit_angle
+            if cutoff_width > 0:
+                fraction = np.clip(1 - beyond / cutoff_width, 0, 1)
+            else:
+                fraction = (beyond <= 0).astype(float)
+            energy = fraction * aperture * power[start:start + rows][expand]
+            self.total_energy += energy.sum(axis=0)
+            fraction_sum += fraction.sum(axis=0)
+            if keep_series:
+                self.intercepted_energy[chunk] = energy
+                self.fraction[chunk] = fraction
+        self.mean_fraction = fraction_sum / max(lit.size, 1)
+
+        trace("GCFAcceptance", self)
@@ -0,0 +1,198 @@
+import cProfile
+import functools
+import io
+import json
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import nullcontext
+
+class Metrics:
+    """
+    Per-stage wall-clock timers and event counters.
+
+    Each timer keeps the number of calls, the total and the longest duration in
+    seconds. Timers of nested stages overlap: a stage's total includes the time
+    spent in the stages it calls.
+    """
+    def __init__(self):
+        self.timers = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds):
+        with self._lock:
+            timer = self.timers.get(name)
+            if timer is None:
+                self.timers[name] = [1, seconds, seconds]
+            else:
+                timer[0] += 1
+                timer[1] += seconds
+                timer[2] = max(timer[2], seconds)
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def merge(self, snapshot):
+        """
+        Add the timers and counters of another Metrics' ``to_json()``, e.g. from a worker process.
+        """
+        with self._lock:
+            for name, timer in snapshot["timers"].items():
+                current = self.timers.setdefault(name, [0, 0.0, 0.0])
+                current[0] += timer["calls"]
+                current[1] += timer["seconds"]
+                current[2] = max(current[2], timer["max_seconds"])
+            for name, value in snapshot["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def to_json(self):
+        with self._lock:
+            return {"timers": {name: {"calls": calls, "seconds": seconds, "max_seconds": longest} for name, (calls, seconds, longest) in self.timers.items()},
+                    "counters": dict(self.counters)}
+
+    def to_prometheus(self, prefix="solar"):
+        """
+        Metrics in the Prometheus text exposition format.
+        """
+        snapshot = self.to_json()
+        lines = [f"# HELP {prefix}_stage_calls_total Number of calls per stage.", f"# TYPE {prefix}_stage_calls_total counter"]
+        lines += [f'{prefix}_stage_calls_total{{stage="{name}"}} {timer["calls"]}' for name, timer in sorted(snapshot["timers"].items())]
+        lines += [f"# HELP {prefix}_stage_seconds_total Wall-clock time spent per stage.", f"# TYPE {prefix}_stage_seconds_total counter"]
+        lines += [f'{prefix}_stage_seconds_total{{stage="{name}"}} {timer["seconds"]!r}' for name, timer in sorted(snapshot["timers"].items())]
+        lines += [f"# HELP {prefix}_stage_max_seconds Longest single call per stage.", f"# TYPE {prefix}_stage_max_seconds gauge"]
+        lines += [f'{prefix}_stage_max_seconds{{stage="{name}"}} {timer["max_seconds"]!r}' for name, timer in sorted(snapshot["timers"].items())]
+        lines += [f"# HELP {prefix}_events_total Event counters.", f"# TYPE {prefix}_events_total counter"]
+        lines += [f'{prefix}_events_total{{event="{name}"}} {value}' for name, value in sorted(snapshot["counters"].items())]
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        """
+        Write the metrics as Prometheus text if ``path`` ends in .prom, as JSON otherwise.
+        """
+        with open(path, 'w') as f:
+            if path.endswith(".prom"):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.to_json(), f, indent=2)
+
+class _Timer:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+_NULL_STAGE = nullcontext()
+_metrics = None
+
+def enable_metrics():
+    """
+    Start collecting stage timers and counters and return the Metrics object.
+    """
+    global _metrics
+    _metrics = Metrics()
+    return _metrics
+
+def disable_metrics():
+    """
+    Stop collecting and return the Metrics that was active, if any.
+    """
+    global _metrics
+    metrics, _metrics = _metrics, None
+    return metrics
+
+def get_metrics():
+    return _metrics
+
+def stage(name):
+    """
+    Context manager timing one stage; a shared no-op context when metrics are off.
+    """
+    if _metrics is None:
+        return _NULL_STAGE
+    return _Timer(_metrics, name)
+
+def count(name, value=1):
+    """
+    Add ``value`` to a counter; a no-op when metrics are off.
+    """
+    if _metrics is not None:
+        _metrics.increment(name, value)
+
+def timed(name):
+    """
+    Decorator timing every call of a function or method as stage ``name``.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _metrics is None:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                _metrics.observe(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+class Profile:
+    """
+    Context manager capturing a cProfile profile and, optionally, tracemalloc memory statistics.
+
+    After the block, ``stats`` holds the pstats.Stats and, with ``memory=True``,
+    ``peak_memory`` the peak traced allocation in bytes and ``memory_top`` the
+    largest allocation sites as (location, bytes, count) tuples.
+
+    :param path: If set, the raw profile is written there on exit (readable with pstats or snakeviz)
+    :param memory: Also trace allocations; slows the block down noticeably
+    :param top: Number of allocation sites to keep in ``memory_top``
+    """
+    def __init__(self, path=None, memory=False, top=20):
+        self.path = path
+        self.memory = memory
+        self.top = top
+        self.stats = None
+        self.peak_memory = None
+        self.memory_top = []
+        self._profiler = cProfile.Profile()
+
+    def __enter__(self):
+        if self.memory:
+            tracemalloc.start()
+        self._profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._profiler.disable()
+        if self.memory:
+            _, self.peak_memory = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            self.memory_top = [(str(stat.traceback[0]), stat.size, stat.count) for stat in snapshot.statistics('lineno')[:self.top]]
+        self.stats = pstats.Stats(self._profiler)
+        if self.path is not None:
+            self.stats.dump_stats(self.path)
+        return False
+
+    def report(self, sort="cumulative", limit=25):
+        """
+        Text report of the profile, sorted by ``sort``, and of the top allocation sites.
+        """
+        stream = io.StringIO()
+        pstats.Stats(self._profiler, stream=stream).sort_stats(sort).print_stats(limit)
+        if self.memory:
+            stream.write(f"Peak traced memory: {self.peak_memory / 2**20:.2f} MiB\n")
+            stream.writelines(f"{size / 2**10:10.1f} KiB {count:8d} blocks  {location}\n" for location, size, count in self.memory_top)
+        return stream.getvalue()
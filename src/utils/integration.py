@@ -0,0 +1,135 @@
+import numpy as np
+from .solar_parameters import solar_declination, sunset_hour_angle, solar_altitude, unfolded_solar_azimuth
+from .solar_radiation import SolarRadiationBatch
+from .solar_estimation import month_index
+from .tracing import trace
+from .instrumentation import timed
+
+def simpson(values, width):
+    """
+    Composite Simpson rule along the last axis.
+
+    :param values: Samples at equally spaced nodes; the last axis must have an odd length
+    :param width: Node spacing, broadcast against values[..., 0]
+    """
+    return width / 3 * (values[..., 0] + 4 * values[..., 1:-1:2].sum(axis=-1) + 2 * values[..., 2:-1:2].sum(axis=-1) + values[..., -1])
+
+def _simpson_nodes(h_sr, h_ss, intervals):
+    u = np.linspace(0, 1, intervals + 1)
+    return h_sr[:, None] + (h_ss - h_sr)[:, None] * u, (h_ss - h_sr) / intervals
+
+def integrate_hour_angle(func, h_sr, h_ss, step=None, tol=1.0, min_intervals=8, max_intervals=4096):
+    """
+    Integrate hourly values over the hour angle between h_sr and h_ss, element-wise.
+
+    ``func(rows, h)`` receives the indices of the elements being integrated and
+    their hour angles in degrees, shaped (len(rows), k), and returns a dict of
+    arrays of that shape. The integrals are in hours, so W/m^2 integrands give
+    Wh/m^2.
+
+    With ``step`` set, composite Simpson is applied with a fixed number of
+    intervals chosen so that no element uses a step wider than ``step`` degrees.
+    Otherwise the interval count starts at ``min_intervals`` and is doubled for
+    the elements whose estimate changed by more than ``tol`` in any component,
+    up to ``max_intervals``; an element stops once every component is within
+    ``tol`` over its last two doublings, so it is refined at least twice (to
+    4 * min_intervals) before it can stop.
+
+    :param h_sr: Sunrise hour angles in degrees, 1-D
+    :param h_ss: Sunset hour angles in degrees, same shape as h_sr
+    :return: Tuple (integrals dict, error estimate, intervals used), each of shape h_sr.shape
+    """
+    h_sr = np.asarray(h_sr, dtype=float)
+    h_ss = np.asarray(h_ss, dtype=float)
+    rows = np.arange(h_sr.size)
+    if step is not None:
+        intervals = max(2, int(np.ceil(np.max(h_ss - h_sr, initial=0) / step)))
+        intervals += intervals % 2
+        h, width = _simpson_nodes(h_sr, h_ss, intervals)
+        values = func(rows, h)
+        integrals = {name: simpson(value, width) / 15 for name, value in values.items()}
+        return integrals, np.full(h_sr.shape, np.nan), np.full(h_sr.shape, intervals)
+
+    intervals = min_intervals + min_intervals % 2
+    h, width = _simpson_nodes(h_sr, h_ss, intervals)
+    integrals = {name: simpson(value, width) / 15 for name, value in func(rows, h).items()}
+    error = np.full(h_sr.shape, np.inf)
+    previous = np.full(h_sr.shape, np.inf)
+    used = np.full(h_sr.shape, intervals)
+    active = rows
+    while active.size and intervals < max_intervals:
+        intervals *= 2
+        h, width = _simpson_nodes(h_sr[active], h_ss[active], intervals)
+        refined = {name: simpson(value, width) / 15 for name, value in func(active, h).items()}
+        # Kinks in the integrand (beam cut-off behind the surface) reduce Simpson
+        # to second order and can make two estimates agree by chance, so the error
+        # is taken as the larger of the last two changes rather than the change / 15.
+        # previous starts at inf, so no element stops on its first doubling.
+        change = np.max([np.abs(refined[name] - integrals[name][active]) for name in refined], axis=0)
+        error[active] = np.maximum(change, previous[active])
+        previous[active] = change
+        for name in integrals:
+            integrals[name][active] = refined[name]
+        used[active] = intervals
+        active = active[error[active] > tol]
+    return integrals, error, used
+
+class TiltedSurfaceIntegral:
+    """
+    Daily and monthly clear-sky radiation on a tilted surface by quadrature.
+
+    Integrates the hourly SolarRadiationBatch output over the hour angle from
+    sunrise to sunset instead of relying on the closed-form daily factors. The
+    beam component is dropped while the sun is behind the surface. Sunrise and
+    sunset are clipped to [-180, 180] degrees, so polar days and nights work.
+
+    ``n`` runs along the first axis and broadcasts against the other inputs,
+    e.g. n shaped (365, 1) with latitude, beta, a_w, tau_b and tau_d shaped (S,).
+    Per-month optical depths can be passed expanded to days, e.g.
+    ``tau_b[month_index(n)]``. ``daily`` holds Wh/m^2 per day and ``monthly``
+    the sums over each calendar month of the days in ``n``.
+
+    :param step: Fixed hour-angle step in degrees; None for adaptive refinement
+    :param tol: Adaptive tolerance per day in Wh/m^2
+    :param fast: Evaluate the hourly irradiance with SolarRadiationBatch(fast=True)
+    """
+    components = ("I_b_c", "I_d_c", "I_r_c", "I_c")
+
+    @timed("TiltedSurfaceIntegral")
+    def __init__(self, latitude, beta, a_w, tau_b, tau_d, n=np.arange(1, 366), ground_type='ordinary', I0=1367, step=None, tol=1.0, max_intervals=4096, fast=False):
+        self.n = np.asarray(n, dtype=float)
+        self.latitude = np.asarray(latitude, dtype=float)
+        self.ground_type = ground_type
+        self.I0 = I0
+        self.shape = np.broadcast_shapes(self.n.shape, self.latitude.shape, np.shape(beta), np.shape(a_w), np.shape(tau_b), np.shape(tau_d))
+
+        def flat(value):
+            return np.broadcast_to(np.asarray(value, dtype=float), self.shape).ravel()[:, None]
+
+        n, latitude, beta, a_w, tau_b, tau_d = map(flat, (self.n, self.latitude, beta, a_w, tau_b, tau_d))
+        delta_s = solar_declination(n)
+        self.h_ss = sunset_hour_angle(latitude, delta_s)[:, 0]
+
+        def hourly(rows, h):
+            alpha = np.maximum(solar_altitude(latitude[rows], delta_s[rows], h), 0)
+            a_s = unfolded_solar_azimuth(latitude[rows], delta_s[rows], h)
+            radiation = SolarRadiationBatch(n[rows], alpha, tau_b[rows], tau_d[rows], beta[rows], a_s, a_w[rows], ground_type, I0, fast=fast)
+            I_b_c = np.maximum(radiation.I_b_c, 0)
+            return {"I_b_c": I_b_c, "I_d_c": radiation.I_d_c, "I_r_c": radiation.I_r_c, "I_c": I_b_c + radiation.I_d_c + radiation.I_r_c}
+
+        integrals, error, intervals = integrate_hour_angle(hourly, -self.h_ss, self.h_ss, step, tol, max_intervals=max_intervals)
+        self.h_ss = self.h_ss.reshape(self.shape)
+        self.daily = {name: integrals[name].reshape(self.shape) for name in self.components}
+        self.error = error.reshape(self.shape)
+        self.intervals = intervals.reshape(self.shape)
+
+        # Days run along the first axis of the broadcast grid
+        days = np.atleast_1d(np.broadcast_to(self.n, self.shape))
+        month = month_index(days.reshape(days.shape[0], -1)[:, 0])
+        self.monthly = {}
+        for name, daily in self.daily.items():
+            monthly = np.zeros((12,) + days.shape[1:])
+            np.add.at(monthly, month, np.atleast_1d(daily))
+            self.monthly[name] = monthly
+
+        trace("TiltedSurfaceIntegral", self)
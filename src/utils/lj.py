@@ -1,16 +1,73 @@
+import argparse
+import logging
+from functools import cached_property
 import numpy as np
-from solar_radiation import SolarRadiation
-from solar_parameters import SolarParameters
-from __init__ import calculate_local_standard_meridian, calculate_n, time_to_hour_angle
+from .solar_radiation import GROUND_REFLECTIVITY, daily_extraterrestrial_radiation
+from .solar_parameters import solar_declination, sunset_hour_angle
+from .tracing import trace
+from .instrumentation import timed
+from .records import LJRecord
+
+logger = logging.getLogger(__name__)
+
+# Recommended average day of each month (Klein, 1977)
+MONTHLY_AVERAGE_DAYS = np.array([17, 47, 75, 105, 135, 162, 198, 228, 258, 288, 318, 344])
+DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+# Sky diffuse tilt factors. Each maps (beta, i, z, DTR, MCI, BRTF) to the factor
+# applied to the horizontal diffuse; i and z are the noon incidence and zenith
+# angles in degrees, and all arguments broadcast against each other.
+
+def _isotropic_drtf(beta, i, z, DTR, MCI, BRTF):
+    return np.square(np.cos(np.radians(beta / 2)))
+
+def _klucher_drtf(beta, i, z, DTR, MCI, BRTF):
+    # Klucher (1979): isotropic sky brightened near the horizon and around the sun as the sky clears
+    F = 1 - np.square(DTR)
+    M1 = 1 + F * np.sin(np.radians(beta / 2)) ** 3
+    M2 = 1 + F * np.square(np.cos(np.radians(i))) * np.sin(np.radians(z)) ** 3
+    return np.square(np.cos(np.radians(beta / 2))) * M1 * M2
+
+def _hay_davies_drtf(beta, i, z, DTR, MCI, BRTF):
+    # Hay-Davies: the anisotropy index share of the diffuse is circumsolar and tilts like the beam
+    A = np.clip(MCI * (1 - DTR), 0, 1)
+    return A * BRTF + (1 - A) * np.square(np.cos(np.radians(beta / 2)))
+
+SKY_MODELS = {
+    "isotropic": _isotropic_drtf,
+    "klucher": _klucher_drtf,
+    "anisotropic": _klucher_drtf,
+    "hay_davies": _hay_davies_drtf,
+    "circumsolar": _hay_davies_drtf,
+}
+
+def _sunlit_ratio(numerator, denominator):
+    # On polar nights the sun does not rise, so the extraterrestrial radiation
+    # and the beam tilt denominators vanish; the ratio is taken as 0 there
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(np.asarray(denominator) != 0, np.divide(numerator, denominator), 0.0)[()]
+
+def _polar_night_diffuse(DTR, h_ss):
+    # With no sunrise all of the horizontal radiation is diffuse
+    return np.where(np.asarray(h_ss) > 0, DTR, 1.0)[()]
+
+def get_sky_model(sky_type):
+    if sky_type not in SKY_MODELS:
+        raise ValueError(f"Unsupported sky type: {sky_type}")
+    return SKY_MODELS[sky_type]
 
 class LJ:
-    def __init__(self, L, alpha, h_sr, h_ss, delta_s, beta, H_bar_h, H_o_bar_h, i, z, rho, sky_type="isotropic"):
+    @timed("LJ")
+    def __init__(self, L, alpha, h_sr, h_ss, delta_s, beta, H_bar_h, H_o_bar_h, i, z, rho, sky_type="isotropic", lazy=False, h_sr_0=None):
         """
         H_bar_h: horizontal terrestrial radiation per month
         H_o_bar_h: horizontal extraterrestrial radiation per month
         h_ss: sunset hour angle
+        sky_type: diffuse tilt model, a key of SKY_MODELS
+        lazy: compute each derived attribute on first access instead of in __init__
+        h_sr_0: horizontal sunrise hour angle, e.g. -h_ss of an AstronomicalTable; computed from L and delta_s when omitted
         """
-        print("Initializing LJ class...")
+        logger.debug("Initializing LJ class...")
         self.H_bar_h = H_bar_h
         self.H_o_bar_h = H_o_bar_h
         self.h_sr = h_sr
@@ -21,11 +78,17 @@ class LJ:
         self.alpha = alpha
         self.beta = beta
         self.delta_s = delta_s
+        self.rho = rho
         self.sky_type = sky_type
+        if h_sr_0 is not None:
+            self.h_sr_0 = h_sr_0
 
-        # Debugging prints for each initialization parameter
-        print(f"L: {L}, alpha: {alpha}, h_sr: {h_sr}, h_ss: {h_ss}, delta_s: {delta_s}, beta: {beta}")
-        print(f"H_bar_h: {H_bar_h}, H_o_bar_h: {H_o_bar_h}, rho: {rho}, sky_type: {sky_type}")
+        # Debug logging for each initialization parameter
+        logger.debug("L: %s, alpha: %s, h_sr: %s, h_ss: %s, delta_s: %s, beta: %s", L, alpha, h_sr, h_ss, delta_s, beta)
+        logger.debug("H_bar_h: %s, H_o_bar_h: %s, rho: %s, sky_type: %s", H_bar_h, H_o_bar_h, rho, sky_type)
+        if lazy:
+            trace("LJ", self)
+            return
 
         # Call the methods to calculate various parameters
         self.MCI = self.monthly_clearness_index()
@@ -33,39 +96,54 @@ class LJ:
         self.B_bar_h = self.H_bar_h * (1 - self.DTR)
         self.D_bar_h = self.H_bar_h - self.B_bar_h
         
-        print(f"Monthly Clearness Index (MCI): {self.MCI}")
-        print(f"Diffuse to Total Radiation Ratio (DTR): {self.DTR}")
-        print(f"B_bar_h (average beam horizontal radiation): {self.B_bar_h}")
-        print(f"D_bar_h (average diffuse horizontal radiation): {self.D_bar_h}")
+        logger.debug("Monthly Clearness Index (MCI): %s", self.MCI)
+        logger.debug("Diffuse to Total Radiation Ratio (DTR): %s", self.DTR)
+        logger.debug("B_bar_h (average beam horizontal radiation): %s", self.B_bar_h)
+        logger.debug("D_bar_h (average diffuse horizontal radiation): %s", self.D_bar_h)
 
-        self.h_sr_0 = -np.degrees(np.arccos(-np.tan(np.radians(self.L)) * np.tan(np.radians(self.delta_s))))
+        if h_sr_0 is None:
+            self.h_sr_0 = self.horizontal_sunrise_hour_angle()
         self.h_sr_0_deg = self.h_sr_0
         self.h_sr_0_rad = self.h_sr_0_deg / 180 * np.pi
         self.h_ss_0 = -self.h_sr_0
-        print(f"Calculated h_sr_0: {self.h_sr_0}, h_sr_0_deg: {self.h_sr_0_deg}, h_sr_0_rad: {self.h_sr_0_rad}, h_ss_0: {self.h_ss_0}")
+        logger.debug("Calculated h_sr_0: %s, h_sr_0_deg: %s, h_sr_0_rad: %s, h_ss_0: %s", self.h_sr_0, self.h_sr_0_deg, self.h_sr_0_rad, self.h_ss_0)
 
         self.BRTF = self.beam_radiation_tilt_factor()
-        print(f"Beam Radiation Tilt Factor (BRTF): {self.BRTF}")
+        logger.debug("Beam Radiation Tilt Factor (BRTF): %s", self.BRTF)
         
         self.B_bar_c = self.BRTF * self.B_bar_h
         self.DRTF = self.diffuse_radiation_tilt_factor()
-        self.RRTF = rho * np.square(np.sin(np.radians(self.beta / 2)))
+        self.RRTF = self.reflected_radiation_tilt_factor()
         
-        print(f"B_bar_c (tilted monthly average beam radiation): {self.B_bar_c}")
-        print(f"Diffuse Radiation Tilt Factor (DRTF): {self.DRTF}")
-        print(f"Reflected Radiation Tilt Factor (RRTF): {self.RRTF}")
+        logger.debug("B_bar_c (tilted monthly average beam radiation): %s", self.B_bar_c)
+        logger.debug("Diffuse Radiation Tilt Factor (DRTF): %s", self.DRTF)
+        logger.debug("Reflected Radiation Tilt Factor (RRTF): %s", self.RRTF)
+
+        self.H_bar_c = self.average_tilted_radiation()
+        logger.debug("Calculated H_bar_c (average tilted radiation): %s", self.H_bar_c)
+
+        trace("LJ", self)
+
+    def to_record(self):
+        return LJRecord.from_object(self)
 
-        self.H_bar_c = (self.BRTF + self.RRTF) * self.B_bar_h + (self.DRTF + self.RRTF) * self.DTR * H_bar_h
-        print(f"Calculated H_bar_c (average tilted radiation): {self.H_bar_c}")
+    def horizontal_sunrise_hour_angle(self):
+        return -sunset_hour_angle(self.L, self.delta_s)
+
+    def reflected_radiation_tilt_factor(self):
+        return self.rho * np.square(np.sin(np.radians(self.beta / 2)))
+
+    def average_tilted_radiation(self):
+        return (self.BRTF + self.RRTF) * self.B_bar_h + (self.DRTF + self.RRTF) * self.DTR * self.H_bar_h
 
     def monthly_clearness_index(self):
-        print("Calculating Monthly Clearness Index (MCI)...")
-        mci = np.divide(self.H_bar_h, self.H_o_bar_h)
-        print(f"MCI: {mci}")
+        logger.debug("Calculating Monthly Clearness Index (MCI)...")
+        mci = _sunlit_ratio(self.H_bar_h, self.H_o_bar_h)
+        logger.debug("MCI: %s", mci)
         return mci
     
     def diffuse_to_total_radiation_ratio(self, type="cpr"):
-        print(f"Calculating Diffuse to Total Radiation Ratio with method: {type}...")
+        logger.debug("Calculating Diffuse to Total Radiation Ratio with method: %s...", type)
         h_ss_rad = np.radians(self.h_ss)
         if type == "empirical":
             a0 = 1.390
@@ -77,12 +155,12 @@ class LJ:
             temp = 0.775 + 0.347 * (h_ss_rad - np.pi / 2) - (0.505 + 0.0261 * (h_ss_rad - np.pi / 2)) * np.cos(2 * self.MCI - np.pi / 2)
         
         # print(f"Diffuse to Total Radiation Ratio (DTR): {temp}")
-        return temp
+        return _polar_night_diffuse(temp, self.h_ss)
 
     def beam_radiation_tilt_factor(self, type='monthly'):
-        print(f"Calculating Beam Radiation Tilt Factor with method: {type}...")
+        logger.debug("Calculating Beam Radiation Tilt Factor with method: %s...", type)
         if type == 'monthly':
-            temp = np.divide(
+            temp = _sunlit_ratio(
                 (np.cos(np.radians(self.L - self.beta)) *
                  np.cos(np.radians(self.delta_s)) *
                  np.sin(np.radians(self.h_sr)) + 
@@ -101,15 +179,162 @@ class LJ:
         return temp
     
     def diffuse_radiation_tilt_factor(self):
-        temp = np.square(np.cos(np.radians(self.beta / 2)))
-        if self.sky_type == "isotropic":
-            return temp
-        elif self.sky_type == "anisotropic" or self.sky_type == "circumsolar":
-            F = 1-np.square(np.divide(self.D_bar_h), self.H_bar_h)
-            M1 = 1 + F*np.square(np.sin(np.radians(self.beta / 2)))
-            M2 = 1 + F*np.square(np.cos(np.radians(self.i)))*np.sin(np.radians(self.z))**3
-            return temp * M1 * M2
-if __name__ == "__main__":
+        return get_sky_model(self.sky_type)(self.beta, self.i, self.z, self.DTR, self.MCI, self.BRTF)
+
+    # Derived attributes for lazy=True; eager construction assigns them directly
+    MCI = cached_property(monthly_clearness_index)
+    DTR = cached_property(diffuse_to_total_radiation_ratio)
+    B_bar_h = cached_property(lambda self: self.H_bar_h * (1 - self.DTR))
+    D_bar_h = cached_property(lambda self: self.H_bar_h - self.B_bar_h)
+    h_sr_0 = cached_property(horizontal_sunrise_hour_angle)
+    h_sr_0_deg = cached_property(lambda self: self.h_sr_0)
+    h_sr_0_rad = cached_property(lambda self: self.h_sr_0_deg / 180 * np.pi)
+    h_ss_0 = cached_property(lambda self: -self.h_sr_0)
+    BRTF = cached_property(beam_radiation_tilt_factor)
+    B_bar_c = cached_property(lambda self: self.BRTF * self.B_bar_h)
+    DRTF = cached_property(diffuse_radiation_tilt_factor)
+    RRTF = cached_property(reflected_radiation_tilt_factor)
+    H_bar_c = cached_property(average_tilted_radiation)
+
+def tilted_sunrise_hour_angle(latitude, delta_s, beta, h_ss):
+    """
+    Sunrise hour angle magnitude on an equator-facing tilted surface, in degrees.
+
+    The sun rises on the surface at the later of the horizontal sunrise and the
+    moment it comes in front of the plane, i.e. min(h_ss, arccos(-tan(L - beta) tan(delta_s))).
+    """
+    with np.errstate(invalid='ignore'):
+        h_sr_tilted = sunset_hour_angle(latitude - beta, delta_s)
+    return np.minimum(h_ss, h_sr_tilted)
+
+@timed("monthly_lj")
+def monthly_lj(latitude, beta, H_bar_h, H_o_bar_h=None, ground_type='ordinary', sky_type="isotropic", cache=None):
+    """
+    Build an LJ model for all 12 months of a site in one object.
+
+    Geometry is taken on the recommended average day of each month, with the
+    sunrise hour angle of the tilted surface (see tilted_sunrise_hour_angle)
+    and noon incidence/zenith angles of an equator-facing surface. Southern
+    sites are mirrored as in lj_tilt_surface: the LJ object gets the latitude
+    and declinations with their signs flipped, so a positive tilt faces north.
+    In polar-night months, where the sun does not rise on the average day, all
+    of H_bar_h is treated as diffuse.
+
+    :param latitude: Latitude in degrees
+    :param beta: Surface tilt in degrees
+    :param H_bar_h: 12 monthly average daily horizontal radiation values
+    :param H_o_bar_h: 12 monthly extraterrestrial values; computed in Wh/m^2 when omitted
+    :param cache: AstronomicalCache to take the declination, sunset hour angle and extraterrestrial values from
+    :return: LJ instance whose attributes are 12-element arrays
+    """
+    n = MONTHLY_AVERAGE_DAYS
+    if cache is None:
+        delta_s = solar_declination(n)
+        h_ss = sunset_hour_angle(latitude, delta_s)
+        if H_o_bar_h is None:
+            H_o_bar_h = daily_extraterrestrial_radiation(latitude, n)
+    else:
+        table = cache.table(None, latitude)
+        delta_s, h_ss = table.delta_s[n - 1], table.h_ss[n - 1]
+        if H_o_bar_h is None:
+            H_o_bar_h = table.H_o_h[n - 1]
+    # Mirror southern sites onto the northern hemisphere; h_ss is unchanged by the mirroring
+    if latitude < 0:
+        latitude, delta_s = -latitude, -delta_s
+    h_sr = -tilted_sunrise_hour_angle(latitude, delta_s, beta, h_ss)
+    z = np.abs(latitude - delta_s)
+    i = np.abs(latitude - beta - delta_s)
+    return LJ(latitude, 90 - z, h_sr, h_ss, delta_s, beta, np.asarray(H_bar_h, dtype=float), np.asarray(H_o_bar_h, dtype=float), i, z, GROUND_REFLECTIVITY[ground_type], sky_type=sky_type, h_sr_0=-h_ss)
+
+@timed("lj_tilt_surface")
+def lj_tilt_surface(latitude, beta, H_bar_h, H_o_bar_h=None, rho=0.2, sky_type="isotropic", cache=None):
+    """
+    Vectorized LJ monthly average daily radiation on tilted surfaces.
+
+    Evaluates H_bar_c for every site, month and tilt at once with the same
+    formulation as LJ (CPR diffuse fraction, monthly beam tilt factor, diffuse
+    tilt factor from SKY_MODELS). Geometry uses the recommended average day of
+    each month and noon incidence/zenith angles. Southern sites are mirrored,
+    so a positive tilt always faces the equator.
+    In polar-night months, where the sun does not rise on the average day, all
+    of H_bar_h is treated as diffuse.
+
+    :param latitude: Site latitudes in degrees, shape (S,)
+    :param beta: Tilt grid in degrees, shape (T,)
+    :param H_bar_h: Monthly average daily horizontal radiation, shape (S, 12)
+    :param H_o_bar_h: Monthly extraterrestrial values, shape (S, 12); computed in Wh/m^2 when omitted
+    :param rho: Ground reflectivity
+    :param sky_type: Diffuse tilt model, a key of SKY_MODELS
+    :param cache: AstronomicalCache to take the declination, sunset hour angle and extraterrestrial values from
+    :return: H_bar_c with shape (S, 12, T)
+    """
+    sky_model = get_sky_model(sky_type)
+    latitude = np.atleast_1d(np.asarray(latitude, dtype=float))
+    beta = np.atleast_1d(np.asarray(beta, dtype=float))[None, None, :]
+    H_bar_h = np.asarray(H_bar_h, dtype=float).reshape(latitude.size, 12)[:, :, None]
+    if cache is None:
+        delta_s = solar_declination(MONTHLY_AVERAGE_DAYS)[None, :, None]
+        h_ss = None
+        if H_o_bar_h is None:
+            H_o_bar_h = daily_extraterrestrial_radiation(latitude[:, None], MONTHLY_AVERAGE_DAYS[None, :])
+    else:
+        days = cache.gather(None, MONTHLY_AVERAGE_DAYS[None, :], latitude[:, None], ("delta_s", "h_ss", "H_o_h"))
+        delta_s = days["delta_s"][:, :, None]
+        h_ss = days["h_ss"][:, :, None]
+        if H_o_bar_h is None:
+            H_o_bar_h = days["H_o_h"]
+    H_o_bar_h = np.asarray(H_o_bar_h, dtype=float).reshape(latitude.size, 12)[:, :, None]
+
+    # Mirror southern sites onto the northern hemisphere; h_ss is unchanged by the mirroring
+    hemisphere = np.where(latitude < 0, -1.0, 1.0)[:, None, None]
+    L = latitude[:, None, None] * hemisphere
+    delta_s = delta_s * hemisphere
+    L_rad = np.radians(L)
+    delta_s_rad = np.radians(delta_s)
+    if h_ss is None:
+        h_ss = sunset_hour_angle(L, delta_s)
+    h_ss_rad = np.radians(h_ss)
+
+    # Diffuse fraction (CPR correlation) and horizontal beam, per site and month
+    MCI = _sunlit_ratio(H_bar_h, H_o_bar_h)
+    DTR = _polar_night_diffuse(0.775 + 0.347 * (h_ss_rad - np.pi / 2) - (0.505 + 0.0261 * (h_ss_rad - np.pi / 2)) * np.cos(2 * MCI - np.pi / 2), h_ss)
+    B_bar_h = H_bar_h * (1 - DTR)
+
+    # Beam tilt factor over the tilt grid
+    h_sr_rad = np.radians(tilted_sunrise_hour_angle(L, delta_s, beta, h_ss))
+    L_beta_rad = np.radians(L - beta)
+    BRTF = _sunlit_ratio(np.cos(L_beta_rad) * np.cos(delta_s_rad) * np.sin(h_sr_rad) + h_sr_rad * np.sin(L_beta_rad) * np.sin(delta_s_rad),
+                     np.cos(L_rad) * np.cos(delta_s_rad) * np.sin(h_ss_rad) + h_ss_rad * np.sin(L_rad) * np.sin(delta_s_rad))
+
+    DRTF = sky_model(beta, np.abs(L - beta - delta_s), np.abs(L - delta_s), DTR, MCI, BRTF)
+    RRTF = rho * np.square(np.sin(np.radians(beta / 2)))
+    return (BRTF + RRTF) * B_bar_h + (DRTF + RRTF) * DTR * H_bar_h
+
+def optimal_tilt(latitude, H_bar_h, H_o_bar_h=None, rho=0.2, tilts=np.arange(0, 91), sky_type="isotropic"):
+    """
+    Annual- and monthly-optimal equator-facing tilts from the LJ surface.
+
+    :param latitude: Site latitudes in degrees, shape (S,)
+    :param H_bar_h: Monthly average daily horizontal radiation, shape (S, 12)
+    :param tilts: Candidate tilt grid in degrees
+    :param sky_type: Diffuse tilt model, a key of SKY_MODELS
+    :raises ValueError: If the LJ surface is not finite, e.g. for missing monthly inputs
+    :return: Tuple (annual_optimal (S,), monthly_optimal (S, 12), H_bar_c (S, 12, T))
+    """
+    tilts = np.asarray(tilts, dtype=float)
+    H_bar_c = lj_tilt_surface(latitude, tilts, H_bar_h, H_o_bar_h, rho, sky_type)
+    if not np.all(np.isfinite(H_bar_c)):
+        # np.argmax would silently pick the first NaN
+        raise ValueError("non-finite LJ radiation; check H_bar_h and H_o_bar_h")
+    annual = np.einsum('smt,m->st', H_bar_c, DAYS_IN_MONTH)
+    return tilts[np.argmax(annual, axis=-1)], tilts[np.argmax(H_bar_c, axis=-1)], H_bar_c
+
+def main(argv=None):
+    argparse.ArgumentParser(description="Print the LJ monthly radiation on a tilted surface for an example site.").parse_args(argv)
+    from .solar_parameters import SolarParameters
+    from .solar_radiation import SolarRadiation
+    from . import calculate_local_standard_meridian, calculate_n, time_to_hour_angle
+
     ground_type = 'ordinary'
     input_date = "Jan 16"
     n = calculate_n(input_date)
@@ -146,4 +371,4 @@ if __name__ == "__main__":
     H_o_bar_h = 24199
     lj_model = LJ(latitude, 0, h_sr, h_ss, delta_s, beta, H_bar_h, H_o_bar_h, i, z, rho)
     total_long_term_radiation = lj_model.H_bar_c
-    print(f"Total Long Term Radiation: {total_long_term_radiation} kJ/m^2")
\ No newline at end of file
+    print(f"Total Long Term Radiation: {total_long_term_radiation} kJ/m^2")
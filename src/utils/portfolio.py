@@ -0,0 +1,198 @@
+import argparse
+import csv
+import os
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .solar_estimation import AnnualSimulation
+from .lj import monthly_lj
+from .instrumentation import Profile, count, enable_metrics, disable_metrics, get_metrics
+
+MONTHS = range(1, 13)
+
+def read_site_table(path):
+    """
+    Read a site table with one row per site.
+
+    Required columns: latitude, longitude, beta, a_w, H_bar_h_1..H_bar_h_12 and
+    H_bar_d_1..H_bar_d_12. Optional columns: site_id, l_st, tracking
+    ("single_axis" or "dual_axis"; empty or "fixed" for a fixed surface) and
+    H_o_bar_h_1..H_o_bar_h_12.
+
+    A row that cannot be parsed (missing column, blank or non-numeric value)
+    becomes a placeholder site with only ``site_id`` and ``error`` set, so it
+    is reported as a failed SiteResult instead of aborting the run.
+
+    :param path: Path to a CSV file
+    :return: List of site dicts, in file order
+    """
+    sites = []
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            site_id = row.get("site_id") or str(len(sites))
+            try:
+                sites.append(parse_site(row, site_id))
+            except (KeyError, ValueError, TypeError) as e:
+                message = f"missing column {e}" if isinstance(e, KeyError) else str(e)
+                sites.append({"site_id": site_id, "error": f"{type(e).__name__}: {message}"})
+    return sites
+
+def parse_site(row, site_id):
+    """
+    Site dict for one site-table row; see read_site_table.
+
+    :raises KeyError: If a required column is missing
+    :raises ValueError: If a required value is blank or not a number
+    """
+    return {
+        "site_id": site_id,
+        "latitude": float(row["latitude"]),
+        "longitude": float(row["longitude"]),
+        "beta": float(row["beta"]),
+        "a_w": float(row["a_w"]),
+        "l_st": float(row["l_st"]) if row.get("l_st") else None,
+        "tracker": row["tracking"] if row.get("tracking") not in (None, "", "fixed") else None,
+        "H_bar_h": [float(row[f"H_bar_h_{m}"]) for m in MONTHS],
+        "H_bar_d": [float(row[f"H_bar_d_{m}"]) for m in MONTHS],
+        "H_o_bar_h": [float(row[f"H_o_bar_h_{m}"]) for m in MONTHS] if row.get("H_o_bar_h_1") else None,
+    }
+
+def estimate_site(site, model_name="cpr", ground_type='ordinary'):
+    """
+    Run SolarEstimation (full year) and LJ (monthly) for one site.
+
+    For tracker sites the annual simulation follows the tracker; LJ, a
+    fixed-surface model, is still evaluated at the site's beta.
+
+    :raises ValueError: If any result is not finite, e.g. for polar latitudes
+    :return: Dict of monthly and annual results
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        simulation = AnnualSimulation(model_name, site["latitude"], site["longitude"], site["beta"], site["a_w"],
+                                      site["H_bar_h"], site["H_bar_d"], l_st=site.get("l_st"), ground_type=ground_type, tracker=site.get("tracker"))
+        lj_model = monthly_lj(site["latitude"], site["beta"], site["H_bar_h"], site.get("H_o_bar_h"), ground_type=ground_type)
+    values = {
+        "monthly_I_c": simulation.monthly["I_c"],
+        "annual_I_c": simulation.annual["I_c"],
+        "monthly_H_bar_c": lj_model.H_bar_c,
+    }
+    for name, value in values.items():
+        if not np.all(np.isfinite(value)):
+            raise ValueError(f"non-finite {name} for latitude {site['latitude']}")
+    return values
+
+class SiteResult:
+    def __init__(self, index, site_id, values=None, error=None):
+        self.index = index
+        self.site_id = site_id
+        self.values = values
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+def run_chunk(args):
+    """
+    Score one chunk of sites; the unit of work run_portfolio and batch.run_shard
+    hand to their executors.
+
+    Takes a single tuple so it can be passed to ``executor.map`` and pickled
+    for worker processes.
+
+    :param args: Tuple ``(start, sites, model_name, ground_type, instrument)``:
+        the index of the chunk's first site in the full table, the list of site
+        dicts (as returned by read_site_table), the model name and ground type
+        passed to estimate_site, and whether to collect metrics in this call
+    :return: Tuple ``(results, metrics)``: a list of SiteResult indexed from
+        ``start``, and the collected Metrics as JSON, or None when
+        ``instrument`` is False
+    """
+    start, sites, model_name, ground_type, instrument = args
+    # Worker processes collect their own metrics and hand them back with the results
+    if instrument:
+        enable_metrics()
+    results = []
+    for offset, site in enumerate(sites):
+        if "error" in site:
+            # Rows read_site_table could not parse
+            results.append(SiteResult(start + offset, site["site_id"], error=site["error"]))
+            count("sites_failed")
+            continue
+        try:
+            results.append(SiteResult(start + offset, site["site_id"], estimate_site(site, model_name, ground_type)))
+            count("sites_scored")
+        except Exception as e:
+            results.append(SiteResult(start + offset, site["site_id"], error=f"{type(e).__name__}: {e}"))
+            count("sites_failed")
+    metrics = disable_metrics().to_json() if instrument else None
+    return results, metrics
+
+def run_portfolio(sites, model_name="cpr", workers=None, chunk_size=64, ground_type='ordinary'):
+    """
+    Score a list of sites on a process pool.
+
+    Sites are split into chunks of ``chunk_size`` and each chunk is one task, so
+    the per-task overhead is amortised over many sites. A failing site is
+    recorded in its SiteResult.error and does not affect the rest of the batch.
+
+    :param sites: List of site dicts as returned by read_site_table
+    :param workers: Number of worker processes (default: os.cpu_count()); 1 runs in-process
+    :param chunk_size: Number of sites per task
+    :return: List of SiteResult in input order
+
+    When metrics are enabled (instrumentation.enable_metrics), the workers'
+    stage timers and counters are merged into the active Metrics.
+    """
+    workers = workers or os.cpu_count()
+    metrics = get_metrics()
+    instrument = metrics is not None and workers != 1
+    tasks = [(start, sites[start:start + chunk_size], model_name, ground_type, instrument) for start in range(0, len(sites), chunk_size)]
+    if workers == 1:
+        return [result for results, _ in map(run_chunk, tasks) for result in results]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunks = list(executor.map(run_chunk, tasks))
+    if instrument:
+        for _, snapshot in chunks:
+            metrics.merge(snapshot)
+    return [result for results, _ in chunks for result in results]
+
+def write_results(results, path):
+    """
+    Write portfolio results as CSV, one row per site.
+    """
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["site_id", "annual_I_c"] + [f"I_c_{m}" for m in MONTHS] + [f"H_bar_c_{m}" for m in MONTHS] + ["error"])
+        for result in results:
+            if result.ok:
+                writer.writerow([result.site_id, result.values["annual_I_c"]] + list(result.values["monthly_I_c"]) + list(result.values["monthly_H_bar_c"]) + [""])
+            else:
+                writer.writerow([result.site_id, ""] + [""] * 24 + [result.error])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a site portfolio with SolarEstimation and LJ.")
+    parser.add_argument("sites", help="CSV site table")
+    parser.add_argument("output", help="CSV file for the results")
+    parser.add_argument("--model", default="cpr", choices=["cpr", "cprg", "daily_integration"])
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=64)
+    parser.add_argument("--ground-type", default='ordinary', choices=['ordinary', 'snow'])
+    parser.add_argument("--metrics", help="Write stage timers and counters to this file (.prom for Prometheus text, JSON otherwise)")
+    parser.add_argument("--profile", help="Write a cProfile profile of the run to this file (profiles this process only; use --workers 1)")
+    parser.add_argument("--profile-memory", action="store_true", help="With --profile, also report tracemalloc allocation sites")
+    args = parser.parse_args(argv)
+
+    if args.metrics:
+        enable_metrics()
+    profile = Profile(args.profile, memory=args.profile_memory) if args.profile else nullcontext()
+    with profile:
+        results = run_portfolio(read_site_table(args.sites), args.model, args.workers, args.chunk_size, args.ground_type)
+    write_results(results, args.output)
+    failed = sum(not result.ok for result in results)
+    print(f"Scored {len(results) - failed} sites, {failed} failed")
+    if args.metrics:
+        disable_metrics().dump(args.metrics)
+    if args.profile:
+        print(profile.report(limit=15))
+    return 1 if failed else 0
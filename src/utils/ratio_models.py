@@ -0,0 +1,96 @@
+import numpy as np
+
+def hourly_diffuse_ratio(h_s_rad, h_ss_rad):
+    """
+    Vectorized r_d shared by CPR, CPRG and DailyIntegration.
+
+    :param h_s_rad: Hour angle in radians
+    :param h_ss_rad: Sunset hour angle in radians
+    :return: r_d, broadcast over the inputs
+    """
+    return (np.pi / 24) * np.divide(np.cos(h_s_rad) - np.cos(h_ss_rad), np.sin(h_ss_rad) - h_ss_rad * np.cos(h_ss_rad))
+
+def _cpr_coefficients(h_ss_rad):
+    sin_term = np.sin(h_ss_rad - np.pi / 3)
+    a = 0.409 + 0.5019 * sin_term
+    b = 0.6609 + 0.4767 * sin_term
+    return a, b
+
+def _cpr_r_t(h_s_rad, h_ss_rad, r_d, site):
+    a, b = _cpr_coefficients(h_ss_rad)
+    return (a + b * np.cos(h_s_rad)) * r_d
+
+def _cprg_r_t(h_s_rad, h_ss_rad, r_d, site):
+    a, b = _cpr_coefficients(h_ss_rad)
+    k = 1 / (2 * np.sin(h_ss_rad) - h_ss_rad * np.cos(h_ss_rad))
+    f_c = a + k * b * h_ss_rad - 0.5 * np.sin(2 * h_ss_rad)
+    return (a + b * np.cos(h_s_rad)) * r_d / f_c
+
+def daily_integration_geometry(h_ss_rad, L, delta_s, extraterrestrial_radiation_factor, E_sc=1367, w_s=1.06*np.pi/180):
+    """
+    Terms of the DailyIntegration r_t that depend only on geometry, not on H_bar_h.
+
+    :return: Dict with q, A, S0, sin_h0, H0 and B
+    """
+    q = np.cos(np.radians(L)) * np.cos(np.radians(delta_s))
+    A = np.sin(h_ss_rad) - h_ss_rad * np.cos(h_ss_rad)
+    S0 = 24 / np.pi * h_ss_rad
+    sin_h0 = q * A / h_ss_rad
+    H0 = S0 * extraterrestrial_radiation_factor * E_sc * sin_h0
+    B = (0.5 + np.square(np.cos(h_ss_rad))) * w_s - 0.75 * np.sin(2 * h_ss_rad)
+    return {"q": q, "A": A, "S0": S0, "sin_h0": sin_h0, "H0": H0, "B": B}
+
+def daily_integration_r_t(r_d, geometry, H_bar_h):
+    """
+    DailyIntegration r_t from r_d, the daily_integration_geometry terms and H_bar_h.
+    """
+    q, A, S0, sin_h0, B = geometry["q"], geometry["A"], geometry["S0"], geometry["sin_h0"], geometry["B"]
+    K_t = H_bar_h / geometry["H0"]
+    a1 = 0.41341 * K_t + 0.61197 * K_t**2 - 0.01886 * K_t * S0 + 0.00759 * S0
+    a2 = np.maximum(0.054, 0.28116 + 2.2475 * K_t - 1.7611 * K_t**2 - 1.84535 * sin_h0 + 1.681 * np.square(sin_h0))
+    atmospheric_extinction_coefficient = a2 / a1
+    return r_d * ((1 + q * A * atmospheric_extinction_coefficient * r_d * 24 / np.pi) /
+                  (1 + q * atmospheric_extinction_coefficient * B / A * 24 / np.pi))
+
+def _daily_integration_r_t(h_s_rad, h_ss_rad, r_d, site):
+    missing = [key for key in ("L", "delta_s", "H_bar_h", "extraterrestrial_radiation_factor") if site[key] is None]
+    if missing:
+        raise ValueError(f"daily_integration requires {', '.join(missing)}")
+    geometry = daily_integration_geometry(h_ss_rad, site["L"], site["delta_s"], site["extraterrestrial_radiation_factor"], site["E_sc"], site["w_s"])
+    return daily_integration_r_t(r_d, geometry, site["H_bar_h"])
+
+RATIO_MODELS = {
+    "cpr": _cpr_r_t,
+    "cprg": _cprg_r_t,
+    "daily_integration": _daily_integration_r_t,
+}
+
+def compute_ratios(model, h_s, h_ss, L=None, delta_s=None, H_bar_h=None, extraterrestrial_radiation_factor=None, E_sc=1367, w_s=1.06*np.pi/180):
+    """
+    Evaluate r_d and r_t for one or several ratio models in a single pass.
+
+    All array inputs broadcast against each other; angles are in degrees and are
+    converted to radians once for every model. ``L``, ``delta_s``, ``H_bar_h``
+    and ``extraterrestrial_radiation_factor`` are only needed for
+    "daily_integration".
+
+    :param model: Model name ("cpr", "cprg", "daily_integration") or a sequence of names
+    :param h_s: Hour angle in degrees
+    :param h_ss: Sunset hour angle in degrees
+    :return: Tuple (r_d, r_t); for a sequence of models r_t is stacked along a new leading axis
+    """
+    names = [model] if isinstance(model, str) else list(model)
+    for name in names:
+        if name not in RATIO_MODELS:
+            raise ValueError(f"Unsupported model: {name}")
+
+    h_s_rad = np.radians(h_s)
+    h_ss_rad = np.radians(h_ss)
+    r_d = hourly_diffuse_ratio(h_s_rad, h_ss_rad)
+    site = {"L": L, "delta_s": delta_s, "H_bar_h": H_bar_h,
+            "extraterrestrial_radiation_factor": extraterrestrial_radiation_factor,
+            "E_sc": E_sc, "w_s": w_s}
+    r_t = [RATIO_MODELS[name](h_s_rad, h_ss_rad, r_d, site) for name in names]
+    if isinstance(model, str):
+        return r_d, r_t[0]
+    return r_d, np.stack(np.broadcast_arrays(*r_t))
@@ -0,0 +1,99 @@
+import numpy as np
+
+class Record:
+    """
+    Compact result of one model call.
+
+    Subclasses list their fields in ``__slots__``, so a record has no instance
+    ``__dict__`` and none of the model's intermediate attributes. Build one with
+    ``from_object`` (or a model's ``to_record()``) and pack many of them into a
+    NumPy structured array with ``records_to_array``.
+    """
+    __slots__ = ()
+
+    def __init__(self, *values, **named):
+        if len(values) > len(self.__slots__):
+            raise TypeError(f"{type(self).__name__} takes at most {len(self.__slots__)} values")
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+        for name, value in named.items():
+            setattr(self, name, value)
+
+    @classmethod
+    def from_object(cls, obj):
+        """
+        Copy the record's fields from the same-named attributes of a model object.
+        """
+        return cls(*(getattr(obj, name) for name in cls.__slots__))
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def as_tuple(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(np.array_equal(a, b) for a, b in zip(self.as_tuple(), other.as_tuple()))
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)})"
+
+class SolarParametersRecord(Record):
+    __slots__ = ("n", "latitude", "longitude", "delta_s", "ET", "ST", "h_s", "alpha", "a_s", "z", "h_ss", "h_sr")
+
+class SolarRadiationRecord(Record):
+    __slots__ = ("n", "alpha", "beta", "a_s", "a_w", "rho", "i", "extra_terrestrial_radiation_factor", "I", "I_c")
+
+class RatioRecord(Record):
+    """
+    Output of the hourly ratio models (CPR, CPRG, DailyIntegration).
+    """
+    __slots__ = ("h_s", "h_ss", "r_d", "r_t")
+
+class LJRecord(Record):
+    __slots__ = ("MCI", "DTR", "B_bar_h", "D_bar_h", "BRTF", "DRTF", "RRTF", "B_bar_c", "H_bar_c")
+
+class GCFRecord(Record):
+    __slots__ = ("R", "r", "L", "limit_angle", "opening_angle", "slope_angle", "field_of_view")
+
+class SolarEstimationRecord(Record):
+    __slots__ = ("r_d", "r_t", "I_b_c", "I_d_c", "I_r_c", "I_c")
+
+def to_structured(fields, dtype=np.float64, **arrays):
+    """
+    Struct-of-arrays view of array-valued results as one NumPy structured array.
+
+    The arrays are broadcast against each other and each becomes one field.
+
+    :param fields: Field names, in order
+    :param dtype: dtype of every field, e.g. np.float32 to halve the size
+    :return: Structured array of the broadcast shape
+    """
+    values = np.broadcast_arrays(*(np.asarray(arrays[name]) for name in fields))
+    result = np.empty(values[0].shape, dtype=[(name, dtype) for name in fields])
+    for name, value in zip(fields, values):
+        result[name] = value
+    return result
+
+def object_to_structured(obj, fields, dtype=np.float64):
+    """
+    to_structured over the same-named attributes of a batch model object.
+    """
+    return to_structured(fields, dtype, **{name: getattr(obj, name) for name in fields})
+
+def records_to_array(records):
+    """
+    Pack a sequence of records of one type into a 1-D structured array.
+
+    Field dtypes are inferred per field, so string fields such as the scalar
+    sunrise/sunset times are kept as fixed-width strings.
+    """
+    records = list(records)
+    if not records:
+        raise ValueError("records_to_array needs at least one record")
+    fields = type(records[0]).__slots__
+    columns = [np.asarray([getattr(record, name) for record in records]) for name in fields]
+    result = np.empty(len(records), dtype=[(name, column.dtype, column.shape[1:]) for name, column in zip(fields, columns)])
+    for name, column in zip(fields, columns):
+        result[name] = column
+    return result
@@ -0,0 +1,163 @@
+import json
+import os
+import numpy as np
+
+INDEX_FILE = "index.json"
+
+class ResultStoreWriter:
+    """
+    Columnar on-disk sink for per-site simulation results.
+
+    Every column is one ``.npy`` file shaped (n_sites,) + column shape and is
+    written through ``np.lib.format.open_memmap``, so sites can be filled in any
+    order without holding the dataset in memory. Hourly columns have shape
+    (n_hours,); per-site summaries use shapes like (12,) or ().
+
+    :param path: Output directory
+    :param site_ids: Site identifiers, in row order
+    :param columns: Mapping of column name to per-site shape, or a list of hourly column names
+    :param n_hours: Length of hourly columns
+    :param start: Optional datetime64 of the first hour, stored for time-range reads
+    :param interval_minutes: Spacing of hourly samples
+    """
+    def __init__(self, path, site_ids, columns, n_hours=8760, start=None, interval_minutes=60, dtype=np.float32):
+        self.path = path
+        self.site_ids = [str(site_id) for site_id in site_ids]
+        if not isinstance(columns, dict):
+            columns = {name: (n_hours,) for name in columns}
+        self.columns = {name: tuple(shape) for name, shape in columns.items()}
+        self.dtype = np.dtype(dtype)
+        os.makedirs(path, exist_ok=True)
+
+        self._arrays = {name: np.lib.format.open_memmap(os.path.join(path, f"{name}.npy"), mode='w+', dtype=self.dtype,
+                                                        shape=(len(self.site_ids),) + shape)
+                        for name, shape in self.columns.items()}
+        self.index = {
+            "site_ids": self.site_ids,
+            "columns": {name: list(shape) for name, shape in self.columns.items()},
+            "dtype": self.dtype.str,
+            "n_hours": n_hours,
+            "start": None if start is None else str(np.datetime64(start, 'm')),
+            "interval_minutes": interval_minutes,
+        }
+        self._write_index()
+
+    def _write_index(self):
+        tmp = os.path.join(self.path, INDEX_FILE + ".tmp")
+        with open(tmp, 'w') as f:
+            json.dump(self.index, f)
+        os.replace(tmp, os.path.join(self.path, INDEX_FILE))
+
+    def write(self, site_index, **values):
+        """
+        Write one site's values; each keyword is a column name.
+        """
+        for name, value in values.items():
+            self._arrays[name][site_index] = np.reshape(value, self.columns[name])
+
+    def write_block(self, start, **values):
+        """
+        Write a contiguous block of sites starting at row ``start``.
+        """
+        for name, value in values.items():
+            value = np.asarray(value)
+            self._arrays[name][start:start + value.shape[0]] = value
+
+    def write_object(self, site_index, result):
+        """
+        Write every column found as an attribute (or ``monthly``/``annual`` entry) of a model object.
+        """
+        values = {}
+        for name in self.columns:
+            value = getattr(result, name, None)
+            if value is None and name.startswith("monthly_"):
+                value = getattr(result, "monthly", {}).get(name[len("monthly_"):])
+            if value is None and name.startswith("annual_"):
+                value = getattr(result, "annual", {}).get(name[len("annual_"):])
+            if value is not None:
+                values[name] = value
+        self.write(site_index, **values)
+
+    def flush(self):
+        for array in self._arrays.values():
+            array.flush()
+
+    def close(self):
+        self.flush()
+        self._arrays.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class ResultStore:
+    """
+    Read side of a ResultStoreWriter directory.
+
+    Columns are opened as read-only memmaps on first use, so slicing a site or a
+    time range only touches the pages it needs.
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, INDEX_FILE)) as f:
+            self.index = json.load(f)
+        self.site_ids = self.index["site_ids"]
+        self.columns = {name: tuple(shape) for name, shape in self.index["columns"].items()}
+        self._rows = {site_id: row for row, site_id in enumerate(self.site_ids)}
+        self._arrays = {}
+
+    def __getitem__(self, name):
+        if name not in self._arrays:
+            if name not in self.columns:
+                raise KeyError(name)
+            self._arrays[name] = np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode='r')
+        return self._arrays[name]
+
+    def site_rows(self, sites):
+        """
+        Row indices for a site id, a list of site ids, or a slice/array of rows.
+        """
+        if isinstance(sites, str):
+            return self._rows[sites]
+        if isinstance(sites, (list, tuple)) and sites and isinstance(sites[0], str):
+            return np.array([self._rows[site] for site in sites])
+        return sites
+
+    def hour_range(self, start, end):
+        """
+        Slice of the hourly samples whose intervals overlap [start, end), for datetime64 bounds.
+
+        Sample k covers [origin + k * interval, origin + (k + 1) * interval), so
+        the start index is floored and the exclusive end index is rounded up.
+
+        :raises ValueError: If the store has no start time, or the bounds are reversed or fall outside the stored period
+        """
+        if self.index["start"] is None:
+            raise ValueError("store was written without a start time")
+        origin = np.datetime64(self.index["start"], 'm')
+        step = np.timedelta64(self.index["interval_minutes"], 'm')
+        start, end = np.datetime64(start, 'm'), np.datetime64(end, 'm')
+        stop = origin + self.index["n_hours"] * step
+        if start > end:
+            raise ValueError(f"hour range starts at {start}, after its end {end}")
+        if start < origin or end > stop:
+            raise ValueError(f"hour range [{start}, {end}) is outside the stored period [{origin}, {stop})")
+        return slice(int((start - origin) // step), int(-((origin - end) // step)))
+
+    def read(self, name, sites=slice(None), hours=slice(None)):
+        """
+        Read a column for selected sites and, for hourly columns, selected hours.
+
+        :param sites: Site id(s) or row slice/array
+        :param hours: Slice or index array along the hour axis
+        :return: In-memory array
+        """
+        array = self[name]
+        rows = self.site_rows(sites)
+        if len(self.columns[name]) == 0:
+            return np.array(array[rows])
+        if isinstance(rows, np.ndarray) and not isinstance(hours, slice):
+            return np.array(array[np.ix_(rows, hours)])
+        return np.array(array[rows, hours])
@@ -0,0 +1,367 @@
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http import HTTPStatus
+import numpy as np
+from .solar_parameters import SolarParametersBatch
+from .solar_time import datetime64_to_day_of_year
+from .solar_radiation import GROUND_REFLECTIVITY, cos_incidence_angle
+from .solar_estimation import EstimationPlan
+from .ratio_models import RATIO_MODELS
+from .lj import MONTHLY_AVERAGE_DAYS, lj_tilt_surface
+from .astro_cache import shared_cache
+from . import calculate_local_standard_meridian
+
+logger = logging.getLogger(__name__)
+
+# --- request parsing (event loop) ------------------------------------------
+#
+# Each parser validates one JSON object and returns a hashable tuple, which is
+# both the input of the batch function and the key for coalescing identical
+# in-flight queries.
+
+def _number(payload, name, default=None):
+    value = payload.get(name, default)
+    if value is None:
+        raise ValueError(f"missing field: {name}")
+    value = float(value)
+    if not np.isfinite(value):
+        raise ValueError(f"{name} must be finite")
+    return value
+
+def _monthly(payload, name, required=True):
+    value = payload.get(name)
+    if value is None:
+        if required:
+            raise ValueError(f"missing field: {name}")
+        return None
+    value = tuple(float(v) for v in value)
+    if len(value) != 12:
+        raise ValueError(f"{name} must hold 12 monthly values")
+    return value
+
+def _day_of_year(payload):
+    if "date" in payload:
+        return float(datetime64_to_day_of_year(np.datetime64(payload["date"], 'D')))
+    n = _number(payload, "n")
+    if not (1 <= n <= 366 and n == int(n)):
+        raise ValueError("n must be a day of year in [1, 366]")
+    return n
+
+def _ground_type(payload):
+    ground_type = payload.get("ground_type", "ordinary")
+    if ground_type not in GROUND_REFLECTIVITY:
+        raise ValueError(f"ground_type must be one of {', '.join(GROUND_REFLECTIVITY)}")
+    return ground_type
+
+def _site(payload):
+    latitude = _number(payload, "latitude")
+    longitude = _number(payload, "longitude")
+    l_st = _number(payload, "l_st", calculate_local_standard_meridian(longitude))
+    return _day_of_year(payload), _number(payload, "hour"), latitude, longitude, l_st
+
+def parse_sun_position(payload):
+    """
+    {"n" or "date", "hour", "latitude", "longitude", "l_st" (optional)}
+    """
+    return _site(payload)
+
+def parse_estimation(payload):
+    """
+    Sun-position fields plus {"model", "beta", "a_w", "H_bar_h", "H_bar_d", "ground_type" (optional)}.
+    """
+    model = payload.get("model", "cpr")
+    if model not in RATIO_MODELS:
+        raise ValueError(f"model must be one of {', '.join(RATIO_MODELS)}")
+    return (model,) + _site(payload) + (_number(payload, "beta"), _number(payload, "a_w", 0),
+                                        _number(payload, "H_bar_h"), _number(payload, "H_bar_d"), _ground_type(payload))
+
+def parse_lj(payload):
+    """
+    {"latitude", "beta", "H_bar_h" (12 values), "H_o_bar_h" (optional, 12 values), "ground_type" (optional)}
+    """
+    return _number(payload, "latitude"), _number(payload, "beta"), _monthly(payload, "H_bar_h"), _monthly(payload, "H_o_bar_h", required=False), _ground_type(payload)
+
+# --- batch functions (worker pool) -----------------------------------------
+
+def _jsonable(value):
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+# Any leap year: its tables cover n = 366 too, and the rows do not depend on the year
+CACHE_YEAR = 2000
+
+def _sun(n, latitude, longitude, hour, l_st):
+    # Day-dependent terms come from the worker's AstronomicalCache, so repeated sites skip their trigonometry
+    days = shared_cache().gather(CACHE_YEAR, n, latitude)
+    sun = SolarParametersBatch(n, latitude, longitude, hour, l_st, delta_s=days["delta_s"], ET=days["ET"], h_ss=days["h_ss"])
+    return sun, days["extra_terrestrial_radiation_factor"]
+
+def sun_position_batch(queries):
+    n, hour, latitude, longitude, l_st = (np.array(column) for column in zip(*queries))
+    sun, _ = _sun(n, latitude, longitude, hour, l_st)
+    h_s = (sun.h_s + 180) % 360 - 180
+    return [{"delta_s": _jsonable(sun.delta_s[k]), "ET": _jsonable(sun.ET[k]), "h_s": _jsonable(h_s[k]), "alpha": _jsonable(sun.alpha[k]),
+             "a_s": _jsonable(sun.a_s[k]), "z": _jsonable(sun.z[k]), "h_ss": _jsonable(sun.h_ss[k]), "h_sr": _jsonable(sun.h_sr[k])}
+            for k in range(len(queries))]
+
+def estimation_batch(queries):
+    results = [None] * len(queries)
+    models = np.array([query[0] for query in queries])
+    for model in np.unique(models):
+        rows = np.flatnonzero(models == model)
+        n, hour, latitude, longitude, l_st, beta, a_w, H_bar_h, H_bar_d = (np.array(column, dtype=float) for column in list(zip(*(queries[k] for k in rows)))[1:10])
+        rho = np.array([GROUND_REFLECTIVITY[queries[k][10]] for k in rows])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sun, factor = _sun(n, latitude, longitude, hour, l_st)
+            h_s = (sun.h_s + 180) % 360 - 180
+            cos_i = cos_incidence_angle(sun.alpha, sun.a_s, beta, a_w)
+            daylight = (sun.alpha > 0) & (np.abs(h_s) < sun.h_ss)
+            plan = EstimationPlan(model, latitude, sun.delta_s, h_s, sun.h_ss, factor, beta, rho,
+                                  np.degrees(np.arccos(cos_i)), sun.alpha, daylight=daylight, beam_mask=cos_i > 0)
+            result = plan.evaluate(H_bar_h, H_bar_d)
+        for j, k in enumerate(rows):
+            results[k] = {name: _jsonable(getattr(result, name)[j]) for name in result.__slots__}
+    return results
+
+def lj_batch(queries):
+    latitude, beta = (np.array(column, dtype=float) for column in list(zip(*queries))[:2])
+    H_bar_h = np.array([query[2] for query in queries])
+    cache = shared_cache()
+    H_o_bar_h = cache.gather(None, MONTHLY_AVERAGE_DAYS[None, :], latitude[:, None], ("H_o_h",))["H_o_h"]
+    for k, query in enumerate(queries):
+        if query[3] is not None:
+            H_o_bar_h[k] = query[3]
+    rho = np.array([GROUND_REFLECTIVITY[query[4]] for query in queries])[:, None, None]
+    # Evaluate every site on the batch's distinct tilts and keep each site's own
+    tilts, tilt_index = np.unique(beta, return_inverse=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        H_bar_c = lj_tilt_surface(latitude, tilts, H_bar_h, H_o_bar_h, rho, cache=cache)[np.arange(len(queries)), :, tilt_index]
+    return [{"H_bar_c": [_jsonable(value) for value in row]} for row in H_bar_c]
+
+# --- batching and coalescing -------------------------------------------------
+
+class MicroBatcher:
+    """
+    Collects concurrent queries for one batch function and runs them as one call.
+
+    A batch is dispatched when ``max_batch`` queries are waiting or ``max_delay``
+    seconds after the first one arrived, whichever comes first. The batch
+    function runs on ``executor`` so the event loop keeps serving requests.
+    If it raises for a batch of several queries, each query is retried on its
+    own, so only the queries that fail by themselves get the exception.
+    """
+    def __init__(self, function, executor, max_batch=256, max_delay=0.005):
+        self.function = function
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.batches = 0
+        self.queries = 0
+        self.retried = 0
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+
+    def submit(self, query):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((query, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush)
+        return future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        if pending:
+            task = asyncio.ensure_future(self._run(pending))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, pending):
+        self.batches += 1
+        self.queries += len(pending)
+        if len(pending) == 1:
+            await self._run_one(*pending[0])
+            return
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(self.executor, self.function, [query for query, _ in pending])
+        except Exception:
+            # One bad query must not fail the unrelated queries coalesced with it
+            logger.warning("%s failed for a batch of %d; retrying its queries one by one", self.function.__name__, len(pending), exc_info=True)
+            self.retried += len(pending)
+            await asyncio.gather(*(self._run_one(query, future) for query, future in pending))
+            return
+        for (_, future), result in zip(pending, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _run_one(self, query, future):
+        try:
+            result = (await asyncio.get_running_loop().run_in_executor(self.executor, self.function, [query]))[0]
+        except Exception as e:
+            logger.exception("%s failed for one query", self.function.__name__)
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(result)
+
+class EstimationService:
+    """
+    JSON endpoints over the vectorized models, with micro-batching and coalescing.
+
+    POST /sun-position, /estimation and /lj accept one query object or a list of
+    them. For a list, each item gets its own result or ``{"error": ...}``, so
+    one bad item does not fail the others. Identical queries that are already
+    in flight share one result. Bodies larger than ``max_body`` bytes are
+    rejected with 413. GET /health reports batch and coalescing counters, and
+    the hit/miss counters of the AstronomicalCache (astro_cache.shared_cache)
+    that the batch functions take the day-dependent terms from. A process pool
+    keeps one cache per worker, whose counters the service cannot see, so they
+    are only reported for thread (or in-process) executors.
+    """
+    def __init__(self, executor, max_batch=256, max_delay=0.005, max_body=1 << 20):
+        self.max_body = max_body
+        self.cache = None if isinstance(executor, ProcessPoolExecutor) else shared_cache()
+        self.endpoints = {
+            "/sun-position": (parse_sun_position, MicroBatcher(sun_position_batch, executor, max_batch, max_delay)),
+            "/estimation": (parse_estimation, MicroBatcher(estimation_batch, executor, max_batch, max_delay)),
+            "/lj": (parse_lj, MicroBatcher(lj_batch, executor, max_batch, max_delay)),
+        }
+        self.coalesced = 0
+        self._in_flight = {}
+
+    async def query(self, path, payload):
+        parse, batcher = self.endpoints[path]
+        key = (path, parse(payload))
+        future = self._in_flight.get(key)
+        if future is None:
+            future = batcher.submit(key[1])
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # Shield the shared future so one client disconnecting does not cancel it for the others
+        return await asyncio.shield(future)
+
+    async def query_item(self, path, item):
+        """
+        One item of a list request: its result, or {"error": ...} if it fails.
+        """
+        try:
+            if not isinstance(item, dict):
+                raise ValueError("expected a JSON object")
+            return await self.query(path, item)
+        except (ValueError, TypeError, AttributeError) as e:
+            return {"error": str(e)}
+        except Exception as e:
+            logger.exception("%s failed for one item", path)
+            return {"error": f"{type(e).__name__}: {e}"}
+
+    def health(self):
+        health = {"status": "ok", "in_flight": len(self._in_flight), "coalesced": self.coalesced,
+                  "endpoints": {path: {"batches": batcher.batches, "queries": batcher.queries, "retried": batcher.retried} for path, (_, batcher) in self.endpoints.items()}}
+        if self.cache is not None:
+            health["astro_cache"] = self.cache.stats()
+        return health
+
+    async def dispatch(self, method, path, body):
+        """
+        :return: Tuple (HTTPStatus, JSON-serialisable response)
+        """
+        if path == "/health":
+            return HTTPStatus.OK, self.health()
+        if path not in self.endpoints:
+            return HTTPStatus.NOT_FOUND, {"error": f"unknown endpoint {path}"}
+        if method != "POST":
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "use POST"}
+        try:
+            payload = json.loads(body or b"null")
+            if isinstance(payload, list):
+                return HTTPStatus.OK, list(await asyncio.gather(*(self.query_item(path, item) for item in payload)))
+            if not isinstance(payload, dict):
+                raise ValueError("expected a JSON object or a list of objects")
+            return HTTPStatus.OK, await self.query(path, payload)
+        except (ValueError, TypeError, AttributeError) as e:
+            return HTTPStatus.BAD_REQUEST, {"error": str(e)}
+        except Exception as e:
+            logger.exception("%s failed", path)
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(e).__name__}: {e}"}
+
+    async def handle_connection(self, reader, writer):
+        """
+        Minimal HTTP/1.1 handler with keep-alive.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, path, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > self.max_body:
+                    # The body is not read, so the connection cannot be reused
+                    await self._respond(writer, version, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": f"body exceeds {self.max_body} bytes"}, False)
+                    break
+                body = await reader.readexactly(length)
+                status, response = await self.dispatch(method, path.split('?')[0], body)
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                await self._respond(writer, version, status, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, version, status, response, keep_alive):
+        payload = json.dumps(response).encode()
+        writer.write(f"{version} {status.value} {status.phrase}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(payload)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + payload)
+        await writer.drain()
+
+async def serve(host="127.0.0.1", port=8080, executor=None, max_batch=256, max_delay=0.005, max_body=1 << 20):
+    service = EstimationService(executor, max_batch, max_delay, max_body)
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    logger.info("Serving on %s", ", ".join(str(sock.getsockname()) for sock in server.sockets))
+    async with server:
+        await server.serve_forever()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve SolarEstimation, LJ and sun positions as JSON over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=None, help="Worker pool size (default: os.cpu_count())")
+    parser.add_argument("--executor", default="process", choices=["process", "thread"])
+    parser.add_argument("--max-batch", type=int, default=256)
+    parser.add_argument("--max-delay-ms", type=float, default=5.0)
+    parser.add_argument("--max-body", type=int, default=1 << 20, help="Largest accepted request body in bytes; larger requests get 413")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.executor == "process":
+        # Forking from a running event loop would hand open client sockets to the workers
+        context = multiprocessing.get_context("forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+        executor = ProcessPoolExecutor(max_workers=args.workers or os.cpu_count(), mp_context=context)
+    else:
+        executor = ThreadPoolExecutor(max_workers=args.workers or os.cpu_count())
+    with executor:
+        asyncio.run(serve(args.host, args.port, executor, args.max_batch, args.max_delay_ms / 1000, args.max_body))
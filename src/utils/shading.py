@@ -0,0 +1,144 @@
+import numpy as np
+from .solar_radiation import cos_incidence_angle
+from .tracing import trace
+from .instrumentation import timed
+
+class HorizonProfile:
+    """
+    Terrain horizon of one site as elevation angles on a regular azimuth grid.
+
+    The measured profile is resampled once, by periodic linear interpolation, to
+    bins of ``resolution`` degrees starting at azimuth -180 (0 = south, positive
+    towards west). Sun positions are then resolved by indexing that array.
+
+    :param azimuth: Azimuths of the measured horizon points in degrees
+    :param elevation: Horizon elevation angles in degrees at those azimuths
+    :param resolution: Azimuth bin width in degrees
+    """
+    def __init__(self, azimuth, elevation, resolution=1.0):
+        self.resolution = resolution
+        self.azimuth = -180 + resolution * np.arange(int(round(360 / resolution)))
+        self.elevation = np.interp(self.azimuth, np.asarray(azimuth, dtype=float), np.asarray(elevation, dtype=float), period=360)
+
+    def elevation_at(self, azimuth):
+        """
+        Horizon elevation in the direction of ``azimuth`` (array-like, degrees).
+        """
+        index = np.rint((np.asarray(azimuth, dtype=float) + 180) / self.resolution).astype(np.intp) % self.azimuth.size
+        return self.elevation[index]
+
+    def beam_factor(self, alpha, azimuth):
+        """
+        1 where the sun is above the horizon profile, 0 where the terrain blocks it.
+
+        :param azimuth: Full-circle solar azimuth, e.g. from unfolded_solar_azimuth
+        """
+        return (np.asarray(alpha) > self.elevation_at(azimuth)).astype(float)
+
+    def diffuse_factor(self, beta, a_w, elevation_step=1.0):
+        """
+        Fraction of the isotropic sky diffuse seen by a surface that the horizon leaves visible.
+
+        The sky dome is split into patches of ``resolution`` x ``elevation_step``
+        degrees; each patch is weighted by its solid angle and its cosine to the
+        surface normal. Array-valued orientations (e.g. a tracker's) are reduced
+        to their distinct values on a 1-degree grid first.
+
+        :param beta: Surface tilt in degrees (array-like)
+        :param a_w: Surface azimuth in degrees (array-like)
+        :return: Factor in [0, 1], broadcast over beta and a_w
+        """
+        beta, a_w = np.broadcast_arrays(np.rint(np.asarray(beta, dtype=float)), np.rint(np.asarray(a_w, dtype=float)))
+        orientations, inverse = np.unique(np.stack([beta.ravel(), a_w.ravel()], axis=1), axis=0, return_inverse=True)
+        elevation = np.arange(elevation_step / 2, 90, elevation_step)[:, None]
+        solid_angle = np.cos(np.radians(elevation))
+        visible = elevation > self.elevation[None, :]
+        factors = np.empty(len(orientations))
+        for k, (tilt, azimuth) in enumerate(orientations):
+            view = np.maximum(cos_incidence_angle(elevation, self.azimuth[None, :], tilt, azimuth), 0) * solid_angle
+            total = view.sum()
+            factors[k] = view[visible].sum() / total if total > 0 else 1.0
+        return factors[inverse.ravel()].reshape(beta.shape)
+
+class RowShading:
+    """
+    Inter-row shading of long parallel rows of fixed-tilt collectors on flat ground.
+
+    The shaded fraction of a collector depends only on the sun's profile angle
+    (its elevation in the plane perpendicular to the rows), so it is tabulated
+    once on a grid of ``resolution`` degrees and sun positions are resolved by
+    indexing that table. The front row also hides part of the sky; that
+    diffuse loss is a single factor per geometry.
+
+    :param gcr: Ground coverage ratio, collector width / row pitch
+    :param beta: Collector tilt in degrees
+    :param a_w: Azimuth the rows face, in degrees
+    :param resolution: Profile-angle grid spacing in degrees
+    """
+    def __init__(self, gcr, beta, a_w=0, resolution=0.1):
+        self.gcr = gcr
+        self.beta = beta
+        self.a_w = a_w
+        self.resolution = resolution
+        self.profile_angle = np.linspace(0, 180, int(round(180 / resolution)) + 1)
+
+        # Shadow of the front row's top edge along the collector, as a fraction of its width
+        beta_rad = np.radians(beta)
+        psi = np.radians(self.profile_angle)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            unshaded = np.sin(psi) / (gcr * np.sin(psi + beta_rad))
+        self.shaded_fraction = np.clip(1 - np.nan_to_num(unshaded, nan=0.0, posinf=1.0, neginf=1.0), 0, 1)
+        self.shaded_fraction[0] = 1.0
+
+        # Sky view along the collector: the front row masks the sky below its top edge
+        x = (np.arange(100) + 0.5) / 100
+        forward = 1 / gcr - np.cos(beta_rad) * (1 - x)
+        mask = np.arctan2((1 - x) * np.sin(beta_rad), forward)
+        self.diffuse = float(np.mean(1 + np.cos(beta_rad + mask)) / (1 + np.cos(beta_rad)))
+
+    def beam_factor(self, alpha, azimuth):
+        """
+        Unshaded fraction of the collector for each sun position.
+
+        :param azimuth: Full-circle solar azimuth, e.g. from unfolded_solar_azimuth
+        """
+        alpha_rad = np.radians(alpha)
+        psi = np.degrees(np.arctan2(np.sin(alpha_rad), np.cos(alpha_rad) * np.cos(np.radians(np.subtract(azimuth, self.a_w)))))
+        index = np.rint(np.clip(psi, 0, 180) / self.resolution).astype(np.intp)
+        return 1 - self.shaded_fraction[index]
+
+class SiteShading:
+    """
+    Horizon and row shading of one site, combined into beam and diffuse multipliers.
+
+    Both parts are optional. ``factors`` returns arrays that scale the beam
+    and the sky-diffuse components; the ground-reflected component is left
+    as is. The horizon follows the orientation passed to ``factors``; the rows
+    keep the tilt and azimuth of their RowShading.
+
+    :param horizon: HorizonProfile or None
+    :param rows: RowShading or None
+    """
+    def __init__(self, horizon=None, rows=None):
+        self.horizon = horizon
+        self.rows = rows
+
+    @timed("SiteShading.factors")
+    def factors(self, alpha, azimuth, beta, a_w):
+        """
+        :param alpha: Solar altitude in degrees
+        :param azimuth: Full-circle solar azimuth in degrees, e.g. from unfolded_solar_azimuth
+        :param beta: Surface tilt in degrees (scalar or per sample)
+        :param a_w: Surface azimuth in degrees (scalar or per sample)
+        :return: Tuple (beam, diffuse) of multipliers, broadcast over the inputs
+        """
+        beam = np.ones(np.broadcast_shapes(np.shape(alpha), np.shape(azimuth)))
+        diffuse = np.ones(np.broadcast_shapes(np.shape(beta), np.shape(a_w)))
+        if self.horizon is not None:
+            beam = beam * self.horizon.beam_factor(alpha, azimuth)
+            diffuse = diffuse * self.horizon.diffuse_factor(beta, a_w)
+        if self.rows is not None:
+            beam = beam * self.rows.beam_factor(alpha, azimuth)
+            diffuse = diffuse * self.rows.diffuse
+        trace("SiteShading", self)
+        return beam, diffuse
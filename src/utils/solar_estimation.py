@@ -1,15 +1,48 @@
-import sys
+import argparse
+import logging
 import numpy as np
-from solar_radiation import SolarRadiation
-from solar_parameters import SolarParameters
-from daily_integration import DailyIntegration
-from cpr import CPR
-from cprg import CPRG
-from lj import LJ
-from __init__ import calculate_local_standard_meridian, calculate_n, time_to_hour_angle
+from .solar_radiation import GROUND_REFLECTIVITY, cos_incidence_angle, extra_terrestrial_radiation_factor
+from .solar_parameters import SolarParametersBatch, unfolded_solar_azimuth
+from .ratio_models import compute_ratios, hourly_diffuse_ratio, daily_integration_geometry, daily_integration_r_t
+from .daily_integration import DailyIntegration
+from .cpr import CPR
+from .cprg import CPRG
+from . import calculate_local_standard_meridian
+from .tracing import trace
+from .instrumentation import stage, timed
+from .records import SolarEstimationRecord, to_structured
+from .tracking import get_tracker
+
+logger = logging.getLogger(__name__)
+
+# Day of year on which each month starts (non-leap year), plus the end of the year
+MONTH_START_DAYS = np.array([1, 32, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335, 366])
+
+def month_index(n):
+    """
+    Zero-based month index of day-of-year n (non-leap year).
+    """
+    return np.searchsorted(MONTH_START_DAYS, n, side='right') - 1
+
+def tilted_components(r_d, r_t, H_bar_h, H_bar_d, i, alpha, beta, rho):
+    """
+    Split hourly radiation on a tilted surface into beam, diffuse and reflected parts.
+
+    All inputs broadcast against each other; angles are in degrees. The hourly
+    total r_t*H_bar_h and horizontal beam r_t*H_bar_h - r_d*H_bar_d are clamped
+    at zero: near the horizon the ratio correlations can cross.
+
+    :return: Tuple (I_b_c, I_d_c, I_r_c)
+    """
+    total = np.maximum(r_t*H_bar_h, 0)
+    I_b_c = np.maximum(total-r_d*H_bar_d, 0)*np.cos(np.radians(i))/np.sin(np.radians(alpha))
+    I_d_c = r_d*H_bar_d*np.square(np.cos(np.radians(beta)/2))
+    I_r_c = rho*total*np.square(np.sin(np.radians(beta)/2))
+    return I_b_c, I_d_c, I_r_c
 
 class SolarEstimation:
-    def __init__(self, model_name, latitude, delta_s, h_s, h_ss, H_bar_h, H_bar_d, extraterrestrial_radiation_factor, beta, rho, i):
+    @timed("SolarEstimation")
+    def __init__(self, model_name, latitude, delta_s, h_s, h_ss, H_bar_h, H_bar_d, extraterrestrial_radiation_factor, beta, rho, i, alpha):
         self.model_name = model_name
         if model_name == "daily_integration":
             daily_integration = DailyIntegration(latitude, delta_s, h_s, h_ss, H_bar_h, extraterrestrial_radiation_factor)
@@ -25,19 +58,219 @@ class SolarEstimation:
             self.r_t = cprg.r_t
         else:
             raise ValueError(f"Unsupported model: {model_name}")
-        print(self.r_t*H_bar_h-self.r_d*H_bar_d, np.cos(np.radians(i))/np.sin(np.radians(alpha)))
-        self.I_b_c = (self.r_t*H_bar_h-self.r_d*H_bar_d)*np.cos(np.radians(i))/np.sin(np.radians(alpha))
-        self.I_d_c = self.r_d*H_bar_d*np.square(np.cos(np.radians(beta/2)))
-        self.I_r_c = rho*self.r_t*H_bar_h*np.square(np.sin(np.radians(beta/2)))
-        print(f"I_b_c: {self.I_b_c} I_d_c: {self.I_d_c} I_r_c: {self.I_r_c}")
+        self.I_b_c, self.I_d_c, self.I_r_c = tilted_components(self.r_d, self.r_t, H_bar_h, H_bar_d, i, alpha, beta, rho)
+        logger.debug("I_b_c: %s I_d_c: %s I_r_c: %s", self.I_b_c, self.I_d_c, self.I_r_c)
         self.I_c = self.I_b_c + self.I_d_c + self.I_r_c
 
+        trace("SolarEstimation", self)
+
+    def to_record(self):
+        return SolarEstimationRecord.from_object(self)
+
+class EstimationPlan:
+    """
+    Geometry-only part of SolarEstimation, prepared once for repeated irradiance updates.
+
+    r_d, r_t (or, for "daily_integration", the H_bar_h-independent terms of r_t),
+    the beam factor cos(i)/sin(alpha) and the view factors cos^2(beta/2) and
+    rho*sin^2(beta/2) are computed in __init__. ``evaluate`` then only needs a
+    few array multiplies per call. All inputs broadcast against each other.
+
+    :param daylight: Optional boolean mask; outputs are zero where it is False
+    :param beam_mask: Optional boolean mask for the beam component, e.g. cos(i) > 0
+    :param beam_shading: Optional multiplier of the beam component, e.g. from SiteShading.factors
+    :param diffuse_shading: Optional multiplier of the sky-diffuse component
+    """
+    @timed("EstimationPlan")
+    def __init__(self, model_name, latitude, delta_s, h_s, h_ss, extraterrestrial_radiation_factor, beta, rho, i, alpha, daylight=None, beam_mask=None, beam_shading=None, diffuse_shading=None):
+        self.model_name = model_name
+        if model_name == "daily_integration":
+            h_ss_rad = np.radians(h_ss)
+            self.r_d = hourly_diffuse_ratio(np.radians(h_s), h_ss_rad)
+            self.geometry = daily_integration_geometry(h_ss_rad, latitude, delta_s, extraterrestrial_radiation_factor)
+            self.r_t = None
+        else:
+            self.r_d, self.r_t = compute_ratios(model_name, h_s, h_ss)
+            self.geometry = None
+
+        self.beam_factor = np.cos(np.radians(i)) / np.sin(np.radians(alpha))
+        self.diffuse_view = np.square(np.cos(np.radians(beta) / 2))
+        self.reflected_view = rho * np.square(np.sin(np.radians(beta) / 2))
+        if beam_mask is not None:
+            self.beam_factor = np.where(beam_mask, self.beam_factor, 0)
+        if beam_shading is not None:
+            self.beam_factor = self.beam_factor * beam_shading
+        if diffuse_shading is not None:
+            self.diffuse_view = self.diffuse_view * diffuse_shading
+        if daylight is not None:
+            # Zero the ratios outside daylight so NaN geometry (e.g. polar nights) cannot leak into products
+            self.r_d = np.where(daylight, self.r_d, 0)
+            if self.r_t is not None:
+                self.r_t = np.where(daylight, self.r_t, 0)
+            self.beam_factor = np.where(daylight, self.beam_factor, 0)
+        self.daylight = daylight
+
+    @timed("EstimationPlan.evaluate")
+    def evaluate(self, H_bar_h, H_bar_d):
+        """
+        Tilted-surface components for new irradiance, reusing the prepared geometry.
+
+        :return: SolarEstimationRecord with r_d, r_t, I_b_c, I_d_c, I_r_c and I_c
+        """
+        r_t = self.r_t
+        if r_t is None:
+            r_t = daily_integration_r_t(self.r_d, self.geometry, H_bar_h)
+            if self.daylight is not None:
+                r_t = np.where(self.daylight, r_t, 0)
+        # The ratio correlations can cross (or, for daily_integration, dip below zero) near
+        # the horizon; neither the hourly total nor the horizontal beam may be negative
+        total = np.maximum(r_t * H_bar_h, 0)
+        diffuse = self.r_d * H_bar_d
+        I_b_c = np.maximum(total - diffuse, 0) * self.beam_factor
+        I_d_c = diffuse * self.diffuse_view
+        I_r_c = total * self.reflected_view
+        return SolarEstimationRecord(self.r_d, r_t, I_b_c, I_d_c, I_r_c, I_b_c + I_d_c + I_r_c)
+
+class AnnualSimulation:
+    """
+    Hourly tilted-surface radiation for one site over a 365-day year.
+
+    Hourly series are flattened day-major to 8,760 values. Hours when the sun is
+    below the horizon are zero, and the beam component is zero whenever the sun
+    is behind the panel. ``monthly`` and ``annual`` hold the sums of each
+    component, in the units of H_bar_h/H_bar_d (e.g. Wh/m^2).
+
+    Passing an AstronomicalCache reuses its 365-day reference-year table for the
+    declination, equation of time and extraterrestrial factor. The sunset hour
+    angle is still computed at the exact latitude, so results match the
+    uncached path.
+
+    With ``tracker`` ("single_axis", "dual_axis" or a callable such as
+    ``functools.partial(SingleAxisTracker, gcr=0.4)``) the surface follows the
+    sun: ``beta`` and ``a_w`` are ignored and replaced by the tracker's hourly
+    (day, hour) arrays, and ``orientation`` holds the tracker object. Trackers
+    are steered by the full-circle solar azimuth, and their ``cos_i`` is taken
+    against that true sun direction; it equals the fixed-surface formula with
+    ``a_s`` wherever the sun is south of the east-west line.
+
+    ``shading`` (a SiteShading) scales the beam and sky-diffuse components by
+    its horizon and row factors. They are resolved once, with the geometry, so
+    ``update`` stays as fast as without shading. Row shading is tabulated for
+    the fixed tilt and azimuth of its RowShading, so it must match ``beta`` and
+    ``a_w`` and cannot be combined with a tracker (ValueError otherwise).
+    """
+    components = ("I_b_c", "I_d_c", "I_r_c", "I_c")
+
+    @timed("AnnualSimulation")
+    def __init__(self, model_name, latitude, longitude, beta, a_w, H_bar_h, H_bar_d, l_st=None, ground_type='ordinary', hours=np.arange(24) + 0.5, cache=None, tracker=None, shading=None):
+        rows = None if shading is None else shading.rows
+        if rows is not None:
+            if tracker is not None:
+                raise ValueError("Row shading is tabulated for a fixed tilt and cannot be combined with a tracker")
+            if not (np.all(rows.beta == beta) and np.all(rows.a_w == a_w)):
+                raise ValueError(f"Row shading geometry (beta={rows.beta}, a_w={rows.a_w}) does not match the surface (beta={beta}, a_w={a_w})")
+        self.model_name = model_name
+        self.latitude = latitude
+        self.longitude = longitude
+        self.beta = beta
+        self.a_w = a_w
+        self._set_irradiance(H_bar_h, H_bar_d)
+        self.l_st = calculate_local_standard_meridian(longitude) if l_st is None else l_st
+        self.rho = GROUND_REFLECTIVITY[ground_type]
+
+        # Stage 1: day-dependent terms and sun position on a (day, hour) grid
+        self.n = np.arange(1, 366)
+        self.hours = np.asarray(hours, dtype=float)
+        with stage("AnnualSimulation.sun_position"):
+            if cache is None:
+                sun = SolarParametersBatch(self.n[:, None], latitude, longitude, self.hours[None, :], self.l_st)
+                factor = extra_terrestrial_radiation_factor(self.n)[:, None]
+            else:
+                table = cache.table(None, latitude)
+                # h_ss comes from the latitude bucket, so it is recomputed at the site's latitude
+                sun = SolarParametersBatch(self.n[:, None], latitude, longitude, self.hours[None, :], self.l_st,
+                                           delta_s=table.delta_s[:, None], ET=table.ET[:, None])
+                factor = table.extra_terrestrial_radiation_factor[:, None]
+        self.alpha = sun.alpha
+        self.a_s = sun.a_s
+        h_s = (sun.h_s + 180) % 360 - 180
+        # a_s is folded into [-90, 90]; trackers and horizon lookups need the true direction
+        azimuth = unfolded_solar_azimuth(latitude, sun.delta_s, sun.h_s)
+
+        # Stage 2: surface orientation and incidence angle
+        with stage("AnnualSimulation.incidence"):
+            if tracker is None:
+                self.orientation = None
+                cos_i = cos_incidence_angle(sun.alpha, sun.a_s, beta, a_w)
+                self.i = np.degrees(np.arccos(cos_i))
+            else:
+                self.orientation = get_tracker(tracker)(sun.alpha, azimuth)
+                beta = self.beta = self.orientation.beta
+                self.a_w = self.orientation.a_w
+                cos_i = self.orientation.cos_i
+                self.i = self.orientation.i
+
+        # Stage 3: geometry-only part of the ratio model and the tilted-surface factors
+        self.month = month_index(self.n)
+        daylight = (sun.alpha > 0) & (np.abs(h_s) < sun.h_ss)
+        beam_shading = diffuse_shading = None
+        if shading is not None:
+            beam_shading, diffuse_shading = shading.factors(sun.alpha, azimuth, beta, self.a_w)
+        self.plan = EstimationPlan(model_name, latitude, sun.delta_s, h_s, sun.h_ss, factor, beta, self.rho, self.i, sun.alpha,
+                                   daylight=daylight, beam_mask=cos_i > 0, beam_shading=beam_shading, diffuse_shading=diffuse_shading)
+
+        # Stage 4: tilted-surface components for the monthly inputs expanded to days
+        self._evaluate()
+
+        trace("AnnualSimulation", self)
+
+    def update(self, H_bar_h, H_bar_d):
+        """
+        Re-run stage 4 for new monthly irradiance, reusing the prepared geometry.
+
+        :return: self, with the hourly series, ``monthly`` and ``annual`` replaced
+        """
+        self._set_irradiance(H_bar_h, H_bar_d)
+        self._evaluate()
+        return self
+
+    def _set_irradiance(self, H_bar_h, H_bar_d):
+        self.H_bar_h = np.asarray(H_bar_h, dtype=float)
+        self.H_bar_d = np.asarray(H_bar_d, dtype=float)
+        if self.H_bar_h.shape != (12,) or self.H_bar_d.shape != (12,):
+            raise ValueError("H_bar_h and H_bar_d must hold 12 monthly values")
+
+    @timed("AnnualSimulation.evaluate")
+    def _evaluate(self):
+        result = self.plan.evaluate(self.H_bar_h[self.month][:, None], self.H_bar_d[self.month][:, None])
+        self.r_d, self.r_t = result.r_d, result.r_t
+        for name in self.components:
+            setattr(self, name, np.ravel(getattr(result, name)))
+
+        hour_month = np.repeat(self.month, self.hours.size)
+        self.monthly = {name: np.bincount(hour_month, weights=getattr(self, name), minlength=12) for name in self.components}
+        self.annual = {name: self.monthly[name].sum() for name in self.components}
+
+    def to_array(self, dtype=np.float64):
+        """
+        Hourly results as one (8760,) structured array with day, hour, sun position,
+        ratios and the tilted components.
+        """
+        days, hours = np.broadcast_arrays(self.n[:, None], self.hours[None, :])
+        hourly = {"n": days, "hour": hours, "alpha": self.alpha, "a_s": self.a_s, "i": self.i, "r_d": self.r_d, "r_t": self.r_t}
+        hourly = {name: np.ravel(value) for name, value in hourly.items()}
+        hourly.update({name: getattr(self, name) for name in self.components})
+        return to_structured(tuple(hourly), dtype, **hourly)
+
+
+def main(argv=None):
+    from .solar_parameters import SolarParameters
+    from .solar_radiation import SolarRadiation
+    from . import calculate_n, time_to_hour_angle
 
-if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print(r"python src\utils\solar_estimation.py <MODEL_NAME>")
-        sys.exit(1)
-    model_name = sys.argv[1]
+    parser = argparse.ArgumentParser(description="Print I_c of an example hour with one ratio model.")
+    parser.add_argument("model_name", choices=["cpr", "cprg", "daily_integration"])
+    model_name = parser.parse_args(argv).model_name
     ground_type = 'ordinary'
     input_date = "Mar 21"
     latitude = 36.08
@@ -73,5 +306,5 @@ if __name__ == "__main__":
     #     solar_estimation_daily_integration = SolarEstimation("daily_integration", latitude, delta_s, h_s, h_ss, H_bar_h, extraterrestrial_radiation_factor)
     #     solar_estimation_cpr = SolarEstimation("cpr", latitude, delta_s, h_s, h_ss, H_bar_h, extraterrestrial_radiation_factor)
     #     solar_estimation_cprg = SolarEstimation("cprg", latitude, delta_s, h_s, h_ss, H_bar_h, extraterrestrial_radiation_factor)
-    solar_estimation = SolarEstimation(model_name, latitude, delta_s, h_s, h_ss, H_bar_h, H_bar_d, extraterrestrial_radiation_factor, beta, rho, i)
-    print(f"Model: {model_name} I_c: {solar_estimation.I_c}")
\ No newline at end of file
+    solar_estimation = SolarEstimation(model_name, latitude, delta_s, h_s, h_ss, H_bar_h, H_bar_d, extraterrestrial_radiation_factor, beta, rho, i, alpha)
+    print(f"Model: {model_name} I_c: {solar_estimation.I_c}")
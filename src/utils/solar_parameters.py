@@ -1,20 +1,31 @@
+import argparse
+import logging
 from datetime import datetime, timedelta
+from functools import cached_property
 import numpy as np
+from .tracing import trace
+from .instrumentation import timed
+from .records import SolarParametersRecord, object_to_structured
+from .solar_time import day_of_year as days_from_jan, datetime64_to_day_of_year, local_time_to_hours, to_local_standard_time, equation_of_time
 
-def days_from_jan(input_date):
-    current_year = datetime.now().year
-    date = datetime.strptime(f"{input_date} {current_year}", "%b %d %Y")
-    jan_1 = datetime(year=current_year, month=1, day=1)
-    delta = date - jan_1
-    return delta.days + 1  # Include Jan 1 as day 1
+logger = logging.getLogger(__name__)
 
 class SolarParameters:
-    def __init__(self, n, latitude, longitude, LST, l_st):
+    """
+    With lazy=True nothing is computed in __init__; each derived attribute is
+    computed on first access (pulling in the attributes it depends on) and then
+    memoized, so e.g. reading only ``alpha`` skips the sunrise/sunset strings.
+    """
+    @timed("SolarParameters")
+    def __init__(self, n, latitude, longitude, LST, l_st, lazy=False):
         self.n = n
         self.latitude = latitude
         self.longitude = longitude
         self.LST = LST  # Local Standard Time (used for calculating solar time)
         self.l_st = l_st  # Local Standard Meridian (used for offset)
+        if lazy:
+            trace("SolarParameters", self)
+            return
 
         # Calculate solar parameters
         self.delta_s = self.solar_declination()
@@ -31,16 +42,21 @@ class SolarParameters:
         # Convert Solar Time to Local Time
         self.h_ss_local, self.h_sr_local = self.convert_solar_to_local_time(self.h_ss), self.convert_solar_to_local_time(self.h_sr)
 
-        # Print all solar parameters
-        print(f"Solar Declination (delta_s): {self.delta_s}°")
-        print(f"Equation of Time (ET): {self.ET} minutes")
-        print(f"Solar Time (ST): {self.ST}")
-        print(f"Hour Angle (h_s): {self.h_s}°")
-        print(f"Solar Attitude (alpha): {self.alpha}°")
-        print(f"Solar Azimuth (a_s): {self.a_s}°")
-        print(f"Solar Zenith Angle (z): {self.z}°")
+        # Log all solar parameters
+        logger.debug("Solar Declination (delta_s): %s°", self.delta_s)
+        logger.debug("Equation of Time (ET): %s minutes", self.ET)
+        logger.debug("Solar Time (ST): %s", self.ST)
+        logger.debug("Hour Angle (h_s): %s°", self.h_s)
+        logger.debug("Solar Attitude (alpha): %s°", self.alpha)
+        logger.debug("Solar Azimuth (a_s): %s°", self.a_s)
+        logger.debug("Solar Zenith Angle (z): %s°", self.z)
 
-        print(f"Sunset Time (Local Time): {self.h_ss_local}, Sunrise Time (Local Time): {self.h_sr_local}")
+        logger.debug("Sunset Time (Local Time): %s, Sunrise Time (Local Time): %s", self.h_ss_local, self.h_sr_local)
+
+        trace("SolarParameters", self)
+
+    def to_record(self):
+        return SolarParametersRecord.from_object(self)
 
     def solar_declination(self):
         delta_s = np.degrees(np.arcsin(np.sin(np.radians(23.45)) * np.sin(np.radians(360 * (284 + self.n) / 365))))
@@ -51,6 +67,7 @@ class SolarParameters:
         ET = 9.87 * np.sin(np.radians(2 * B)) - 7.53 * np.cos(np.radians(B)) - 1.5 * np.sin(np.radians(B))
         return ET
     
+    @timed("SolarParameters.solar_time")
     def solar_time(self):
         ST = self.process_solar_time(self.LST, self.ET + (self.l_st - self.longitude) * 4)
         return ST
@@ -71,8 +88,10 @@ class SolarParameters:
         zenith_angle = 90 - self.alpha
         return zenith_angle
     
+    @timed("SolarParameters.sunset_and_sunrise_times")
     def sunset_and_sunrise_times(self):
-        temp = np.degrees(np.arccos(-np.tan(np.radians(self.latitude)) * np.tan(np.radians(self.delta_s))))
+        # Clipped: 180 degrees on polar days, 0 on polar nights
+        temp = np.degrees(np.arccos(np.clip(-np.tan(np.radians(self.latitude)) * np.tan(np.radians(self.delta_s)), -1, 1)))
         h_ss = self.process_sunset_and_sunrise_times(temp)  # Sunset time in minutes from solar noon
         h_sr = self.process_sunset_and_sunrise_times(-temp)  # Sunrise time in minutes from solar noon
         solar_noon = datetime.strptime("12:00:00", "%H:%M:%S")
@@ -84,6 +103,7 @@ class SolarParameters:
         minutes = (temp / 15) * 60  # 15 degrees corresponds to 1 hour (60 minutes)
         return minutes
 
+    @timed("SolarParameters.convert_solar_to_local_time")
     def convert_solar_to_local_time(self, solar_time_str):
         # Convert Solar Time back to Local Time
         solar_time = datetime.strptime(solar_time_str, "%H:%M:%S")
@@ -95,10 +115,9 @@ class SolarParameters:
         return local_time.strftime("%H:%M:%S")
     
     def process_solar_time(self, lst_time_str, minutes_to_add):
+        # Naive datetime arithmetic, so the host timezone (and its DST) plays no part
         lst_time = datetime.strptime(lst_time_str, "%Y-%m-%d %H:%M:%S")
-        unix_timestamp = int(lst_time.timestamp())
-        new_timestamp = unix_timestamp + (minutes_to_add * 60)
-        new_time = datetime.fromtimestamp(new_timestamp)
+        new_time = lst_time + timedelta(minutes=float(minutes_to_add))
         new_time_str = new_time.strftime("%Y-%m-%d %H:%M:%S")
         return new_time_str
 
@@ -110,7 +129,162 @@ class SolarParameters:
         hours_diff = time_diff.total_seconds() / 3600  # Convert seconds to hours
         return hours_diff
 
-if __name__ == "__main__":
+    # Derived attributes for lazy=True; eager construction assigns them directly
+    delta_s = cached_property(solar_declination)
+    ET = cached_property(equation_of_time)
+    ST = cached_property(solar_time)
+    h_s = cached_property(lambda self: self.hour_angle() % 360)
+    alpha = cached_property(solar_attitude)
+    a_s = cached_property(solar_azimuth_angle)
+    z = cached_property(solar_zenith_angle)
+    _sunset_sunrise = cached_property(lambda self: self.sunset_and_sunrise_times())
+    h_ss = cached_property(lambda self: self._sunset_sunrise[0])
+    h_sr = cached_property(lambda self: self._sunset_sunrise[1])
+    h_ss_local = cached_property(lambda self: self.convert_solar_to_local_time(self.h_ss))
+    h_sr_local = cached_property(lambda self: self.convert_solar_to_local_time(self.h_sr))
+
+def solar_declination(n):
+    """
+    Vectorized solar declination in degrees for day of year n.
+    """
+    return np.degrees(np.arcsin(np.sin(np.radians(23.45)) * np.sin(np.radians(360 * (284 + np.asarray(n, dtype=float)) / 365))))
+
+def sunset_hour_angle(latitude, delta_s):
+    """
+    Vectorized sunset hour angle in degrees; the sunrise hour angle is its negative.
+
+    The argument of arccos is clipped, so polar days (midnight sun) give 180
+    degrees and polar nights 0.
+
+    :param latitude: Latitude in degrees (array-like)
+    :param delta_s: Solar declination in degrees (array-like)
+    """
+    return np.degrees(np.arccos(np.clip(-np.tan(np.radians(latitude)) * np.tan(np.radians(delta_s)), -1, 1)))
+
+def solar_altitude(latitude, delta_s, h_s):
+    """
+    Vectorized solar altitude in degrees.
+
+    :param latitude: Latitude in degrees (array-like)
+    :param delta_s: Solar declination in degrees (array-like)
+    :param h_s: Hour angle in degrees (array-like)
+    :return: Solar altitude in degrees, broadcast over the inputs
+    """
+    latitude_rad = np.radians(latitude)
+    delta_s_rad = np.radians(delta_s)
+    return np.degrees(np.arcsin(np.sin(latitude_rad) * np.sin(delta_s_rad) + np.cos(latitude_rad) * np.cos(delta_s_rad) * np.cos(np.radians(h_s))))
+
+def solar_azimuth(delta_s, h_s, alpha):
+    """
+    Vectorized solar azimuth in degrees (0 = south, positive towards west).
+
+    :param delta_s: Solar declination in degrees (array-like)
+    :param h_s: Hour angle in degrees (array-like)
+    :param alpha: Solar altitude in degrees (array-like)
+    :return: Solar azimuth in degrees, broadcast over the inputs
+    """
+    # Clip rounding overshoot near the zenith, where cos(alpha) -> 0
+    return np.degrees(np.arcsin(np.clip(np.cos(np.radians(delta_s)) * np.sin(np.radians(h_s)) / np.cos(np.radians(alpha)), -1, 1)))
+
+def unfolded_solar_azimuth(latitude, delta_s, h_s):
+    """
+    Vectorized solar azimuth over the full circle, (-180, 180] degrees (0 = south, positive towards west).
+
+    solar_azimuth follows the scalar model and folds azimuths into [-90, 90]
+    via arcsin, which is enough for incidence angles on south-facing surfaces
+    but not for looking up directions, e.g. a horizon profile, when the sun is
+    north of the east-west line.
+
+    :param latitude: Latitude in degrees (array-like)
+    :param delta_s: Solar declination in degrees (array-like)
+    :param h_s: Hour angle in degrees (array-like)
+    """
+    latitude_rad = np.radians(latitude)
+    h_s_rad = np.radians(h_s)
+    return np.degrees(np.arctan2(np.sin(h_s_rad), np.cos(h_s_rad) * np.sin(latitude_rad) - np.tan(np.radians(delta_s)) * np.cos(latitude_rad)))
+
+class SolarParametersBatch:
+    """
+    Array-in/array-out counterpart of SolarParameters.
+
+    All inputs broadcast against each other, so e.g. ``n`` shaped (365, 1) and
+    ``local_time`` shaped (1, 24) yield (365, 24) outputs, and an extra site axis
+    on ``latitude``/``longitude`` adds a site dimension. Solar time is kept as
+    fractional hours instead of strings, and sunrise/sunset are returned as hour
+    angles in degrees (h_sr = -h_ss).
+
+    The scalar class truncates solar time to whole seconds when it formats it, so
+    hour angles agree with it to within 1 s of solar time (0.0042°); the other
+    quantities agree to floating-point tolerance.
+
+    ``delta_s``, ``ET`` and ``h_ss`` may be passed in precomputed (e.g. from an
+    AstronomicalCache table) to skip the day-dependent trigonometry.
+
+    With ``utc_offset`` (hours, broadcast against ``local_time``) a datetime64
+    ``local_time`` is taken as UTC and shifted to local standard time first; the
+    day of year and hours then refer to the local standard date.
+    """
+    fields = SolarParametersRecord.__slots__
+
+    @timed("SolarParametersBatch")
+    def __init__(self, n, latitude, longitude, local_time, l_st, delta_s=None, ET=None, h_ss=None, utc_offset=None):
+        local_time = np.asarray(local_time)
+        if utc_offset is not None:
+            if not np.issubdtype(local_time.dtype, np.datetime64):
+                raise ValueError("utc_offset can only be used when local_time is datetime64")
+            local_time = to_local_standard_time(local_time, utc_offset)
+        if n is None:
+            if not np.issubdtype(local_time.dtype, np.datetime64):
+                raise ValueError("n can only be omitted when local_time is datetime64")
+            n = datetime64_to_day_of_year(local_time)
+
+        self.n = np.asarray(n, dtype=float)
+        self.latitude = np.asarray(latitude, dtype=float)
+        self.longitude = np.asarray(longitude, dtype=float)
+        self.local_hours = local_time_to_hours(local_time)
+        self.l_st = np.asarray(l_st, dtype=float)
+
+        # Calculate solar parameters
+        self.delta_s = self.solar_declination() if delta_s is None else np.asarray(delta_s, dtype=float)
+        self.ET = self.equation_of_time() if ET is None else np.asarray(ET, dtype=float)
+        self.ST = self.solar_time()
+        self.h_s = self.hour_angle() % 360
+        self.alpha = solar_altitude(self.latitude, self.delta_s, self.h_s)
+        self.a_s = solar_azimuth(self.delta_s, self.h_s, self.alpha)
+        self.z = 90 - self.alpha
+        if h_ss is None:
+            self.h_ss, self.h_sr = self.sunset_and_sunrise_hour_angles()
+        else:
+            self.h_ss = np.asarray(h_ss, dtype=float)
+            self.h_sr = -self.h_ss
+
+        trace("SolarParametersBatch", self)
+
+    def to_array(self, dtype=np.float64):
+        """
+        Outputs as one structured array (struct of arrays) of the broadcast shape.
+        """
+        return object_to_structured(self, self.fields, dtype)
+
+    def solar_declination(self):
+        return solar_declination(self.n)
+
+    def equation_of_time(self):
+        return equation_of_time(self.n)
+
+    def solar_time(self):
+        # Solar time in fractional hours (may fall outside [0, 24) around midnight)
+        return self.local_hours + (self.ET + (self.l_st - self.longitude) * 4) / 60
+
+    def hour_angle(self):
+        return 15 * (self.ST - 12)
+
+    def sunset_and_sunrise_hour_angles(self):
+        h_ss = sunset_hour_angle(self.latitude, self.delta_s)
+        return h_ss, -h_ss
+
+def main(argv=None):
+    argparse.ArgumentParser(description="Compute the sun position for an example site and time.").parse_args(argv)
     input_date = "Feb 1"
     n = days_from_jan(input_date)
     
@@ -1,18 +1,24 @@
+import argparse
+import logging
 import numpy as np
-from datetime import datetime, timedelta
-from solar_parameters import SolarParameters
+from functools import cached_property
+from .tracing import trace
+from .instrumentation import timed
+from .records import SolarRadiationRecord, object_to_structured
+from .solar_time import day_of_year as days_from_jan
+from .solar_parameters import SolarParameters, solar_declination, sunset_hour_angle
 
-def days_from_jan(input_date):
-    current_year = datetime.now().year
-    date = datetime.strptime(f"{input_date} {current_year}", "%b %d %Y")
-    jan_1 = datetime(year=current_year, month=1, day=1)
-    delta = date - jan_1
-    print(f"Days from January 1st to {input_date}: {delta.days + 1}")
-    return delta.days + 1  # Include Jan 1 as day 1
+logger = logging.getLogger(__name__)
 
 class SolarRadiation:
-    def __init__(self, n, alpha, tau_b, tau_d, beta, a_s, a_w, ground_type='ordinary', I0=1367):
-        print(f"Initializing SolarRadiation with parameters:\n n: {n}, alpha: {alpha}, tau_b: {tau_b}, tau_d: {tau_d}, beta: {beta}, a_s: {a_s}, a_w: {a_w}, ground_type: {ground_type}, I0: {I0}")
+    """
+    With lazy=True only the inputs and constants are set in __init__; rho, i,
+    the extraterrestrial factor, I and I_c are computed on first access and
+    memoized.
+    """
+    @timed("SolarRadiation")
+    def __init__(self, n, alpha, tau_b, tau_d, beta, a_s, a_w, ground_type='ordinary', I0=1367, lazy=False):
+        logger.debug("Initializing SolarRadiation with parameters:\n n: %s, alpha: %s, tau_b: %s, tau_d: %s, beta: %s, a_s: %s, a_w: %s, ground_type: %s, I0: %s", n, alpha, tau_b, tau_d, beta, a_s, a_w, ground_type, I0)
         
         self.n = n
         self.I0 = I0
@@ -23,19 +29,6 @@ class SolarRadiation:
         self.ground_type = ground_type
         self.a_s = a_s
         self.a_w = a_w
-        
-        # Set ground reflectivity (rho)
-        assert self.ground_type == 'ordinary' or self.ground_type == 'snow'
-        if self.ground_type == 'ordinary':
-            self.rho = 0.2
-        else:
-            self.rho = 0.8
-        
-        print(f"Ground reflectivity (rho): {self.rho}")
-
-        # Solar incidence angle (i)
-        self.i = np.degrees(np.arccos((np.cos(np.radians(self.alpha)) * np.cos(np.radians(self.a_s - self.a_w)) * np.sin(np.radians(self.beta)) + np.sin(np.radians(self.alpha)) * np.cos(np.radians(self.beta)))))
-        print(f"Solar incidence angle (i): {self.i}")
 
         # Parameters for extraterrestrial radiation calculation
         self.a0 = 1.00011
@@ -43,27 +36,56 @@ class SolarRadiation:
         self.a2 = 0.00128
         self.a3 = 0.000719
         self.a4 = 0.000077
-        x = 360 * (self.n - 1) / 365
-        print(f"x (angle for extraterrestrial radiation): {x}")
         
-        self.extra_terrestrial_radiation_factor = (self.a0 + self.a1 * np.cos(np.radians(x)) + self.a2 * np.sin(np.radians(x)) + self.a3 * np.cos(np.radians(2 * x)) + self.a4 * np.sin(np.radians(2 * x)))
-        print(f"Extra-terrestrial radiation factor: {self.extra_terrestrial_radiation_factor}")
+        assert self.ground_type == 'ordinary' or self.ground_type == 'snow'
+        if lazy:
+            trace("SolarRadiation", self)
+            return
+
+        # Set ground reflectivity (rho)
+        self.rho = self.ground_reflectivity()
+        logger.debug("Ground reflectivity (rho): %s", self.rho)
+
+        # Solar incidence angle (i)
+        self.i = self.solar_incidence_angle()
+        logger.debug("Solar incidence angle (i): %s", self.i)
+
+        self.extra_terrestrial_radiation_factor = self.calculate_extra_terrestrial_radiation_factor()
+        logger.debug("Extra-terrestrial radiation factor: %s", self.extra_terrestrial_radiation_factor)
 
         self.I = self.extra_terrestrial_radiation()
-        print(f"Extra-terrestrial solar radiation (I): {self.I}")
+        logger.debug("Extra-terrestrial solar radiation (I): %s", self.I)
 
         self.I_c = self.terrestrial_solar_radiation()
-        print(f"Terrestrial solar radiation (I_c): {self.I_c}")
+        logger.debug("Terrestrial solar radiation (I_c): %s", self.I_c)
+
+        trace("SolarRadiation", self)
+
+    def to_record(self):
+        return SolarRadiationRecord.from_object(self)
+
+    def ground_reflectivity(self):
+        if self.ground_type == 'ordinary':
+            return 0.2
+        return 0.8
+
+    def solar_incidence_angle(self):
+        return np.degrees(np.arccos((np.cos(np.radians(self.alpha)) * np.cos(np.radians(self.a_s - self.a_w)) * np.sin(np.radians(self.beta)) + np.sin(np.radians(self.alpha)) * np.cos(np.radians(self.beta)))))
+
+    def calculate_extra_terrestrial_radiation_factor(self):
+        x = 360 * (self.n - 1) / 365
+        logger.debug("x (angle for extraterrestrial radiation): %s", x)
+        return (self.a0 + self.a1 * np.cos(np.radians(x)) + self.a2 * np.sin(np.radians(x)) + self.a3 * np.cos(np.radians(2 * x)) + self.a4 * np.sin(np.radians(2 * x)))
 
     def extra_terrestrial_radiation(self):
         I = self.I0 * self.extra_terrestrial_radiation_factor
-        print(f"Calculating extra-terrestrial radiation: {I}")
+        logger.debug("Calculating extra-terrestrial radiation: %s", I)
         return I
     
     def terrestrial_solar_radiation(self):
-        print("Calculating terrestrial solar radiation...")
+        logger.debug("Calculating terrestrial solar radiation...")
         m = 1 / (np.sin(np.radians(self.alpha)) + np.power((6.07995 + self.alpha), (-1.6364)))
-        print(f"Air mass (m): {m}")
+        logger.debug("Air mass (m): %s", m)
         
         b0 = 1.219
         b1 = -0.043
@@ -76,32 +98,237 @@ class SolarRadiation:
         
         b = b0 + b1 * self.tau_b + b2 * self.tau_d + b3 * self.tau_b * self.tau_d
         d = d0 + d1 * self.tau_b + d2 * self.tau_d + d3 * self.tau_b * self.tau_d
-        print(f"b: {b}, d: {d}")
+        logger.debug("b: %s, d: %s", b, d)
         
         I_b_N = self.I * np.exp(-self.tau_b * np.power(m, b))
-        print(f"Beam normal radiation (I_b_N): {I_b_N}")
+        logger.debug("Beam normal radiation (I_b_N): %s", I_b_N)
         
         I_d_h = self.I * np.exp(-self.tau_d * np.power(m, d))
-        print(f"Diffuse horizontal radiation (I_d_h): {I_d_h}")
+        logger.debug("Diffuse horizontal radiation (I_d_h): %s", I_d_h)
         
         I_h = I_b_N * np.sin(np.radians(self.alpha)) + I_d_h
-        print(f"Total radiation (I_h): {I_h}")
+        logger.debug("Total radiation (I_h): %s", I_h)
         
         I_r_c = I_h * self.rho * (1 - np.cos(np.radians(self.beta))) / 2
-        print(f"Reflected radiation (I_r_c): {I_r_c}")
+        logger.debug("Reflected radiation (I_r_c): %s", I_r_c)
         
         I_d_c = I_d_h * (1 + np.cos(np.radians(self.beta))) / 2
-        print(f"Diffuse component with ground (I_d_c): {I_d_c}")
+        logger.debug("Diffuse component with ground (I_d_c): %s", I_d_c)
         
         I_b_c = I_b_N * (np.cos(np.radians(self.alpha)) * np.cos(np.radians(self.a_s - self.a_w)) * np.sin(np.radians(self.beta)) + np.sin(np.radians(self.alpha)) * np.cos(np.radians(self.beta)))
-        print(f"Beam component with ground (I_b_c): {I_b_c}")
+        logger.debug("Beam component with ground (I_b_c): %s", I_b_c)
 
         I_c = I_b_c + I_d_c + I_r_c
-        print(f"Total terrestrial solar radiation (I_c): {I_c}")
+        logger.debug("Total terrestrial solar radiation (I_c): %s", I_c)
 
         return I_c
 
-if __name__ == "__main__":
+    # Derived attributes for lazy=True; eager construction assigns them directly
+    rho = cached_property(ground_reflectivity)
+    i = cached_property(solar_incidence_angle)
+    extra_terrestrial_radiation_factor = cached_property(calculate_extra_terrestrial_radiation_factor)
+    I = cached_property(extra_terrestrial_radiation)
+    I_c = cached_property(terrestrial_solar_radiation)
+
+GROUND_REFLECTIVITY = {'ordinary': 0.2, 'snow': 0.8}
+
+def extra_terrestrial_radiation_factor(n):
+    """
+    Vectorized eccentricity correction factor for day of year n.
+
+    :param n: Day of year (array-like)
+    :return: Extraterrestrial radiation factor, same shape as n
+    """
+    x = np.radians(360 * (np.asarray(n, dtype=float) - 1) / 365)
+    return 1.00011 + 0.034221 * np.cos(x) + 0.00128 * np.sin(x) + 0.000719 * np.cos(2 * x) + 0.000077 * np.sin(2 * x)
+
+def clear_sky_exponents(tau_b, tau_d):
+    """
+    Air-mass exponents b and d of the clear-sky model.
+
+    They only depend on the site optical depths, so callers should evaluate this
+    once per site and broadcast the result over time and orientation.
+
+    :param tau_b: Beam optical depth (array-like)
+    :param tau_d: Diffuse optical depth (array-like)
+    :return: Tuple (b, d)
+    """
+    tau_b = np.asarray(tau_b, dtype=float)
+    tau_d = np.asarray(tau_d, dtype=float)
+    b = 1.219 - 0.043 * tau_b - 0.151 * tau_d - 0.204 * tau_b * tau_d
+    d = 0.202 + 0.852 * tau_b - 0.007 * tau_d - 0.357 * tau_b * tau_d
+    return b, d
+
+def air_mass(alpha):
+    """
+    Vectorized relative air mass for solar altitude alpha in degrees.
+    """
+    alpha = np.asarray(alpha, dtype=float)
+    return 1 / (np.sin(np.radians(alpha)) + np.power((6.07995 + alpha), (-1.6364)))
+
+def cos_incidence_angle(alpha, a_s, beta, a_w):
+    """
+    Vectorized cosine of the solar incidence angle on a tilted surface.
+
+    :param alpha: Solar altitude in degrees
+    :param a_s: Solar azimuth in degrees
+    :param beta: Surface tilt in degrees
+    :param a_w: Surface azimuth in degrees
+    :return: cos(i), broadcast over the inputs
+    """
+    alpha_rad = np.radians(alpha)
+    beta_rad = np.radians(beta)
+    return np.cos(alpha_rad) * np.cos(np.radians(np.subtract(a_s, a_w))) * np.sin(beta_rad) + np.sin(alpha_rad) * np.cos(beta_rad)
+
+def daily_extraterrestrial_radiation(latitude, n, I0=1367):
+    """
+    Vectorized daily extraterrestrial radiation on a horizontal surface.
+
+    :param latitude: Latitude in degrees
+    :param n: Day of year
+    :param I0: Solar constant in W/m^2
+    :return: Daily total in Wh/m^2, broadcast over the inputs
+    """
+    n = np.asarray(n, dtype=float)
+    delta_s = solar_declination(n)
+    latitude_rad = np.radians(latitude)
+    delta_s_rad = np.radians(delta_s)
+    # Clipped: 0 on polar nights, 180 degrees on polar days
+    h_ss_rad = np.radians(sunset_hour_angle(latitude, delta_s))
+    return 24 / np.pi * I0 * extra_terrestrial_radiation_factor(n) * (np.cos(latitude_rad) * np.cos(delta_s_rad) * np.sin(h_ss_rad) + h_ss_rad * np.sin(latitude_rad) * np.sin(delta_s_rad))
+
+class SolarRadiationBatch:
+    """
+    Broadcasting counterpart of SolarRadiation.
+
+    Inputs are laid out as (time, site, orientation): ``n``/``alpha``/``a_s`` vary
+    along time (and site), ``tau_b``/``tau_d`` along site, ``beta``/``a_w`` along
+    orientation, e.g. shapes (T, S, 1), (1, S, 1) and (1, 1, K). The exponents
+    b/d are computed once on the (1, S, 1) site arrays and the air-mass terms
+    once on the (T, S, 1) sun-position arrays before anything is broadcast to
+    the full (T, S, K) grid.
+
+    ``beam_shading`` and ``diffuse_shading`` (e.g. from SiteShading.factors)
+    multiply I_b_c and I_d_c.
+
+    With ``fast=True`` the per-sample terms (air mass, the fused
+    ``exp(-tau_b * m ** b)``/``exp(-tau_d * m ** d)`` transmittances and the
+    incidence-angle trigonometry) are evaluated in single precision, in place
+    into outputs allocated once, and the outputs are float32. While the sun is
+    up (alpha > 0) every irradiance output is within 0.1% of the exact value
+    plus 0.01 W/m^2, and ``i`` within 0.05 degrees; night-time values are not
+    covered by the bound. This trades accuracy for throughput in screening runs;
+    the default path is exact.
+    """
+    fields = SolarRadiationRecord.__slots__ + ("b", "d", "I_b_N", "I_d_h", "I_b_c", "I_d_c", "I_r_c")
+
+    @timed("SolarRadiationBatch")
+    def __init__(self, n, alpha, tau_b, tau_d, beta, a_s, a_w, ground_type='ordinary', I0=1367, beam_shading=None, diffuse_shading=None, fast=False):
+        assert ground_type in GROUND_REFLECTIVITY
+        self.n = np.asarray(n, dtype=float)
+        self.I0 = I0
+        self.alpha = np.asarray(alpha, dtype=float)
+        self.tau_b = np.asarray(tau_b, dtype=float)
+        self.tau_d = np.asarray(tau_d, dtype=float)
+        self.beta = np.asarray(beta, dtype=float)
+        self.a_s = np.asarray(a_s, dtype=float)
+        self.a_w = np.asarray(a_w, dtype=float)
+        self.ground_type = ground_type
+        self.rho = GROUND_REFLECTIVITY[ground_type]
+        self.fast = fast
+
+        self.extra_terrestrial_radiation_factor = extra_terrestrial_radiation_factor(self.n)
+        self.I = self.I0 * self.extra_terrestrial_radiation_factor
+
+        # Per-site exponents, before broadcasting over time and orientations
+        self.b, self.d = clear_sky_exponents(self.tau_b, self.tau_d)
+        if fast:
+            self._fast_components()
+        else:
+            self._exact_components()
+
+        if beam_shading is not None:
+            self.I_b_c = np.multiply(self.I_b_c, beam_shading, dtype=self.I_b_c.dtype)
+        if diffuse_shading is not None:
+            self.I_d_c = np.multiply(self.I_d_c, diffuse_shading, dtype=self.I_d_c.dtype)
+        self.I_c = np.add(self.I_b_c, self.I_d_c)
+        self.I_c += self.I_r_c
+
+        trace("SolarRadiationBatch", self)
+
+    def _exact_components(self):
+        # Solar incidence angle (i)
+        cos_i = cos_incidence_angle(self.alpha, self.a_s, self.beta, self.a_w)
+        self.i = np.degrees(np.arccos(cos_i))
+
+        # Per-sample air mass, before broadcasting to orientations
+        m = air_mass(self.alpha)
+        self.I_b_N = self.I * np.exp(-self.tau_b * np.power(m, self.b))
+        self.I_d_h = self.I * np.exp(-self.tau_d * np.power(m, self.d))
+        I_h = self.I_b_N * np.sin(np.radians(self.alpha)) + self.I_d_h
+
+        cos_beta = np.cos(np.radians(self.beta))
+        self.I_r_c = I_h * self.rho * (1 - cos_beta) / 2
+        self.I_d_c = self.I_d_h * (1 + cos_beta) / 2
+        self.I_b_c = self.I_b_N * cos_i
+
+    def _fast_components(self):
+        # float64 transcendentals are scalar loops in NumPy, float32 ones are
+        # SIMD; all per-sample work runs in float32 and reuses its buffers.
+        f4 = np.float32
+        radians = f4(np.pi / 180)
+        sample = np.broadcast_shapes(self.n.shape, self.alpha.shape, self.a_s.shape, self.tau_b.shape)
+        full = np.broadcast_shapes(sample, self.beta.shape, self.a_w.shape)
+        alpha = np.array(self.alpha, dtype=f4)
+        alpha_rad = np.multiply(alpha, radians, out=np.empty_like(alpha))
+        sin_alpha = np.sin(alpha_rad)
+        cos_alpha = np.cos(alpha_rad, out=alpha_rad)
+
+        # Air mass; the power base is kept positive, since NaN and overflow take a
+        # slow path in np.power. This only changes altitudes below -6 degrees.
+        m = np.add(alpha, f4(6.07995), out=alpha)
+        np.maximum(m, f4(1e-3), out=m)
+        np.power(m, f4(-1.6364), out=m)
+        m += sin_alpha
+        np.reciprocal(m, out=m)
+        I = self.I.astype(f4)
+        self.I_b_N = np.empty(sample, f4)
+        self.I_d_h = np.empty(sample, f4)
+        for out, tau, exponent in ((self.I_b_N, self.tau_b, self.b), (self.I_d_h, self.tau_d, self.d)):
+            np.power(m, exponent.astype(f4), out=out)
+            out *= -tau.astype(f4)
+            np.exp(out, out=out)
+            out *= I
+        I_h = np.multiply(self.I_b_N, sin_alpha)
+        I_h += self.I_d_h
+
+        # cos(i) = cos(alpha) cos(a_s - a_w) sin(beta) + sin(alpha) cos(beta), with
+        # the difference expanded so no trigonometry runs on the full grid
+        a_s = np.array(self.a_s, dtype=f4)
+        a_s *= radians
+        a_w = np.radians(self.a_w)
+        beta = np.radians(self.beta)
+        sin_beta, cos_beta = np.sin(beta), np.cos(beta)
+        cos_i = np.multiply(np.cos(a_s) * cos_alpha, (sin_beta * np.cos(a_w)).astype(f4), out=np.empty(full, f4))
+        term = np.multiply(np.sin(a_s) * cos_alpha, (sin_beta * np.sin(a_w)).astype(f4), out=np.empty(full, f4))
+        cos_i += term
+        cos_i += np.multiply(sin_alpha, cos_beta.astype(f4), out=term)
+        self.i = np.clip(cos_i, -1, 1, out=term)
+        np.arccos(self.i, out=self.i)
+        self.i *= f4(180 / np.pi)
+
+        self.I_r_c = np.multiply(I_h, (self.rho * (1 - cos_beta) / 2).astype(f4), out=np.empty(full, f4))
+        self.I_d_c = np.multiply(self.I_d_h, ((1 + cos_beta) / 2).astype(f4), out=np.empty(full, f4))
+        self.I_b_c = np.multiply(self.I_b_N, cos_i, out=cos_i)
+
+    def to_array(self, dtype=np.float64):
+        """
+        Outputs as one structured array (struct of arrays) of the broadcast shape.
+        """
+        return object_to_structured(self, self.fields, dtype)
+
+def main(argv=None):
+    argparse.ArgumentParser(description="Print the clear-sky radiation on a tilted surface for an example site and time.").parse_args(argv)
     input_date = "Feb 1"
     n = days_from_jan(input_date)
     
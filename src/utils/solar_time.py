@@ -0,0 +1,82 @@
+# Calendar and clock conversions shared by the models. Nothing here depends on
+# the host clock or timezone: days of year come from an explicit year (or a
+# fixed reference year) and UTC offsets are applied in datetime64 arithmetic.
+from datetime import datetime
+import numpy as np
+
+# Year used for "Mon DD" dates when none is given: a fixed non-leap year, so
+# results do not depend on when the code runs
+REFERENCE_YEAR = 2001
+
+def day_of_year(input_date, year=None):
+    """
+    Day of year (Jan 1 = 1) of a "Mon DD" date string such as "Mar 21".
+
+    :param year: Calendar year, which decides whether Feb 29 exists and shifts
+        later dates; None for the 365-day reference year
+    """
+    year = REFERENCE_YEAR if year is None else year
+    return datetime.strptime(f"{input_date} {year}", "%b %d %Y").timetuple().tm_yday
+
+def to_local_standard_time(time, utc_offset=None):
+    """
+    Shift UTC datetime64 values to local standard time.
+
+    :param time: datetime64 array, in UTC when utc_offset is given, else already local standard time
+    :param utc_offset: Offset of local standard time from UTC in hours (e.g. -8 for PST), broadcast against time
+    :return: datetime64[s] array of local standard time
+    """
+    time = np.asarray(time).astype("datetime64[s]")
+    if utc_offset is None:
+        return time
+    return time + np.round(np.asarray(utc_offset, dtype=float) * 3600).astype("timedelta64[s]")
+
+def datetime64_to_day_of_year(local_time):
+    """
+    Day of year (Jan 1 = 1) of a datetime64 array, using each value's own year.
+
+    :param local_time: datetime64 array
+    :return: Integer day-of-year array
+    """
+    days = np.asarray(local_time).astype("datetime64[D]")
+    return (days - days.astype("datetime64[Y]").astype("datetime64[D]")).astype(np.int64) + 1
+
+def local_time_to_hours(local_time):
+    """
+    Convert local standard time to fractional hours after midnight.
+
+    :param local_time: Numeric hours (e.g. 13.5 for 13:30) or a datetime64 array
+    :return: Fractional hours as a float array
+    """
+    local_time = np.asarray(local_time)
+    if np.issubdtype(local_time.dtype, np.datetime64):
+        seconds = local_time.astype("datetime64[s]")
+        return (seconds - seconds.astype("datetime64[D]")).astype(np.int64) / 3600
+    return local_time.astype(float)
+
+def equation_of_time(n):
+    """
+    Vectorized equation of time in minutes for day of year n.
+    """
+    B = np.radians(360 * (np.asarray(n, dtype=float) - 81) / 364)
+    return 9.87 * np.sin(2 * B) - 7.53 * np.cos(B) - 1.5 * np.sin(B)
+
+def solar_time(time, longitude, l_st, utc_offset=None):
+    """
+    Day of year and solar time of datetime64 timestamps in one vectorized pass.
+
+    Uses the same longitude convention as SolarParameters:
+    ST = LST + ET + 4 * (l_st - longitude) minutes.
+
+    :param time: datetime64 array; UTC when utc_offset is given, else local standard time
+    :param longitude: Site longitude in degrees, broadcast against time
+    :param l_st: Local standard meridian in degrees, broadcast against time
+    :param utc_offset: Offset of local standard time from UTC in hours
+    :return: Tuple (n, ST) of the day of year of the local standard date and
+        the solar time in fractional hours after its midnight (may fall
+        outside [0, 24) around midnight)
+    """
+    local_time = to_local_standard_time(time, utc_offset)
+    n = datetime64_to_day_of_year(local_time)
+    ST = local_time_to_hours(local_time) + (equation_of_time(n) + (np.asarray(l_st, dtype=float) - np.asarray(longitude, dtype=float)) * 4) / 60
+    return n, ST
@@ -0,0 +1,78 @@
+import json
+import random
+import threading
+from collections import deque
+import numpy as np
+
+class TraceRecorder:
+    """
+    Captures the intermediate values of a sampled subset of model calls.
+
+    Each sampled call is stored as ``{"model": name, "call": n, "values": {...}}``
+    where values are the instance attributes at the end of ``__init__``. At most
+    ``max_records`` records are kept; older ones are dropped first.
+    """
+    def __init__(self, sample_rate=0.01, max_records=10000, seed=None):
+        self.sample_rate = sample_rate
+        self.records = deque(maxlen=max_records)
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def record(self, name, obj):
+        with self._lock:
+            self.calls += 1
+            if self._random.random() >= self.sample_rate:
+                return
+            values = {key: value for key, value in vars(obj).items() if not key.startswith('_')}
+            self.records.append({"model": name, "call": self.calls, "values": values})
+
+    def to_json(self):
+        return [{"model": record["model"], "call": record["call"], "values": {key: _jsonable(value) for key, value in record["values"].items()}}
+                for record in self.records]
+
+    def dump(self, path):
+        """
+        Write the records as JSON lines.
+        """
+        with open(path, 'w') as f:
+            for record in self.to_json():
+                f.write(json.dumps(record) + "\n")
+
+def _jsonable(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (int, float, str, bool)) or value is None:
+        return value
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    return repr(value)
+
+_recorder = None
+
+def enable_trace(sample_rate=0.01, max_records=10000, seed=None):
+    """
+    Start recording a sampled subset of model calls and return the recorder.
+    """
+    global _recorder
+    _recorder = TraceRecorder(sample_rate, max_records, seed)
+    return _recorder
+
+def disable_trace():
+    """
+    Stop recording and return the recorder that was active, if any.
+    """
+    global _recorder
+    recorder, _recorder = _recorder, None
+    return recorder
+
+def trace(name, obj):
+    """
+    Offer a finished model object to the active recorder; a no-op when tracing is off.
+    """
+    if _recorder is not None:
+        _recorder.record(name, obj)
@@ -0,0 +1,101 @@
+import numpy as np
+from .solar_radiation import cos_incidence_angle
+from .tracing import trace
+from .instrumentation import timed
+
+class SingleAxisTracker:
+    """
+    Surface orientation of a horizontal single-axis tracker over a sun-position series.
+
+    The rotation angle is positive when the surface is turned towards
+    ``axis_azimuth + 90`` (west for a north-south axis). The ideal angle points
+    the surface normal at the sun's projection onto the plane perpendicular to
+    the axis. With ``backtrack`` the rows are turned back towards horizontal
+    until neighbouring rows no longer shade each other. Backtracking uses the
+    ground coverage ratio ``gcr`` (collector width / row pitch) and flat
+    terrain. The rotation is then clipped to +-``max_angle``. Rows are stowed
+    flat while the sun is below the horizon.
+
+    ``beta``, ``a_w``, ``cos_i`` and ``i`` have the shape of the broadcast
+    inputs and can be passed wherever a fixed tilt and azimuth are accepted.
+    ``a_s`` must cover the full circle (unfolded_solar_azimuth): the folded
+    azimuths of solar_azimuth are only exact for a north-south axis, which
+    depends on sin(a_s) alone, and turn other axes the wrong way while the sun
+    is north of the east-west line.
+
+    :param alpha: Solar altitude in degrees (array-like)
+    :param a_s: Full-circle solar azimuth in degrees, 0 = south, positive towards west (array-like)
+    :param axis_azimuth: Azimuth the axis points to, in the same convention (0 = north-south axis)
+    :param max_angle: Mechanical rotation limit in degrees
+    :param gcr: Ground coverage ratio
+    """
+    @timed("SingleAxisTracker")
+    def __init__(self, alpha, a_s, axis_azimuth=0, max_angle=60, backtrack=True, gcr=0.35):
+        self.alpha = np.asarray(alpha, dtype=float)
+        self.a_s = np.asarray(a_s, dtype=float)
+        self.axis_azimuth = axis_azimuth
+        self.max_angle = max_angle
+        self.backtrack = backtrack
+        self.gcr = gcr
+
+        alpha_rad = np.radians(self.alpha)
+        self.ideal_angle = np.degrees(np.arctan2(np.cos(alpha_rad) * np.sin(np.radians(self.a_s - axis_azimuth)), np.sin(alpha_rad)))
+        rotation = self.ideal_angle
+        if backtrack:
+            # Row-to-row shading starts once cos(ideal angle) < gcr; turn back by arccos(cos / gcr)
+            shade = np.cos(np.radians(rotation)) / gcr
+            rotation = np.where(shade < 1, rotation - np.sign(rotation) * np.degrees(np.arccos(np.minimum(shade, 1))), rotation)
+        rotation = np.clip(rotation, -max_angle, max_angle)
+        self.rotation = np.where(self.alpha > 0, rotation, 0)
+
+        self.beta = np.abs(self.rotation)
+        self.a_w = np.where(self.rotation >= 0, axis_azimuth + 90, axis_azimuth - 90)
+        self.cos_i = cos_incidence_angle(self.alpha, self.a_s, self.beta, self.a_w)
+        self.i = np.degrees(np.arccos(np.clip(self.cos_i, -1, 1)))
+
+        trace("SingleAxisTracker", self)
+
+class DualAxisTracker:
+    """
+    Surface orientation of a dual-axis tracker: the surface faces the sun.
+
+    The tilt is the solar zenith angle, clipped to ``max_tilt``, and the surface
+    azimuth is the solar azimuth. The surface is stowed flat while the sun is
+    below the horizon.
+
+    :param alpha: Solar altitude in degrees (array-like)
+    :param a_s: Full-circle solar azimuth in degrees, e.g. from unfolded_solar_azimuth (array-like)
+    :param max_tilt: Mechanical tilt limit in degrees
+    """
+    @timed("DualAxisTracker")
+    def __init__(self, alpha, a_s, max_tilt=90):
+        self.alpha = np.asarray(alpha, dtype=float)
+        self.a_s = np.asarray(a_s, dtype=float)
+        self.max_tilt = max_tilt
+
+        up = self.alpha > 0
+        self.beta = np.where(up, np.clip(90 - self.alpha, 0, max_tilt), 0)
+        self.a_w = np.where(up, self.a_s, 0)
+        self.cos_i = cos_incidence_angle(self.alpha, self.a_s, self.beta, self.a_w)
+        self.i = np.degrees(np.arccos(np.clip(self.cos_i, -1, 1)))
+
+        trace("DualAxisTracker", self)
+
+TRACKERS = {
+    "single_axis": SingleAxisTracker,
+    "dual_axis": DualAxisTracker,
+}
+
+def get_tracker(tracker):
+    """
+    Resolve a tracker name from TRACKERS, or pass a callable ``(alpha, a_s) -> orientation`` through.
+
+    Trackers receive the full-circle solar azimuth (unfolded_solar_azimuth).
+
+    Use functools.partial to set options, e.g. ``partial(SingleAxisTracker, gcr=0.4)``.
+    """
+    if callable(tracker):
+        return tracker
+    if tracker not in TRACKERS:
+        raise ValueError(f"Unsupported tracker: {tracker}")
+    return TRACKERS[tracker]
@@ -0,0 +1,184 @@
+import csv
+import logging
+import numpy as np
+from .solar_estimation import AnnualSimulation
+from .lj import monthly_lj
+from .solar_time import to_local_standard_time
+
+logger = logging.getLogger(__name__)
+
+# Column names of a plain long-format file: one row per site and hour
+DEFAULT_COLUMNS = {"site": "site_id", "timestamp": "timestamp", "ghi": "ghi", "dhi": "dhi"}
+
+# Column names of an NSRDB TMY3 file (the site id comes from the metadata line)
+TMY3_COLUMNS = {"date": "Date (MM/DD/YYYY)", "time": "Time (HH:MM)", "ghi": "GHI (W/m^2)", "dhi": "DHI (W/m^2)"}
+
+def _tmy3_site_id(path):
+    with open(path, newline='') as f:
+        return next(csv.reader(f))[0]
+
+def read_irradiance_chunks(path, chunk_size=8760, columns=None, site_id=None, utc_offset=None):
+    """
+    Stream an hourly irradiance CSV as fixed-size NumPy chunks.
+
+    Only one chunk is held in memory at a time. Files with ``date``/``time``
+    columns are read as TMY3 (first line is site metadata, times are hour-ending
+    "HH:MM" with "24:00" rolling over to the next day); otherwise a ``timestamp``
+    column of ISO strings and a ``site`` column are expected.
+
+    :param path: CSV file path
+    :param chunk_size: Rows per chunk (the last chunk may be shorter)
+    :param columns: Mapping of logical names to CSV headers, e.g. DEFAULT_COLUMNS or TMY3_COLUMNS
+    :param site_id: Site id for single-site files; TMY3 files default to their metadata id
+    :param utc_offset: If set, the file's times are UTC and are shifted by this many hours to local standard time
+    :return: Generator of dicts with "site" (str array), "timestamp" (datetime64[m]), "ghi" and "dhi" (W/m^2)
+    """
+    columns = DEFAULT_COLUMNS if columns is None else columns
+    tmy3 = "date" in columns
+    if tmy3 and site_id is None:
+        site_id = _tmy3_site_id(path)
+
+    with open(path, newline='') as f:
+        if tmy3:
+            next(f)
+        reader = csv.DictReader(f)
+        sites, stamps, minutes = [], [], np.zeros(chunk_size, dtype=np.int64)
+        ghi = np.empty(chunk_size)
+        dhi = np.empty(chunk_size)
+        count = 0
+        for row in reader:
+            sites.append(site_id if site_id is not None else row[columns["site"]])
+            if tmy3:
+                month, day, year = row[columns["date"]].split('/')
+                hours, mins = row[columns["time"]].split(':')
+                stamps.append(f"{year}-{month}-{day}")
+                minutes[count] = int(hours) * 60 + int(mins)
+            else:
+                stamps.append(row[columns["timestamp"]])
+            ghi[count] = float(row[columns["ghi"]])
+            dhi[count] = float(row[columns["dhi"]])
+            count += 1
+            if count == chunk_size:
+                yield _make_chunk(sites, stamps, minutes, ghi, dhi, count, tmy3, utc_offset)
+                sites, stamps = [], []
+                count = 0
+        if count:
+            yield _make_chunk(sites, stamps, minutes, ghi, dhi, count, tmy3, utc_offset)
+
+def _make_chunk(sites, stamps, minutes, ghi, dhi, count, tmy3, utc_offset=None):
+    if tmy3:
+        timestamp = np.array(stamps, dtype="datetime64[D]").astype("datetime64[m]") + minutes[:count].astype("timedelta64[m]")
+    else:
+        timestamp = np.array(stamps, dtype="datetime64[m]")
+    if utc_offset is not None:
+        timestamp = to_local_standard_time(timestamp, utc_offset).astype("datetime64[m]")
+    return {"site": np.array(sites), "timestamp": timestamp, "ghi": ghi[:count].copy(), "dhi": dhi[:count].copy()}
+
+class MonthlyIrradianceAccumulator:
+    """
+    Incremental monthly H_bar_h/H_bar_d aggregates per (site, year).
+
+    Each chunk is reduced with one bincount, so memory grows with the number of
+    site-years, not with the number of rows. Values are average daily totals in
+    Wh/m^2 for hourly W/m^2 input; a month's day count is derived from its
+    number of samples, so gaps are treated as average hours. Timestamps mark the
+    end of each interval, as in TMY files.
+
+    With ``pool_years=True`` every site has one entry under the year None. TMY
+    files need this: each of their months comes from a different source year.
+    """
+    def __init__(self, interval_hours=1.0, pool_years=False):
+        self.interval_hours = interval_hours
+        self.pool_years = pool_years
+        self.totals = {}  # (site, year) -> (3, 12) array of GHI sum, DHI sum, sample count
+
+    def update(self, chunk):
+        # Label hour-ending samples by the start of their interval so "24:00" stays in its own day
+        start = chunk["timestamp"] - np.timedelta64(int(round(self.interval_hours * 60)), 'm')
+        months = start.astype("datetime64[M]").astype(np.int64)  # months since 1970, negative before
+        if months.size == 0:
+            return
+        # Combine site and month into one non-negative key: month offsets from the chunk's first month
+        first_month = months.min()
+        span = int(months.max() - first_month) + 1
+        site_names, site_codes = np.unique(chunk["site"], return_inverse=True)
+        keys, inverse = np.unique(site_codes.astype(np.int64) * span + (months - first_month), return_inverse=True)
+        sums = np.stack([np.bincount(inverse, weights=chunk["ghi"], minlength=keys.size),
+                         np.bincount(inverse, weights=chunk["dhi"], minlength=keys.size),
+                         np.bincount(inverse, minlength=keys.size)])
+        for k, key in enumerate(keys):
+            site, month = str(site_names[key // span]), int(first_month + key % span)
+            year, month_of_year = 1970 + month // 12, month % 12
+            if self.pool_years:
+                year = None
+            totals = self.totals.setdefault((site, year), np.zeros((3, 12)))
+            totals[:, month_of_year] += sums[:, k]
+
+    def monthly_means(self, site, year=None):
+        """
+        Average daily horizontal totals for one site.
+
+        :param year: Calendar year, or None to pool every year of the site (the only entry with pool_years)
+        :return: Tuple (H_bar_h, H_bar_d), each 12 values (NaN for months without data)
+        """
+        totals = sum(value for (name, y), value in self.totals.items() if name == site and (year is None or y == year))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            days = totals[2] * self.interval_hours / 24
+            return totals[0] * self.interval_hours / days, totals[1] * self.interval_hours / days
+
+    def pop_site(self, site):
+        """
+        Remove and return {year: (H_bar_h, H_bar_d)} for a completed site.
+        """
+        years = sorted(y for name, y in self.totals if name == site)
+        result = {year: self.monthly_means(site, year) for year in years}
+        for year in years:
+            del self.totals[(site, year)]
+        return result
+
+def stream_site_months(path, chunk_size=8760, columns=None, site_id=None, interval_hours=1.0, utc_offset=None):
+    """
+    Yield (site, year, H_bar_h, H_bar_d) as soon as each site's rows are complete.
+
+    Assumes rows are grouped by site, so only the sites of the current chunk
+    are held in the accumulator. TMY3 files (``date`` in ``columns``) give one
+    typical year per site, yielded with year None.
+    """
+    tmy3 = columns is not None and "date" in columns
+    accumulator = MonthlyIrradianceAccumulator(interval_hours, pool_years=tmy3)
+    current = None
+    for chunk in read_irradiance_chunks(path, chunk_size, columns, site_id, utc_offset):
+        accumulator.update(chunk)
+        last = str(chunk["site"][-1])
+        # Every site seen before the last one of this chunk is finished
+        finished = [str(site) for site in dict.fromkeys(chunk["site"]) if site != last]
+        if current is not None and current != last and current not in finished:
+            finished.insert(0, current)
+        for site in finished:
+            for year, (H_bar_h, H_bar_d) in accumulator.pop_site(site).items():
+                yield site, year, H_bar_h, H_bar_d
+        current = last
+    if current is not None:
+        for year, (H_bar_h, H_bar_d) in accumulator.pop_site(current).items():
+            yield current, year, H_bar_h, H_bar_d
+
+def estimate_from_weather_file(path, sites, model_name="cpr", chunk_size=8760, columns=None, site_id=None, ground_type='ordinary', utc_offset=None):
+    """
+    Run AnnualSimulation and monthly LJ for every site-year of a weather file.
+
+    Site-years with months that have no data (e.g. a partial first or last
+    year) are skipped with a warning. The year is None for TMY3 files.
+
+    :param sites: Mapping of site id to a dict with latitude, longitude, beta and a_w
+    :return: Generator of (site, year, AnnualSimulation, LJ)
+    """
+    for site, year, H_bar_h, H_bar_d in stream_site_months(path, chunk_size, columns, site_id, utc_offset=utc_offset):
+        missing = np.flatnonzero(np.isnan(H_bar_h) | np.isnan(H_bar_d)) + 1
+        if missing.size:
+            logger.warning("Skipping site %s, year %s: no data for months %s", site, year, missing.tolist())
+            continue
+        geometry = sites[site]
+        simulation = AnnualSimulation(model_name, geometry["latitude"], geometry["longitude"], geometry["beta"], geometry["a_w"],
+                                      H_bar_h, H_bar_d, l_st=geometry.get("l_st"), ground_type=ground_type)
+        lj_model = monthly_lj(geometry["latitude"], geometry["beta"], H_bar_h, ground_type=ground_type)
+        yield site, year, simulation, lj_model
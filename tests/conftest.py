@@ -0,0 +1,34 @@
+import os
+import sys
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from utils.solar_parameters import SolarParametersBatch
+
+class SiteYear:
+    """
+    One reference site over a 365-day year of hourly timestamps, shared by the tests.
+    """
+    H_bar_h = np.array([3.2, 4.0, 5.24, 6.5, 7.3, 7.8, 7.2, 6.7, 5.9, 4.7, 3.6, 3.0]) * 1e3
+    H_bar_d = H_bar_h * 0.25
+    latitude, longitude, l_st = 36.08, 115.16, 120
+    tau_b, tau_d = 0.355, 2.211
+
+    def __init__(self, sites=20, seed=0):
+        rng = np.random.default_rng(seed)
+        self.n = np.repeat(np.arange(1, 366), 24)
+        self.hours = np.tile(np.arange(24), 365)
+        start = datetime(2025, 1, 1)
+        self.lst = [(start + timedelta(hours=int(k))).strftime("%Y-%m-%d %H:%M:%S") for k in range(8760)]
+        sun = SolarParametersBatch(self.n, self.latitude, self.longitude, self.hours, self.l_st)
+        self.alpha, self.a_s, self.delta_s, self.h_ss = sun.alpha, sun.a_s, sun.delta_s, sun.h_ss
+        self.h_s = (sun.h_s + 180) % 360 - 180
+        self.day = self.alpha > 1
+        self.latitudes = rng.uniform(-55, 55, sites)
+
+@pytest.fixture(scope="session")
+def site_year():
+    return SiteYear()
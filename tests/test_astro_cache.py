@@ -0,0 +1,21 @@
+import numpy as np
+from utils.astro_cache import AstronomicalCache
+from utils.solar_parameters import SolarParametersBatch
+from utils.solar_radiation import daily_extraterrestrial_radiation
+
+def test_common_years_share_one_table():
+    cache = AstronomicalCache()
+    assert cache.table(2025, 36.08) is cache.table(2027, 36.08)
+    assert cache.table(2024, 36.08).delta_s.size == 366
+    assert cache.stats()["tables"] == 2
+
+def test_exact_latitude_keys_match_uncached_values():
+    cache = AstronomicalCache(latitude_resolution=None)
+    n = np.array([1, 80, 172, 366])
+    latitude = np.array([36.0849, -33.9, 60.0, 36.0849])
+    days = cache.gather(2024, n, latitude)
+    sun = SolarParametersBatch(n, latitude, 0.0, 12.0, 0.0)
+    np.testing.assert_array_equal(days["delta_s"], sun.delta_s)
+    np.testing.assert_array_equal(days["h_ss"], sun.h_ss)
+    np.testing.assert_array_equal(days["H_o_h"], daily_extraterrestrial_radiation(latitude, n))
+    assert cache.stats()["misses"] == 3
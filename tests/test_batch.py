@@ -0,0 +1,45 @@
+import csv
+import os
+import shutil
+import pytest
+from utils.batch import run_shard, merge_shards, chunk_path
+
+SITES = [(36.08, 115.16), (40.0, -105.0), (-33.9, 18.4), (51.5, 0.0), (25.0, 82.5)]
+
+def write_site_table(path):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["site_id", "latitude", "longitude", "beta", "a_w"] + [f"H_bar_h_{m}" for m in range(1, 13)] + [f"H_bar_d_{m}" for m in range(1, 13)])
+        for k, (latitude, longitude) in enumerate(SITES):
+            writer.writerow([f"s{k}", latitude, longitude, abs(latitude), 0] + [5000] * 12 + [1500] * 12)
+
+def test_shards_merge_across_different_table_paths(tmp_path):
+    # Two nodes mounting the same table at different paths
+    first, second = tmp_path / "node1.csv", tmp_path / "node2.csv"
+    write_site_table(first)
+    shutil.copy(first, second)
+    output_dir = str(tmp_path / "out")
+    run_shard(str(first), output_dir, 0, 2, workers=1, chunk_size=2)
+    run_shard(str(second), output_dir, 1, 2, workers=1, chunk_size=2)
+    assert merge_shards(output_dir, str(tmp_path / "merged.csv")) == len(SITES)
+    with open(tmp_path / "merged.csv", newline='') as f:
+        assert [row["site_id"] for row in csv.DictReader(f)] == [f"s{k}" for k in range(len(SITES))]
+
+def test_resume_rejects_an_edited_table(tmp_path):
+    table = tmp_path / "sites.csv"
+    write_site_table(table)
+    output_dir = str(tmp_path / "out")
+    run_shard(str(table), output_dir, workers=1, chunk_size=2)
+    content = table.read_text().replace("5000", "5100")
+    table.write_text(content)
+    with pytest.raises(ValueError, match="sites_sha256"):
+        run_shard(str(table), output_dir, workers=1, chunk_size=2)
+
+def test_merge_reports_deleted_chunk_files(tmp_path):
+    table = tmp_path / "sites.csv"
+    write_site_table(table)
+    output_dir = str(tmp_path / "out")
+    run_shard(str(table), output_dir, workers=1, chunk_size=2)
+    os.remove(chunk_path(output_dir, 1))
+    with pytest.raises(ValueError, match="not finished"):
+        merge_shards(output_dir, str(tmp_path / "merged.csv"))
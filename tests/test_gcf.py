@@ -0,0 +1,20 @@
+import numpy as np
+from utils.gcf import GCF
+
+def test_design_sweep_matches_single_designs(site_year):
+    R = np.array([0.6, 1.0, 1.5])
+    L = np.array([[2.0], [4.0]])
+    sweep = GCF(R, 0.5, L).acceptance(site_year.alpha, site_year.a_s, site_year.latitude, 0, I_b_N=800)
+    for k in range(2):
+        for j in range(3):
+            single = GCF(R[j], 0.5, L[k, 0]).acceptance(site_year.alpha, site_year.a_s, site_year.latitude, 0, I_b_N=800)
+            assert abs(single.total_energy - sweep.total_energy[k, j]) < 1e-6
+
+def test_rays_within_the_design_half_angle_are_accepted():
+    gcf = GCF(np.array([0.6, 1.0, 1.5]), 0.5, 4.0)
+    # Sun straight down the axis, just inside the half-angle, halfway through the cutoff, and beyond it
+    alpha = 90 - np.array([0.0, gcf.limit_angle[0] - 0.1, gcf.limit_angle[0] + 0.5, gcf.limit_angle[0] + 2])
+    acceptance = gcf.acceptance(alpha, 0, 0, 0)
+    np.testing.assert_allclose(acceptance.fraction[:, 0], [1, 1, 0.5, 0], atol=1e-9)
+    np.testing.assert_allclose(acceptance.fraction[0], 1)
+    np.testing.assert_allclose(acceptance.intercepted_energy[0], np.pi * gcf.R ** 2)
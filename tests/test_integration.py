@@ -0,0 +1,44 @@
+import numpy as np
+from utils.solar_parameters import solar_declination, solar_altitude
+from utils.solar_radiation import daily_extraterrestrial_radiation, extra_terrestrial_radiation_factor
+from utils.integration import TiltedSurfaceIntegral, integrate_hour_angle
+
+def test_quadrature_matches_closed_form_extraterrestrial_total(site_year):
+    n = np.arange(1, 366)
+    delta_s = solar_declination(n)
+    h_ss = np.degrees(np.arccos(-np.tan(np.radians(site_year.latitude)) * np.tan(np.radians(delta_s))))
+
+    def hourly(rows, h):
+        return {"H0": 1367 * extra_terrestrial_radiation_factor(n[rows, None]) * np.sin(np.radians(solar_altitude(site_year.latitude, delta_s[rows, None], h)))}
+
+    integrals, _, _ = integrate_hour_angle(hourly, -h_ss, h_ss, tol=1e-3)
+    np.testing.assert_allclose(integrals["H0"], daily_extraterrestrial_radiation(site_year.latitude, n), rtol=0, atol=1e-3)
+
+def test_adaptive_within_tolerance_of_fine_fixed_step(site_year):
+    # The fixed-step reference is itself accurate to about 1e-3 Wh/m^2
+    tol = 0.1
+    latitudes = site_year.latitudes
+    n = np.arange(1, 366, 7)[:, None]
+    adaptive = TiltedSurfaceIntegral(latitudes, np.abs(latitudes), 0, site_year.tau_b, site_year.tau_d, n=n, tol=tol)
+    fixed = TiltedSurfaceIntegral(latitudes, np.abs(latitudes), 0, site_year.tau_b, site_year.tau_d, n=n, step=0.05)
+    np.testing.assert_allclose(adaptive.daily["I_c"], fixed.daily["I_c"], rtol=0, atol=tol)
+
+def test_beam_reaches_a_north_facing_wall_on_summer_mornings(site_year):
+    # At 40N around the June solstice the sun rises and sets north of the east-west line
+    wall = TiltedSurfaceIntegral(40.0, 90, 180, site_year.tau_b, site_year.tau_d, n=np.array([172]), step=0.25)
+    assert wall.daily["I_b_c"][0] > 100
+
+def test_every_element_is_refined_twice():
+    def constant(rows, h):
+        return {"value": np.ones_like(h)}
+
+    _, _, intervals = integrate_hour_angle(constant, np.array([-90.0]), np.array([90.0]), min_intervals=8)
+    assert intervals[0] == 32
+
+def test_fast_mode_daily_totals_within_a_tenth_of_a_percent(site_year):
+    latitudes = site_year.latitudes
+    n = np.arange(1, 366, 7)[:, None]
+    exact = TiltedSurfaceIntegral(latitudes, np.abs(latitudes), 0, site_year.tau_b, site_year.tau_d, n=n, step=0.5)
+    fast = TiltedSurfaceIntegral(latitudes, np.abs(latitudes), 0, site_year.tau_b, site_year.tau_d, n=n, step=0.5, fast=True)
+    for name in TiltedSurfaceIntegral.components:
+        np.testing.assert_allclose(fast.daily[name], exact.daily[name], rtol=1e-3, atol=1e-2, err_msg=name)
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from utils.lj import MONTHLY_AVERAGE_DAYS, monthly_lj, lj_tilt_surface, optimal_tilt
+from utils.solar_radiation import daily_extraterrestrial_radiation
+from utils.astro_cache import AstronomicalCache
+
+@pytest.mark.parametrize("sky_type", ["isotropic", "klucher", "hay_davies"])
+@pytest.mark.parametrize("latitude", [36.08, -33.9])
+def test_tilt_surface_matches_monthly_lj(site_year, sky_type, latitude):
+    expected = monthly_lj(latitude, 30, site_year.H_bar_h, sky_type=sky_type).H_bar_c
+    surface = lj_tilt_surface(latitude, 30, site_year.H_bar_h, sky_type=sky_type)
+    np.testing.assert_allclose(surface[0, :, 0], expected, rtol=0, atol=1e-6)
+
+@pytest.mark.parametrize("latitude", [36.08, -33.9])
+def test_cached_lj_matches_uncached(site_year, latitude):
+    cache = AstronomicalCache(latitude_resolution=None)
+    expected = monthly_lj(latitude, 30, site_year.H_bar_h).H_bar_c
+    np.testing.assert_array_equal(monthly_lj(latitude, 30, site_year.H_bar_h, cache=cache).H_bar_c, expected)
+    surface = lj_tilt_surface([latitude], [0, 30], site_year.H_bar_h)
+    np.testing.assert_array_equal(lj_tilt_surface([latitude], [0, 30], site_year.H_bar_h, cache=cache), surface)
+    assert cache.stats()["hits"] > 0
+
+@pytest.mark.parametrize("latitude", [70.0, -70.0])
+def test_polar_sites_give_finite_results(latitude):
+    # Midnight sun in June/July and polar night in December at 70N (mirrored at 70S)
+    H_o_bar_h = daily_extraterrestrial_radiation(latitude, MONTHLY_AVERAGE_DAYS)
+    assert np.all(np.isfinite(H_o_bar_h)) and np.min(H_o_bar_h) == 0
+    H_bar_h = np.maximum(0.5 * H_o_bar_h, 50)
+    with np.errstate(all='raise'):
+        surface = lj_tilt_surface(latitude, [0, 30, 60], H_bar_h)
+        monthly = monthly_lj(latitude, 30, H_bar_h).H_bar_c
+        annual, _, _ = optimal_tilt(latitude, H_bar_h)
+    assert np.all(np.isfinite(surface))
+    np.testing.assert_allclose(surface[0, :, 1], monthly, rtol=0, atol=1e-6)
+    # Horizontal radiation is unchanged at zero tilt, and a polar-night month is all diffuse
+    np.testing.assert_allclose(surface[0, :, 0], H_bar_h)
+    night = H_o_bar_h == 0
+    np.testing.assert_allclose(surface[0, night, 1], H_bar_h[night] * (np.cos(np.radians(15)) ** 2 + 0.2 * np.sin(np.radians(15)) ** 2))
+    assert 30 < annual[0] < 90
+
+def test_optimal_tilt_rejects_non_finite_inputs(site_year):
+    H_bar_h = site_year.H_bar_h.copy()
+    H_bar_h[5] = np.nan
+    with pytest.raises(ValueError):
+        optimal_tilt(site_year.latitude, H_bar_h)
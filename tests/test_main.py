@@ -0,0 +1,16 @@
+import pytest
+from utils.__main__ import main
+
+def test_unknown_command_fails(capsys):
+    assert main(["nope"]) == 1
+    assert "usage" in capsys.readouterr().out
+
+def test_commands_parse_their_own_arguments(capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        main(["radiation", "--help"])
+    assert exit_info.value.code == 0
+    assert "I_c" not in capsys.readouterr().out
+    with pytest.raises(SystemExit) as exit_info:
+        main(["estimate", "no_such_model"])
+    assert exit_info.value.code == 2
+    assert main(["estimate", "cpr"]) == 0
@@ -0,0 +1,20 @@
+import csv
+from utils.portfolio import read_site_table, run_portfolio
+
+def test_malformed_rows_fail_alone(tmp_path):
+    path = tmp_path / "sites.csv"
+    header = ["site_id", "latitude", "longitude", "beta", "a_w"] + [f"H_bar_h_{m}" for m in range(1, 13)] + [f"H_bar_d_{m}" for m in range(1, 13)]
+    good = [36.08, 115.16, 36, 0] + [5000] * 12 + [1500] * 12
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerow(["ok"] + good)
+        writer.writerow(["blank_latitude", ""] + good[1:])
+        writer.writerow(["bad_beta"] + good[:2] + ["south"] + good[3:])
+        writer.writerow(["short"] + good[:-1])
+        writer.writerow(["ok2"] + good)
+
+    results = run_portfolio(read_site_table(path), workers=1)
+    assert [result.site_id for result in results] == ["ok", "blank_latitude", "bad_beta", "short", "ok2"]
+    assert [result.ok for result in results] == [True, False, False, False, True]
+    assert "ValueError" in results[1].error and "TypeError" in results[3].error
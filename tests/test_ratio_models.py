@@ -0,0 +1,14 @@
+import numpy as np
+from utils.cpr import CPR
+from utils.cprg import CPRG
+from utils.daily_integration import DailyIntegration
+from utils.ratio_models import compute_ratios
+
+def test_compute_ratios_matches_scalar_models(site_year):
+    hours = np.flatnonzero(site_year.day)[::53]
+    _, r_t = compute_ratios(("cpr", "cprg", "daily_integration"), site_year.h_s[hours], site_year.h_ss[hours], L=site_year.latitude,
+                            delta_s=site_year.delta_s[hours], H_bar_h=5240, extraterrestrial_radiation_factor=1.01)
+    for j, k in enumerate(hours):
+        h_s, h_ss, delta_s = site_year.h_s[k], site_year.h_ss[k], site_year.delta_s[k]
+        scalar = [CPR(h_s, h_ss).r_t, CPRG(h_s, h_ss).r_t, DailyIntegration(site_year.latitude, delta_s, h_s, h_ss, 5240, 1.01).r_t]
+        np.testing.assert_allclose(r_t[:, j], scalar, rtol=0, atol=1e-12)
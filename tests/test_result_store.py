@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+from utils.result_store import ResultStore, ResultStoreWriter
+
+@pytest.fixture
+def store(tmp_path):
+    writer = ResultStoreWriter(tmp_path, ["a", "b"], ["I_c"], n_hours=48, start=np.datetime64("2000-01-01T00:00"))
+    writer.write_block(0, I_c=np.arange(96, dtype=float).reshape(2, 48))
+    writer.close()
+    return ResultStore(tmp_path)
+
+def test_hour_range_covers_partial_hours(store):
+    hours = store.hour_range(np.datetime64("2000-01-01T01:30"), np.datetime64("2000-01-01T03:30"))
+    assert hours == slice(1, 4)
+    np.testing.assert_array_equal(store.read("I_c", "b", hours), [49, 50, 51])
+    assert store.hour_range("2000-01-01T00:00", "2000-01-03T00:00") == slice(0, 48)
+
+@pytest.mark.parametrize("start, end", [("1999-12-31T23:00", "2000-01-01T02:00"),
+                                        ("2000-01-02T12:00", "2000-01-03T01:00"),
+                                        ("2000-01-01T05:00", "2000-01-01T02:00")])
+def test_hour_range_rejects_bounds_outside_the_store(store, start, end):
+    with pytest.raises(ValueError):
+        store.hour_range(start, end)
@@ -0,0 +1,35 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+import pytest
+from utils.service import MicroBatcher, EstimationService
+
+def test_failing_query_does_not_fail_its_batch():
+    def square(queries):
+        if any(query < 0 for query in queries):
+            raise ValueError("negative query")
+        return [query * query for query in queries]
+
+    async def run(executor):
+        batcher = MicroBatcher(square, executor, max_batch=4, max_delay=1)
+        futures = [batcher.submit(query) for query in (1, -2, 3, 4)]
+        return batcher, await asyncio.gather(*futures, return_exceptions=True)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        batcher, results = asyncio.run(run(executor))
+    assert results[0] == 1 and results[2:] == [9, 16]
+    assert isinstance(results[1], ValueError)
+    assert batcher.retried == 4
+
+def test_list_request_reports_per_item_errors():
+    async def run(executor):
+        service = EstimationService(executor, max_delay=0.001)
+        body = b'[{"n": 80, "hour": 12, "latitude": 36.08, "longitude": 115.16}, {"n": 80.5, "hour": 12, "latitude": 36.08, "longitude": 115.16}, 3]'
+        return service, await service.dispatch("POST", "/sun-position", body)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        service, (status, response) = asyncio.run(run(executor))
+    assert status == HTTPStatus.OK
+    assert response[0]["alpha"] == pytest.approx(52.5, abs=1)
+    assert "error" in response[1] and "error" in response[2]
+    assert service.health()["astro_cache"]["misses"] >= 1
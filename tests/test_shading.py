@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+from utils.solar_estimation import AnnualSimulation
+from utils.shading import HorizonProfile, RowShading, SiteShading
+
+def test_flat_horizon_changes_nothing(site_year):
+    args = ("cpr", site_year.latitude, site_year.longitude, site_year.latitude, 0, site_year.H_bar_h, site_year.H_bar_d)
+    plain = AnnualSimulation(*args, l_st=site_year.l_st)
+    flat = AnnualSimulation(*args, l_st=site_year.l_st, shading=SiteShading(HorizonProfile([0], [0])))
+    np.testing.assert_allclose(flat.I_c, plain.I_c, rtol=0, atol=1e-9)
+
+def test_uniform_horizon_hides_sin_squared_of_the_sky():
+    factor = HorizonProfile([0], [10]).diffuse_factor(0, 0, elevation_step=0.1)
+    assert abs(float(factor) - (1 - np.sin(np.radians(10)) ** 2)) < 1e-3
+
+@pytest.mark.parametrize("beta, a_w, tracker", [(20, 0, None), (36.08, 15, None), (0, 0, "single_axis")])
+def test_row_shading_must_match_the_surface(site_year, beta, a_w, tracker):
+    shading = SiteShading(rows=RowShading(0.4, site_year.latitude))
+    with pytest.raises(ValueError):
+        AnnualSimulation("cpr", site_year.latitude, site_year.longitude, beta, a_w, site_year.H_bar_h, site_year.H_bar_d,
+                         l_st=site_year.l_st, tracker=tracker, shading=shading)
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from utils.solar_parameters import SolarParameters
+from utils.solar_radiation import SolarRadiation
+from utils.solar_estimation import SolarEstimation, AnnualSimulation
+from utils.astro_cache import AstronomicalCache
+
+def simulate(site_year, model_name="cpr", latitude=None, H_bar_h=None, **kwargs):
+    latitude = site_year.latitude if latitude is None else latitude
+    H_bar_h = site_year.H_bar_h if H_bar_h is None else H_bar_h
+    return AnnualSimulation(model_name, latitude, site_year.longitude, site_year.latitude, 0, H_bar_h, site_year.H_bar_d, l_st=site_year.l_st, **kwargs)
+
+def test_annual_simulation_matches_scalar_chain(site_year):
+    simulation = simulate(site_year, hours=np.arange(24))
+    for k in np.flatnonzero(site_year.day & (simulation.I_b_c > 0))[::61]:
+        n = site_year.n[k]
+        sp = SolarParameters(n, site_year.latitude, site_year.longitude, site_year.lst[k], site_year.l_st)
+        sr = SolarRadiation(n, sp.alpha, site_year.tau_b, site_year.tau_d, site_year.latitude, sp.a_s, 0)
+        month = simulation.month[n - 1]
+        scalar = SolarEstimation("cpr", site_year.latitude, sp.delta_s, sp.h_s, site_year.h_ss[k], site_year.H_bar_h[month], site_year.H_bar_d[month],
+                                 sr.extra_terrestrial_radiation_factor, site_year.latitude, sr.rho, sr.i, sp.alpha)
+        assert abs(scalar.I_c - simulation.I_c[k]) / max(abs(scalar.I_c), 1.0) < 1e-3
+
+def test_update_matches_fresh_simulation(site_year):
+    updated = simulate(site_year, "daily_integration", H_bar_h=site_year.H_bar_h * 1.2).update(site_year.H_bar_h, site_year.H_bar_d)
+    fresh = simulate(site_year, "daily_integration")
+    np.testing.assert_allclose(updated.I_c, fresh.I_c, rtol=0, atol=1e-9)
+
+def test_cached_simulation_matches_uncached(site_year):
+    # Off a latitude bucket, so a bucketed h_ss would show up
+    latitude = site_year.latitude + 0.0049
+    plain = simulate(site_year, "daily_integration", latitude=latitude)
+    cached = simulate(site_year, "daily_integration", latitude=latitude, cache=AstronomicalCache())
+    np.testing.assert_allclose(cached.I_c, plain.I_c, rtol=0, atol=1e-9)
+
+@pytest.mark.parametrize("latitude", [68.0, 75.0])
+def test_polar_days_keep_their_daylight(site_year, latitude):
+    # Zero-length polar nights divide by zero in the ratio models before they are masked
+    with np.errstate(divide='ignore', invalid='ignore'):
+        simulation = simulate(site_year, latitude=latitude)
+    june = simulation.monthly["I_c"][5]
+    assert np.all(np.isfinite(simulation.I_c))
+    # Midnight-sun June must not drop out between May and July
+    assert june > 0.5 * min(simulation.monthly["I_c"][4], simulation.monthly["I_c"][6])
+
+@pytest.mark.parametrize("latitude", [50.0, 68.0])
+def test_hourly_components_are_not_negative(site_year, latitude):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        simulation = simulate(site_year, "daily_integration", latitude=latitude)
+    for name in simulation.components:
+        assert np.min(getattr(simulation, name)) >= 0
@@ -0,0 +1,25 @@
+import numpy as np
+from utils.solar_parameters import SolarParameters, SolarParametersBatch
+
+def test_batch_matches_scalar_alpha(site_year):
+    batch = SolarParametersBatch(site_year.n, site_year.latitude, site_year.longitude, site_year.hours, site_year.l_st)
+    for k in range(0, 8760, 97):
+        scalar = SolarParameters(site_year.n[k], site_year.latitude, site_year.longitude, site_year.lst[k], site_year.l_st)
+        # The scalar class truncates solar time to whole seconds
+        assert abs(scalar.alpha - batch.alpha[k]) < 0.005
+
+def test_sunset_hour_angle_is_clipped_on_polar_days_and_nights():
+    # Midnight sun at 75N in June, polar night in December
+    batch = SolarParametersBatch(np.array([172, 355]), 75.0, 0.0, 12.0, 0.0)
+    np.testing.assert_allclose(batch.h_ss, [180, 0])
+    np.testing.assert_allclose(batch.h_sr, [-180, 0])
+
+def test_lazy_sunset_and_sunrise_are_computed_once(site_year, monkeypatch):
+    calls = []
+    compute = SolarParameters.sunset_and_sunrise_times
+    monkeypatch.setattr(SolarParameters, "sunset_and_sunrise_times", lambda self: calls.append(1) or compute(self))
+    eager = SolarParameters(site_year.n[1900], site_year.latitude, site_year.longitude, site_year.lst[1900], site_year.l_st)
+    calls.clear()
+    lazy = SolarParameters(site_year.n[1900], site_year.latitude, site_year.longitude, site_year.lst[1900], site_year.l_st, lazy=True)
+    assert (lazy.h_ss, lazy.h_sr) == (eager.h_ss, eager.h_sr)
+    assert len(calls) == 1
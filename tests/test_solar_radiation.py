@@ -0,0 +1,28 @@
+import numpy as np
+from utils.solar_parameters import SolarParametersBatch
+from utils.solar_radiation import SolarRadiation, SolarRadiationBatch
+
+def test_batch_matches_scalar(site_year):
+    # Night hours (alpha below -6.08) give NaN air masses; only daylight hours are compared
+    with np.errstate(invalid='ignore'):
+        batch = SolarRadiationBatch(site_year.n, site_year.alpha, site_year.tau_b, site_year.tau_d, 30, site_year.a_s, 0)
+    for k in np.flatnonzero(site_year.day)[::53]:
+        scalar = SolarRadiation(site_year.n[k], site_year.alpha[k], site_year.tau_b, site_year.tau_d, 30, site_year.a_s[k], 0)
+        assert abs(scalar.I_c - batch.I_c[k]) < 1e-9
+
+def test_fast_mode_within_documented_bound(site_year):
+    # Sun positions per site, orientations along the last axis
+    latitudes = site_year.latitudes[:8]
+    sun = SolarParametersBatch(site_year.n[:, None], latitudes, site_year.longitude, site_year.hours[:, None], site_year.l_st)
+    alpha, a_s = sun.alpha[:, :, None], sun.a_s[:, :, None]
+    tau_b, tau_d = np.linspace(0.1, 1, 8)[:, None], np.linspace(1, 3.5, 8)[:, None]
+    beta, a_w = np.array([0, 20, 45, 90]), np.array([0, 90, 180, -45])
+    with np.errstate(invalid='ignore'):
+        exact = SolarRadiationBatch(site_year.n[:, None, None], alpha, tau_b, tau_d, beta, a_s, a_w)
+    fast = SolarRadiationBatch(site_year.n[:, None, None], alpha, tau_b, tau_d, beta, a_s, a_w, fast=True)
+    assert fast.I_c.dtype == np.float32
+    for name in ("I_b_N", "I_d_h", "I_b_c", "I_d_c", "I_r_c", "I_c"):
+        day = np.broadcast_to(alpha > 0, getattr(exact, name).shape)
+        np.testing.assert_allclose(getattr(fast, name)[day], getattr(exact, name)[day], rtol=1e-3, atol=1e-2, err_msg=name)
+    day = np.broadcast_to(alpha > 0, exact.i.shape)
+    np.testing.assert_allclose(fast.i[day], exact.i[day], rtol=0, atol=0.05)
@@ -0,0 +1,28 @@
+import numpy as np
+from utils.solar_parameters import unfolded_solar_azimuth
+from utils.solar_radiation import cos_incidence_angle
+from utils.tracking import SingleAxisTracker, DualAxisTracker
+
+def test_backtracked_rows_clear_each_other(site_year):
+    gcr = 0.4
+    # Below the horizon the ideal angle passes 90 degrees and the backtracking arccos is out of range; those hours are parked at zero
+    with np.errstate(invalid='ignore'):
+        tracker = SingleAxisTracker(site_year.alpha, site_year.a_s, max_angle=90, gcr=gcr)
+    up = site_year.alpha > 0
+    footprint = np.cos(np.radians(tracker.ideal_angle - tracker.rotation)) / np.cos(np.radians(tracker.ideal_angle))
+    assert np.max(gcr * footprint[up]) <= 1 + 1e-9
+
+def test_trackers_follow_the_true_sun_direction(site_year):
+    # Sun positions north of the east-west line, where the folded azimuth points the wrong way
+    azimuth = unfolded_solar_azimuth(site_year.latitude, site_year.delta_s, site_year.h_s)
+    north = (site_year.alpha > 0) & (np.abs(azimuth) > 90)
+    assert north.any()
+
+    dual = DualAxisTracker(site_year.alpha, azimuth)
+    np.testing.assert_allclose(cos_incidence_angle(site_year.alpha, azimuth, dual.beta, dual.a_w)[north], 1, rtol=0, atol=1e-9)
+
+    # An unlimited east-west axis reaches cos(i) = sqrt(1 - s_axis^2)
+    east_west = SingleAxisTracker(site_year.alpha, azimuth, axis_azimuth=90, max_angle=90, backtrack=False)
+    along_axis = np.cos(np.radians(site_year.alpha)) * np.sin(np.radians(azimuth))
+    cos_i = cos_incidence_angle(site_year.alpha, azimuth, east_west.beta, east_west.a_w)
+    np.testing.assert_allclose(cos_i[north], np.sqrt(1 - along_axis[north] ** 2), rtol=0, atol=1e-9)
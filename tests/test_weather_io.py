@@ -0,0 +1,92 @@
+import calendar
+import csv
+import logging
+import numpy as np
+from utils.weather_io import MonthlyIrradianceAccumulator, TMY3_COLUMNS, read_irradiance_chunks, stream_site_months, estimate_from_weather_file
+
+SITE = {"latitude": 36.08, "longitude": -115.16, "beta": 30, "a_w": 0, "l_st": -120}
+
+def write_tmy3(path):
+    # Month m comes from source year 1990 + m, with a constant GHI of 100 * m W/m^2
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["723860", "LAS VEGAS", "NV", "-8.0", "36.083", "-115.150", "664"])
+        writer.writerow([TMY3_COLUMNS["date"], TMY3_COLUMNS["time"], TMY3_COLUMNS["ghi"], TMY3_COLUMNS["dhi"]])
+        for month in range(1, 13):
+            for day in range(1, calendar.monthrange(1990 + month, month)[1] + 1):
+                if (month, day) == (2, 29):
+                    continue
+                for hour in range(1, 25):
+                    writer.writerow([f"{month:02d}/{day:02d}/{1990 + month}", f"{hour:02d}:00", 100 * month, 25 * month])
+
+def write_long_format(path, sites):
+    # One row per site and hour; GHI is constant per site
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["site_id", "timestamp", "ghi", "dhi"])
+        for site, start, hours, ghi in sites:
+            for k in range(1, hours + 1):
+                stamp = np.datetime64(start, 'm') + np.timedelta64(60 * k, 'm')
+                writer.writerow([site, str(stamp), ghi, ghi / 4])
+
+def hourly_chunk(site, start, hours, ghi):
+    timestamp = np.datetime64(start, 'm') + np.arange(1, hours + 1) * np.timedelta64(60, 'm')
+    return {"site": np.array([site] * hours), "timestamp": timestamp, "ghi": np.full(hours, ghi), "dhi": np.full(hours, ghi / 4)}
+
+def test_months_before_1970_keep_their_year_and_site():
+    accumulator = MonthlyIrradianceAccumulator()
+    first = hourly_chunk("a", "1969-12-01T00:00", 31 * 24, 100.0)
+    second = hourly_chunk("b", "1970-01-01T00:00", 31 * 24, 200.0)
+    accumulator.update({name: np.concatenate([first[name], second[name]]) for name in first})
+    assert set(accumulator.totals) == {("a", 1969), ("b", 1970)}
+    H_bar_h, H_bar_d = accumulator.monthly_means("a", 1969)
+    np.testing.assert_allclose([H_bar_h[11], H_bar_d[11]], [2400, 600])
+    H_bar_h, _ = accumulator.monthly_means("b", 1970)
+    np.testing.assert_allclose(H_bar_h[0], 4800)
+
+def test_tmy3_reader_takes_the_metadata_site_and_rolls_24_00_over(tmp_path):
+    path = tmp_path / "tmy3.csv"
+    write_tmy3(path)
+    chunks = list(read_irradiance_chunks(path, chunk_size=1000, columns=TMY3_COLUMNS))
+    assert sum(len(chunk["ghi"]) for chunk in chunks) == 8760
+    first = chunks[0]
+    assert set(first["site"]) == {"723860"}
+    assert first["timestamp"][0] == np.datetime64("1991-01-01T01:00")
+    assert first["timestamp"][23] == np.datetime64("1991-01-02T00:00")
+
+def test_tmy3_months_from_different_years_form_one_site_year(tmp_path):
+    path = tmp_path / "tmy3.csv"
+    write_tmy3(path)
+    results = list(stream_site_months(path, chunk_size=1000, columns=TMY3_COLUMNS))
+    assert len(results) == 1
+    site, year, H_bar_h, H_bar_d = results[0]
+    assert (site, year) == ("723860", None)
+    np.testing.assert_allclose(H_bar_h, 2400 * np.arange(1, 13))
+    np.testing.assert_allclose(H_bar_d, 600 * np.arange(1, 13))
+
+def test_long_format_sites_and_years_stream_across_chunks(tmp_path):
+    path = tmp_path / "hourly.csv"
+    write_long_format(path, [("a", "1999-01-01T00:00", 2 * 8760, 200.0), ("b", "2001-01-01T00:00", 8760, 100.0)])
+    results = [(site, year, H_bar_h) for site, year, H_bar_h, _ in stream_site_months(path, chunk_size=5000)]
+    assert [(site, year) for site, year, _ in results] == [("a", 1999), ("a", 2000), ("b", 2001)]
+    np.testing.assert_allclose(results[0][2], 4800)
+    # The last hour of 2000 ends at 2001-01-01T00:00
+    np.testing.assert_allclose(results[2][2], 2400)
+
+def test_estimate_from_weather_file_skips_incomplete_years(tmp_path, caplog):
+    path = tmp_path / "hourly.csv"
+    write_long_format(path, [("a", "1999-01-01T00:00", 8760 + 24 * 31, 200.0)])
+    with caplog.at_level(logging.WARNING):
+        results = list(estimate_from_weather_file(path, {"a": SITE}))
+    assert [(site, year) for site, year, _, _ in results] == [("a", 1999)]
+    assert "year 2000" in caplog.text
+    _, _, simulation, lj_model = results[0]
+    assert np.all(np.isfinite(simulation.annual["I_c"])) and np.all(np.isfinite(lj_model.H_bar_c))
+
+def test_estimate_from_tmy3_file(tmp_path):
+    path = tmp_path / "tmy3.csv"
+    write_tmy3(path)
+    results = list(estimate_from_weather_file(path, {"723860": SITE}, columns=TMY3_COLUMNS))
+    assert [(site, year) for site, year, _, _ in results] == [("723860", None)]
+    _, _, simulation, lj_model = results[0]
+    assert np.all(np.isfinite(simulation.annual["I_c"])) and np.all(np.isfinite(lj_model.H_bar_c))